@@ -10,6 +10,9 @@ from django.utils.decorators import method_decorator
 from django.utils import timezone
 from .serializers import UserRegistrationSerializer, UserLoginSerializer
 import json
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 @api_view(['POST'])
@@ -75,12 +78,7 @@ def login_user(request):
     Login a user and return authentication token
     """
     try:
-        print(f"LOGIN DEBUG: Received request method: {request.method}")
-        print(f"LOGIN DEBUG: Request headers: {dict(request.headers)}")
-        print(f"LOGIN DEBUG: Request body: {request.body}")
-        
         data = json.loads(request.body)
-        print(f"LOGIN DEBUG: Parsed data: {data}")
         
         # Authenticate user manually
         email = data.get('email')
@@ -89,7 +87,7 @@ def login_user(request):
         try:
             user = User.objects.get(email=email)
             if user.check_password(password):
-                print(f"LOGIN DEBUG: User found and password correct: {user}")
+                logger.debug("Login succeeded", extra={'user_id': user.id})
                 
                 # Update last_login field manually since we're not using Django's login()
                 user.last_login = timezone.now()
@@ -97,7 +95,7 @@ def login_user(request):
                 
                 # Create or get token for the user
                 token, created = Token.objects.get_or_create(user=user)
-                print(f"LOGIN DEBUG: Token created/retrieved: {token.key}")
+                logger.debug("Auth token %s", 'created' if created else 'reused', extra={'user_id': user.id})
                 
                 user_data = {
                     'id': user.id,
@@ -116,13 +114,13 @@ def login_user(request):
                     'token': token.key  # Return the token
                 }, status=status.HTTP_200_OK)
             else:
-                print(f"LOGIN DEBUG: Incorrect password for user: {user}")
+                logger.info("Login failed: incorrect password", extra={'user_id': user.id})
                 return Response({
                     'success': False,
                     'error': 'Invalid email or password'
                 }, status=status.HTTP_400_BAD_REQUEST)
         except User.DoesNotExist:
-            print(f"LOGIN DEBUG: User with email {email} does not exist")
+            logger.info("Login failed: unknown email")
             return Response({
                 'success': False,
                 'error': 'Invalid email or password'
@@ -134,7 +132,7 @@ def login_user(request):
             'error': 'Invalid JSON data'
         }, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
-        print(f"LOGIN DEBUG: Exception occurred: {str(e)}")
+        logger.exception("Login failed: %s", e)
         return Response({
             'success': False,
             'error': str(e)
@@ -170,10 +168,7 @@ def check_auth(request):
     """
     Check if user is authenticated via token
     """
-    print(f"CHECK AUTH DEBUG: Request method: {request.method}")
-    print(f"CHECK AUTH DEBUG: Request headers: {dict(request.headers)}")
-    print(f"CHECK AUTH DEBUG: User authenticated: {request.user.is_authenticated}")
-    print(f"CHECK AUTH DEBUG: User: {request.user}")
+    logger.debug("Auth check", extra={'authenticated': request.user.is_authenticated, 'user_id': request.user.id})
     
     if request.user.is_authenticated:
         return Response({
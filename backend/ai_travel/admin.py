@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import AIItinerary, BudgetEstimate, AIGenerationLog
+from .models import AIItinerary, BudgetEstimate, AIGenerationLog, AIGenerationJob, TripSkeleton
 
 @admin.register(AIItinerary)
 class AIItineraryAdmin(admin.ModelAdmin):
@@ -35,6 +35,13 @@ class AIItineraryAdmin(admin.ModelAdmin):
     def has_delete_permission(self, request, obj=None):
         return request.user.is_superuser
 
+@admin.register(TripSkeleton)
+class TripSkeletonAdmin(admin.ModelAdmin):
+    list_display = ['destination_key', 'duration_days', 'budget', 'travel_style', 'generated_at', 'updated_at']
+    list_filter = ['budget', 'travel_style', 'generated_at']
+    search_fields = ['destination_key']
+    readonly_fields = ['updated_at']
+
 @admin.register(BudgetEstimate)
 class BudgetEstimateAdmin(admin.ModelAdmin):
     list_display = ['itinerary', 'total_min', 'total_max', 'created_at']
@@ -75,14 +82,20 @@ class BudgetEstimateAdmin(admin.ModelAdmin):
 
 @admin.register(AIGenerationLog)
 class AIGenerationLogAdmin(admin.ModelAdmin):
-    list_display = ['itinerary', 'request_type', 'success', 'response_time', 'timestamp']
-    list_filter = ['request_type', 'success', 'timestamp']
-    search_fields = ['itinerary__destination']
+    list_display = ['destination', 'request_type', 'success', 'cache_hit', 'response_time',
+                    'time_to_first_byte', 'queue_time', 'tokens_used', 'retries', 'timestamp']
+    list_filter = ['request_type', 'success', 'cache_hit', 'performance_mode', 'priority', 'timestamp']
+    search_fields = ['destination', 'itinerary__destination', 'cache_key']
     readonly_fields = ['timestamp']
     
     fieldsets = (
         ('Generation Info', {
-            'fields': ('itinerary', 'request_type', 'success', 'response_time', 'tokens_used')
+            'fields': ('itinerary', 'request_type', 'destination', 'performance_mode', 'model_name',
+                       'priority', 'success', 'status_code', 'retries', 'cache_hit', 'cache_key')
+        }),
+        ('Usage', {
+            'fields': ('prompt_tokens', 'completion_tokens', 'tokens_used', 'response_time', 'time_to_first_byte',
+                       'queue_time')
         }),
         ('Content', {
             'fields': ('prompt_sent', 'response_received', 'error_message'),
@@ -101,3 +114,13 @@ class AIGenerationLogAdmin(admin.ModelAdmin):
     
     def has_delete_permission(self, request, obj=None):
         return request.user.is_superuser
+
+@admin.register(AIGenerationJob)
+class AIGenerationJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'status', 'user', 'attempts', 'worker_id', 'created_at', 'finished_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['id', 'session_id']
+    readonly_fields = ['id', 'created_at', 'started_at', 'finished_at', 'attempts', 'worker_id']
+    
+    def has_add_permission(self, request):
+        return False  # Jobs are queued through the generate endpoint
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AiTravelConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ai_travel'
+
+    def ready(self):
+        # Connects the setting_changed receiver that hot-reloads the shared AI services
+        from . import registry  # noqa: F401
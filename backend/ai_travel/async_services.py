@@ -0,0 +1,302 @@
+"""
+Asyncio variant of AIService for ASGI deployments.
+
+Upstream calls go through a shared httpx.AsyncClient, so a single process can
+hold hundreds of in-flight generations while it waits on OpenRouter instead
+of parking one worker thread per request.
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+import weakref
+from typing import Dict, Any, Optional, Tuple
+
+import httpx
+from asgiref.sync import sync_to_async
+
+from .health import get_upstream_health
+from .http_client import get_http_config
+from .retry import DeadlineRetry
+from .scheduler import current_priority, get_upstream_scheduler
+from .services import AIService
+
+logger = logging.getLogger(__name__)
+
+# One pooled client (and one in-flight table) per running event loop
+_async_clients = weakref.WeakKeyDictionary()
+_async_inflight = weakref.WeakKeyDictionary()
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Return the keep-alive AsyncClient bound to the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        config = get_http_config()
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(config['READ_TIMEOUT'], connect=config['CONNECT_TIMEOUT']),
+            limits=httpx.Limits(
+                max_connections=config['ASYNC_MAX_CONNECTIONS'],
+                max_keepalive_connections=config['POOL_SIZE'] if config['KEEPALIVE'] else 0,
+            ),
+            headers={'Content-Type': 'application/json'},
+        )
+        _async_clients[loop] = client
+    return client
+
+
+class AsyncAIService(AIService):
+    """AIService whose upstream calls and trip generation are coroutines"""
+
+    async def _apost_chat(self, payload: Dict[str, Any], timeout: Optional[float] = None,
+                          request_type: str = 'itinerary', trip_data: Optional[Dict[str, Any]] = None,
+                          retries: int = 0) -> httpx.Response:
+        """POST a chat completion through the shared async client and record its usage"""
+        client = get_async_http_client()
+        request_timeout = httpx.USE_CLIENT_DEFAULT
+        if timeout is not None:
+            request_timeout = httpx.Timeout(timeout, connect=get_http_config()['CONNECT_TIMEOUT'])
+
+        # Waits for a rate-limit slot on the event loop; raises UpstreamQueueTimeout when saturated
+        queue_time = await get_upstream_scheduler().aacquire(request_type, current_priority())
+        probe = get_upstream_health().before_call()  # Raises CircuitOpenError while the circuit is open
+        start_time = time.time()
+        request = client.build_request(
+            'POST',
+            self.api_url,
+            headers={'Authorization': f'Bearer {self.api_key}'},
+            json=payload,
+            timeout=request_timeout
+        )
+        try:
+            # Send with a streamed body so time-to-first-byte is measurable
+            response = await client.send(request, stream=True)
+            ttfb = time.time() - start_time
+            try:
+                await response.aread()
+            finally:
+                await response.aclose()
+        except BaseException as e:
+            # BaseException too: a cancelled or interrupted probe must still be released
+            self._record_call(request_type, payload, trip_data, latency=time.time() - start_time,
+                              retries=retries, success=False, error=str(e), probe=probe,
+                              queue_time=queue_time)
+            raise
+        response.upstream_latency = time.time() - start_time
+        logger.debug("OpenRouter async call: %.2fs", response.upstream_latency, extra={
+            'upstream_latency': round(response.upstream_latency, 3),
+            'ttfb': round(ttfb, 3),
+        })
+
+        usage, content = None, response.text
+        if response.status_code == 200:
+            try:
+                body = response.json()
+                usage = body.get('usage')
+                content = body['choices'][0]['message']['content']
+            except (ValueError, KeyError, IndexError, TypeError):
+                pass
+        self._record_call(
+            request_type, payload, trip_data,
+            latency=response.upstream_latency,
+            ttfb=ttfb,
+            usage=usage,
+            response_text=content,
+            status_code=response.status_code,
+            retries=retries,
+            success=response.status_code == 200,
+            error='' if response.status_code == 200 else response.text[:500],
+            probe=probe,
+            queue_time=queue_time
+        )
+        return response
+
+    async def agenerate_complete_trip(self, trip_data: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any], float]:
+        """
+        Async counterpart of generate_complete_trip.
+        Returns: (itinerary_content, budget_content, total_time)
+        """
+        start_time = time.time()
+
+        # The cache key (destination index), cache backends and the stored-itinerary lookup
+        # block, keep them off the event loop (thread-sensitive, as they use the ORM)
+        cache_key, cached_result = await sync_to_async(self._lookup_trip)(trip_data)
+        if cached_result:
+            itinerary_content, budget_content = self._personalize_trip(*cached_result, trip_data)
+            elapsed = time.time() - start_time
+            logger.debug("Returned from cache in %.3fs", elapsed, extra={'cache_key': cache_key})
+            self._record_trip(trip_data, cache_key, cache_hit=True, latency=elapsed)
+            return itinerary_content, budget_content, elapsed
+
+        # Personalizing copies the shared skeleton, so joined requests never share dicts
+        result = await self._acoalesce(cache_key, self._skeleton_trip_data(trip_data))
+        itinerary_result, budget_result = self._personalize_trip(*result, trip_data)
+        total_time = time.time() - start_time
+        self._record_trip(trip_data, cache_key, cache_hit=False, latency=total_time)
+        return itinerary_result, budget_result, total_time
+
+    async def _acoalesce(self, cache_key: str, trip_data: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Single-flight on the event loop: identical requests await one skeleton generation"""
+        loop = asyncio.get_running_loop()
+        inflight = _async_inflight.setdefault(loop, {})
+
+        future = inflight.get(cache_key)
+        while future is not None:
+            # asyncio.wait leaves the shared future alone when this caller is cancelled
+            # and returns normally when the leader was; a cancelled leader has already
+            # cleared its entry, so the next caller in takes over as leader.
+            await asyncio.wait({future})
+            if not future.cancelled():
+                logger.debug("Joined in-flight generation for %s", cache_key)
+                return future.result()
+            future = inflight.get(cache_key)
+
+        future = loop.create_future()
+        inflight[cache_key] = future
+        try:
+            result = await self._agenerate_and_cache(trip_data, cache_key)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved when nobody else was waiting
+            raise
+        finally:
+            inflight.pop(cache_key, None)
+
+    async def _agenerate_and_cache(self, trip_data: Dict[str, Any], cache_key: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Run itinerary and budget generation concurrently and cache the pair"""
+        start_time = time.time()
+        if self.performance_mode == 'combined':
+            itinerary_result, budget_result = await self.agenerate_combined_trip(trip_data)
+            logger.debug("Combined async generation took %.2fs", time.time() - start_time)
+            return await sync_to_async(self._set_cache, thread_sensitive=False)(cache_key, (itinerary_result, budget_result))
+
+        itinerary_outcome, budget_outcome = await asyncio.gather(
+            self.agenerate_itinerary(trip_data),
+            self.agenerate_budget_estimate(trip_data),
+            return_exceptions=True
+        )
+
+        if isinstance(itinerary_outcome, Exception):
+            logger.warning("Async itinerary generation failed: %s", itinerary_outcome)
+            itinerary_result = await self._acreate_fallback_detailed_itinerary(trip_data)
+        else:
+            itinerary_result = itinerary_outcome[0]
+
+        if isinstance(budget_outcome, Exception):
+            logger.warning("Async budget generation failed: %s", budget_outcome)
+            budget_result = self._create_fallback_budget(trip_data)
+        else:
+            budget_result = budget_outcome[0]
+
+        logger.debug("Async generation took %.2fs", time.time() - start_time)
+        return await sync_to_async(self._set_cache, thread_sensitive=False)(cache_key, (itinerary_result, budget_result))
+
+    async def agenerate_combined_trip(self, trip_data: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Async counterpart of generate_combined_trip, returns (itinerary_content, budget_content)"""
+        payload = self._build_combined_payload(trip_data)
+        content = None
+        try:
+            response = await self._apost_chat(payload, request_type='combined', trip_data=trip_data)
+            if response.status_code == 200:
+                content = response.json()['choices'][0]['message']['content']
+            else:
+                logger.warning("OpenRouter API error for combined trip: %s", response.status_code)
+        except Exception as e:
+            logger.warning("Error calling OpenRouter for combined trip: %s", e)
+        return self._parse_combined_content(content, trip_data)
+
+    async def agenerate_itinerary(self, trip_data: Dict[str, Any]) -> Tuple[Dict[str, Any], float]:
+        """Async counterpart of generate_itinerary"""
+        start_time = time.time()
+        if self.performance_mode == 'fast':
+            result = await self._acreate_fallback_detailed_itinerary(trip_data)
+            return result, time.time() - start_time
+
+        payload = self._build_itinerary_payload(trip_data)
+        try:
+            response = await self._apost_chat(payload, request_type='itinerary', trip_data=trip_data)
+            if response.status_code == 200:
+                content = response.json()['choices'][0]['message']['content']
+                formatted_response = self._parse_itinerary_content(content, trip_data)
+                if formatted_response is not None:
+                    return formatted_response, time.time() - start_time
+            else:
+                logger.warning("OpenRouter API error for itinerary: %s", response.status_code)
+        except Exception as e:
+            logger.warning("Error calling OpenRouter for itinerary: %s", e)
+
+        return await self._acreate_fallback_detailed_itinerary(trip_data), 2.0
+
+    async def agenerate_budget_estimate(self, trip_data: Dict[str, Any]) -> Tuple[Dict[str, Any], float]:
+        """Async counterpart of generate_budget_estimate"""
+        start_time = time.time()
+        if self.performance_mode == 'fast':
+            return self._create_fallback_budget(trip_data), time.time() - start_time
+
+        payload = self._build_budget_payload(trip_data)
+        try:
+            response = await self._apost_chat(payload, request_type='budget', trip_data=trip_data)
+            if response.status_code == 200:
+                content = response.json()['choices'][0]['message']['content']
+                budget_data = self._parse_budget_content(content, trip_data)
+                if budget_data is not None:
+                    return budget_data, time.time() - start_time
+            else:
+                logger.warning("OpenRouter API error for budget: %s", response.status_code)
+        except Exception as e:
+            logger.warning("Error calling OpenRouter for budget: %s", e)
+
+        return self._create_fallback_budget(trip_data), 1.5
+
+    async def _acreate_fallback_detailed_itinerary(self, trip_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Async counterpart of _create_fallback_detailed_itinerary"""
+        ai_recommendations = None
+        if self.performance_mode in ['hybrid', 'ai']:
+            ai_recommendations = await self._afetch_ai_recommendations(trip_data)
+        return self._build_fallback_itinerary(trip_data, ai_recommendations)
+
+    async def _afetch_ai_recommendations(self, trip_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Call the recommendations endpoint within the retry deadline without blocking the loop"""
+        if not self._recommendations_preflight():
+            return None
+        destination = trip_data.get('destination', 'Unknown')
+        attempts = itertools.count()
+        return await DeadlineRetry().arun(
+            lambda timeout: self._agenerate_ai_recommendations(trip_data, timeout=timeout, retries=next(attempts)),
+            label=f"AI recommendations for {destination}"
+        )
+
+    async def _agenerate_ai_recommendations(self, trip_data: Dict[str, Any], timeout: float = 15,
+                                            retries: int = 0) -> Optional[Dict[str, Any]]:
+        """Async counterpart of _generate_ai_recommendations"""
+        destination = trip_data.get('destination', 'Unknown')
+        if not self._recommendations_preflight():
+            return None
+
+        payload = self._build_recommendations_payload(trip_data)
+        try:
+            response = await self._apost_chat(
+                payload, timeout=timeout,
+                request_type='recommendations', trip_data=trip_data, retries=retries
+            )
+            if response.status_code == 200:
+                content = response.json()['choices'][0]['message']['content']
+                return self._parse_recommendations_content(content, destination)
+            logger.warning("OpenRouter API error for recommendations: %s", response.status_code)
+            return None
+        except httpx.TimeoutException:
+            logger.warning("AI recommendations request timed out for %s", destination)
+            return None
+        except httpx.HTTPError as req_err:
+            logger.warning("Network error calling OpenRouter for recommendations: %s", req_err)
+            return None
+        except Exception:
+            logger.exception("Unexpected error generating AI recommendations")
+            return None
@@ -0,0 +1,313 @@
+"""
+Cache backends for AI trip results.
+
+Every backend exposes the same small interface (get / set / delete / clear /
+stats) so AIService can switch between an in-process LRU, Django's cache
+framework or a local SQLite file shared by all workers on the host.
+"""
+
+import json
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+
+DEFAULT_CACHE_CONFIG = {
+    'BACKEND': 'sqlite',            # 'memory', 'django' or 'sqlite'
+    'TTL': 3600,                    # Seconds before an entry expires
+    'MAX_ENTRIES': 500,             # LRU bound (memory and sqlite backends)
+    'MAX_BYTES': 64 * 1024 * 1024,  # Memory cap for stored payloads
+    'LOCATION': None,               # SQLite file, defaults to BASE_DIR/ai_cache.sqlite3
+    'DJANGO_CACHE_ALIAS': 'default',
+    'KEY_PREFIX': 'ai_trip:',
+}
+
+
+def _encode(value: Any) -> bytes:
+    return json.dumps(value, default=str).encode('utf-8')
+
+
+def _decode(payload: bytes) -> Any:
+    return json.loads(payload.decode('utf-8'))
+
+
+class BaseTripCache:
+    """Common bookkeeping shared by all cache backends"""
+
+    name = 'base'
+
+    def __init__(self, config: Dict[str, Any]):
+        self.ttl = config['TTL']
+        self.max_entries = config['MAX_ENTRIES']
+        self.max_bytes = config['MAX_BYTES']
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def _record(self, hit: bool):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'backend': self.name,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+class MemoryTripCache(BaseTripCache):
+    """In-process LRU cache with TTL expiry and a byte cap"""
+
+    name = 'memory'
+
+    def __init__(self, config: Dict[str, Any]):
+        super().__init__(config)
+        self._entries = OrderedDict()  # key -> (payload, expires_at)
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                payload = None
+            elif entry[1] <= time.time():
+                self._remove(key)
+                payload = None
+            else:
+                self._entries.move_to_end(key)
+                payload = entry[0]
+        self._record(payload is not None)
+        # Decode outside the lock; callers get their own copy to mutate
+        return _decode(payload) if payload is not None else None
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        payload = _encode(value)
+        if len(payload) > self.max_bytes:
+            return
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (payload, expires_at)
+            self._size += len(payload)
+            self._evict()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        data = super().stats()
+        data.update({'entries': len(self._entries), 'bytes': self._size})
+        return data
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry[0])
+
+    def _evict(self):
+        now = time.time()
+        for key in [k for k, (_, expires_at) in self._entries.items() if expires_at <= now]:
+            self._remove(key)
+        while self._entries and (len(self._entries) > self.max_entries or self._size > self.max_bytes):
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+
+
+class DjangoTripCache(BaseTripCache):
+    """
+    Delegates to a configured Django cache (Redis, Memcached, database...).
+    The alias may be shared with sessions and other data, so clear() never
+    flushes it: keys carry a generation number, and clearing bumps the
+    generation so the old entries become unreachable and expire on their own.
+    """
+
+    name = 'django'
+
+    def __init__(self, config: Dict[str, Any]):
+        super().__init__(config)
+        self.alias = config['DJANGO_CACHE_ALIAS']
+        self.prefix = config['KEY_PREFIX']
+        self._generation_key = self.prefix + 'generation'
+
+    @property
+    def _backend(self):
+        from django.core.cache import caches
+        return caches[self.alias]
+
+    def _key(self, key: str) -> str:
+        generation = self._backend.get(self._generation_key, 0)
+        # Hash so destinations with spaces/unicode are valid memcached keys
+        return f"{self.prefix}{generation}:{hashlib.sha1(key.encode('utf-8')).hexdigest()}"
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self._backend.get(self._key(key))
+        self._record(value is not None)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        self._backend.set(self._key(key), value, self.ttl if ttl is None else ttl)
+
+    def delete(self, key: str):
+        self._backend.delete(self._key(key))
+
+    def clear(self):
+        try:
+            self._backend.incr(self._generation_key)
+        except ValueError:
+            # No generation stored yet (or it was evicted): entries were written under 0
+            self._backend.set(self._generation_key, 1, None)
+
+
+class SQLiteTripCache(BaseTripCache):
+    """File-backed LRU cache shared by every worker on the host and kept across restarts"""
+
+    name = 'sqlite'
+
+    def __init__(self, config: Dict[str, Any]):
+        super().__init__(config)
+        self.location = str(config['LOCATION'] or settings.BASE_DIR / 'ai_cache.sqlite3')
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS trip_cache ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, '
+                'expires_at REAL NOT NULL, last_access REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS trip_cache_last_access ON trip_cache (last_access)')
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.location, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        conn = self._connection()
+        now = time.time()
+        row = conn.execute(
+            'SELECT value FROM trip_cache WHERE key = ? AND expires_at > ?', (key, now)
+        ).fetchone()
+        if row is not None:
+            conn.execute('UPDATE trip_cache SET last_access = ? WHERE key = ?', (now, key))
+        self._record(row is not None)
+        return _decode(row[0]) if row is not None else None
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        payload = _encode(value)
+        if len(payload) > self.max_bytes:
+            return
+        now = time.time()
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(
+                'INSERT OR REPLACE INTO trip_cache (key, value, size, expires_at, last_access) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (key, payload, len(payload), now + (self.ttl if ttl is None else ttl), now)
+            )
+            self._evict(conn, now)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def delete(self, key: str):
+        self._connection().execute('DELETE FROM trip_cache WHERE key = ?', (key,))
+
+    def clear(self):
+        self._connection().execute('DELETE FROM trip_cache')
+
+    def stats(self) -> Dict[str, Any]:
+        data = super().stats()
+        entries, size = self._connection().execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM trip_cache'
+        ).fetchone()
+        data.update({'entries': entries, 'bytes': size, 'location': self.location})
+        return data
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        conn.execute('DELETE FROM trip_cache WHERE expires_at <= ?', (now,))
+        entries, size = conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM trip_cache'
+        ).fetchone()
+        if entries <= self.max_entries and size <= self.max_bytes:
+            return
+        # Walk from least recently used until both limits are satisfied
+        for key, entry_size in conn.execute(
+            'SELECT key, size FROM trip_cache ORDER BY last_access ASC'
+        ).fetchall():
+            if entries <= self.max_entries and size <= self.max_bytes:
+                break
+            conn.execute('DELETE FROM trip_cache WHERE key = ?', (key,))
+            entries -= 1
+            size -= entry_size
+
+
+CACHE_BACKENDS = {
+    'memory': MemoryTripCache,
+    'django': DjangoTripCache,
+    'sqlite': SQLiteTripCache,
+}
+
+_trip_cache = None
+_trip_cache_lock = threading.Lock()
+
+
+def get_cache_config() -> Dict[str, Any]:
+    """Merge settings.AI_CACHE over the defaults"""
+    config = dict(DEFAULT_CACHE_CONFIG)
+    config.update(getattr(settings, 'AI_CACHE', {}))
+    return config
+
+
+def get_trip_cache() -> BaseTripCache:
+    """Return the process-wide trip cache, building it on first use"""
+    global _trip_cache
+    if _trip_cache is None:
+        with _trip_cache_lock:
+            if _trip_cache is None:
+                config = get_cache_config()
+                backend = config['BACKEND']
+                if backend not in CACHE_BACKENDS:
+                    raise ValueError(f"Unknown AI_CACHE backend: {backend}")
+                _trip_cache = CACHE_BACKENDS[backend](config)
+    return _trip_cache
+
+
+def reset_trip_cache():
+    """Drop the cached backend so the next call re-reads settings"""
+    global _trip_cache
+    with _trip_cache_lock:
+        _trip_cache = None
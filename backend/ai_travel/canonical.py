@@ -0,0 +1,260 @@
+"""
+Destination canonicalization for AI cache keys.
+
+"Paris", "paris, france", "Paris (FR)" and "París" should all hit the same
+cached trip. DestinationIndex folds accents, strips country suffixes,
+resolves aliases and fuzzy-matches against the cities we know about
+(destinations.City, free_trips.FreeTripLocation and the fallback catalog).
+A qualifier is only stripped when it is a known country name or ISO code,
+so "Paris, Texas" and "Portland, Maine" keep their own keys.
+"""
+
+import difflib
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Common exonyms and abbreviations; extend with settings.AI_DESTINATION_ALIASES
+DEFAULT_ALIASES = {
+    'nyc': 'new york',
+    'new york city': 'new york',
+    'manhattan': 'new york',
+    'roma': 'rome',
+    'firenze': 'florence',
+    'venezia': 'venice',
+    'milano': 'milan',
+    'napoli': 'naples',
+    'munchen': 'munich',
+    'koln': 'cologne',
+    'wien': 'vienna',
+    'praha': 'prague',
+    'lisboa': 'lisbon',
+    'bombay': 'mumbai',
+    'peking': 'beijing',
+    'saigon': 'ho chi minh city',
+    'sf': 'san francisco',
+    'kyiv': 'kiev',
+}
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+# "<place><separator><qualifier>" where the qualifier follows the last ",", "(", " - " or "/"
+_TRAILING_QUALIFIER = re.compile(r"^(?P<place>.+?)\s*(?:,|\(|\s-\s|/)\s*(?P<qualifier>[^,(/]+?)\s*\)?$")
+
+
+def fold(text: str) -> str:
+    """Lowercase, strip accents and punctuation, collapse whitespace"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char)).lower()
+    text = _PUNCTUATION.sub(' ', text.replace("'", ''))
+    return ' '.join(text.split())
+
+
+class DestinationIndex:
+    """Maps free-form destination strings to one canonical key per city"""
+
+    FUZZY_CUTOFF = 0.85
+    MEMO_SIZE = 2048
+
+    def __init__(self, aliases: Optional[Dict[str, str]] = None):
+        self._aliases = {fold(alias): fold(target) for alias, target in (aliases or {}).items()}
+        self._names: Set[str] = set()
+        self._display: Dict[str, str] = {}
+        self._countries: Dict[str, str] = {}  # folded country name or ISO code -> folded country name
+        self._city_countries: Dict[str, Set[str]] = {}
+        self._memo: 'OrderedDict[str, str]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.failed_sources: List[str] = []  # Catalog sources that could not be read (see build_destination_index)
+
+    def add_city(self, name: str, country: str = '', country_code: str = ''):
+        country_name, code = fold(country), fold(country_code)
+        if country_name:
+            self._countries[country_name] = country_name
+            if code:
+                self._countries.setdefault(code, country_name)
+        name = ' '.join((name or '').split())
+        place, qualifier = self._split_qualifier(name)
+        if qualifier and fold(qualifier) in (country_name, code):
+            name = place
+        key = fold(name)
+        if key:
+            self._names.add(key)
+            self._display.setdefault(key, name)
+            if country_name:
+                self._city_countries.setdefault(key, set()).add(country_name)
+
+    def add_alias(self, alias: str, target: str):
+        self._aliases[fold(alias)] = fold(target)
+
+    @staticmethod
+    def _split_qualifier(text: str) -> Tuple[str, str]:
+        match = _TRAILING_QUALIFIER.match(text or '')
+        return (match.group('place'), match.group('qualifier')) if match else (text, '')
+
+    def _strip_country_suffix(self, text: str) -> str:
+        """
+        Drop ", France" / "(FR)" / " - Japan" style qualifiers that name a known
+        country. An ISO code is only trusted for a city known in that country, so
+        "Cambridge, MA" is not read as Morocco.
+        """
+        while True:
+            place, qualifier = self._split_qualifier(text)
+            folded = fold(qualifier)
+            country = self._countries.get(folded)
+            if not country:
+                return text
+            if folded != country and country not in self._city_countries.get(fold(place), ()):
+                return text
+            text = place
+
+    def _strip_country_words(self, text: str) -> str:
+        """Drop a trailing country name written without a separator ("paris france")"""
+        for country in sorted(self._countries, key=len, reverse=True):
+            if text.endswith(' ' + country):
+                place = text[:-len(country)].strip()
+                if self._countries[country] in self._city_countries.get(place, ()):
+                    return place
+        return text
+
+    def canonicalize(self, destination: str) -> str:
+        raw = (destination or '').strip()
+        with self._lock:
+            cached = self._memo.get(raw)
+            if cached is not None:
+                self._memo.move_to_end(raw)
+                return cached
+
+        key = self._resolve(raw)
+
+        with self._lock:
+            self._memo[raw] = key
+            if len(self._memo) > self.MEMO_SIZE:
+                self._memo.popitem(last=False)
+        return key
+
+    def display_name(self, destination: str) -> str:
+        """Proper name of the canonical city, or the input if the city is unknown"""
+        return self._display.get(self.canonicalize(destination), (destination or '').strip())
+
+    def _resolve(self, raw: str) -> str:
+        folded = fold(raw)
+        stripped = fold(self._strip_country_suffix(' '.join(raw.split())))
+        for candidate in (folded, stripped):
+            if candidate in self._aliases:
+                return self._aliases[candidate]
+            if candidate in self._names:
+                return candidate
+
+        text = self._strip_country_words(stripped)
+        if text in self._aliases:
+            return self._aliases[text]
+        if text in self._names or not text:
+            return text
+
+        # Typos only: a candidate with a different word count would swallow a
+        # qualifier ("cambridge ma" is not a misspelling of "cambridge")
+        words = text.count(' ')
+        candidates = [name for name in self._names | set(self._aliases) if name.count(' ') == words]
+        match = difflib.get_close_matches(text, candidates, n=1, cutoff=self.FUZZY_CUTOFF)
+        if match:
+            return self._aliases.get(match[0], match[0])
+        return text
+
+    def __len__(self):
+        return len(self._names)
+
+
+def _iter_known_cities(failures: List[str]) -> Iterable[tuple]:
+    """(name, country, country_code) rows from every source we trust; sources that fail are appended to failures"""
+    from .catalog import get_fallback_catalog
+
+    for key, entry in get_fallback_catalog().entries():
+        yield entry.get('name', key), entry.get('country', ''), entry.get('country_code', '')
+
+    try:
+        from destinations.models import City
+        rows = list(City.objects.filter(is_active=True).values_list('name', 'country'))
+    except Exception:
+        logger.warning("Could not load destinations.City for canonicalization", exc_info=True)
+        failures.append('destinations.City')
+    else:
+        for name, country in rows:
+            yield name, country, ''
+
+    try:
+        from free_trips.models import FreeTripLocation
+        rows = list(FreeTripLocation.objects.values_list('name', 'country', 'country_code'))
+    except Exception:
+        logger.warning("Could not load FreeTripLocation for canonicalization", exc_info=True)
+        failures.append('free_trips.FreeTripLocation')
+    else:
+        yield from rows
+
+
+def build_destination_index() -> DestinationIndex:
+    """Index over every known city; index.failed_sources lists the sources that could not be read"""
+    from .catalog import get_fallback_catalog
+
+    aliases = dict(DEFAULT_ALIASES)
+    aliases.update(getattr(settings, 'AI_DESTINATION_ALIASES', {}))
+    index = DestinationIndex(aliases)
+    for key, entry in get_fallback_catalog().entries():
+        for alias in entry.get('aliases', []):
+            index.add_alias(alias, entry.get('name', key))
+    failures: List[str] = []
+    for name, country, country_code in _iter_known_cities(failures):
+        index.add_city(name, country, country_code)
+    index.failed_sources = failures
+    return index
+
+
+# Rebuilt periodically so newly added cities become canonical targets
+INDEX_REFRESH_SECONDS = 600
+
+_index = None
+_index_built_at = 0.0
+_index_lock = threading.Lock()
+
+
+def get_destination_index() -> DestinationIndex:
+    """
+    Process-wide index, rebuilt every INDEX_REFRESH_SECONDS. Builds the ORM, so
+    call it from sync code (async callers go through sync_to_async).
+    """
+    global _index, _index_built_at
+    if _index is None or time.monotonic() - _index_built_at > INDEX_REFRESH_SECONDS:
+        with _index_lock:
+            if _index is None or time.monotonic() - _index_built_at > INDEX_REFRESH_SECONDS:
+                index = build_destination_index()
+                if index.failed_sources:
+                    # Keys from a partial index would differ from the full one; keep the last
+                    # complete index (or use this one once) and retry on the next call
+                    logger.warning("Destination index built without %s, not caching it",
+                                   ', '.join(index.failed_sources))
+                    return _index or index
+                _index = index
+                _index_built_at = time.monotonic()
+    return _index
+
+
+def reset_destination_index():
+    global _index
+    with _index_lock:
+        _index = None
+
+
+def canonicalize_destination(destination: str) -> str:
+    """Canonical cache key for a destination string (e.g. "París (FR)" -> "paris")"""
+    return get_destination_index().canonicalize(destination)
+
+
+def canonical_display_name(destination: str) -> str:
+    """Known spelling of a destination (e.g. "paris, france" -> "Paris")"""
+    return get_destination_index().display_name(destination)
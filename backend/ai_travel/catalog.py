@@ -0,0 +1,123 @@
+"""
+Static destination catalog used by the fallback itinerary builder.
+
+Curated activities and recommendations live in data/fallback_catalog.json
+(or the file named by settings.AI_FALLBACK_CATALOG). The file is loaded once,
+indexed by folded city name and aliases, and reloaded when it changes on
+disk, so cities can be added without a code deploy. Lookups that miss the
+index go through the destination canonicalizer, so "Rome, Italy" and
+"Roma" find Rome while "Aix-en-Provence" is not cut at its hyphens.
+"""
+
+import copy
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+
+from .canonical import canonicalize_destination, fold
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATALOG_PATH = Path(__file__).resolve().parent / 'data' / 'fallback_catalog.json'
+
+# Seconds between mtime checks, so lookups never stat the file on the hot path
+RELOAD_CHECK_INTERVAL = 30
+
+
+class FallbackCatalog:
+    """In-memory index over the destination catalog file"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.version = None
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._index: Dict[str, str] = {}
+        self._mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """(Re)read the catalog file and rebuild the name/alias index"""
+        try:
+            mtime = os.path.getmtime(self.path)
+            with open(self.path, encoding='utf-8') as fh:
+                data = json.load(fh)
+        except (OSError, ValueError) as e:
+            logger.warning("Fallback catalog unavailable (%s): %s", self.path, e)
+            data, mtime = {}, None
+
+        entries = data.get('destinations', {})
+        index = {}
+        for key, entry in entries.items():
+            for name in [key, entry.get('name', '')] + list(entry.get('aliases', [])):
+                folded = fold(name)
+                if folded:
+                    index.setdefault(folded, key)
+
+        with self._lock:
+            self.version = data.get('version')
+            self._entries = entries
+            self._index = index
+            self._mtime = mtime
+            self._checked_at = time.monotonic()
+
+    def reload_if_changed(self):
+        now = time.monotonic()
+        if now - self._checked_at < RELOAD_CHECK_INTERVAL:
+            return
+        self._checked_at = now
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            mtime = None
+        if mtime != self._mtime:
+            logger.info("Fallback catalog changed on disk, reloading %s", self.path)
+            self.load()
+
+    def lookup(self, destination: str) -> Optional[Dict[str, Any]]:
+        """Return a private copy of the catalog entry for destination, or None"""
+        self.reload_if_changed()
+        key = self._index.get(fold(destination)) or self._index.get(canonicalize_destination(destination))
+        if key is None:
+            return None
+        return copy.deepcopy(self._entries[key])
+
+    def entries(self):
+        """(key, entry) pairs for every curated destination"""
+        self.reload_if_changed()
+        return list(self._entries.items())
+
+    def destinations(self):
+        return sorted(entry.get('name', key) for key, entry in self._entries.items())
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog_path() -> Path:
+    return Path(getattr(settings, 'AI_FALLBACK_CATALOG', DEFAULT_CATALOG_PATH))
+
+
+def get_fallback_catalog() -> FallbackCatalog:
+    """Return the process-wide catalog, loading it on first use"""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = FallbackCatalog(get_catalog_path())
+    return _catalog
+
+
+def reset_fallback_catalog():
+    """Drop the loaded catalog so the next lookup re-reads settings and the file"""
+    global _catalog
+    with _catalog_lock:
+        _catalog = None
@@ -0,0 +1,204 @@
+"""
+Upstream health tracking and circuit breaker for OpenRouter.
+
+Every upstream call reports its outcome and latency here. When the rolling
+error rate or p95 latency crosses its threshold the circuit opens and
+AIService.performance_mode degrades to 'fast', so requests get the instant
+fallback itinerary instead of queueing behind a failing upstream. After a
+cooldown a few probe calls are let through; if they succeed the circuit
+closes and the configured mode comes back.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEALTH_CONFIG = {
+    'ENABLED': True,
+    'WINDOW_SECONDS': 120,       # Rolling window for error rate and latency
+    'MIN_CALLS': 5,              # Calls in the window before the breaker may trip
+    'ERROR_RATE_THRESHOLD': 0.5, # Open when at least this share of calls failed
+    'P95_LATENCY_THRESHOLD': 25, # ...or when p95 latency (seconds) reaches this
+    'COOLDOWN_SECONDS': 30,      # Time spent open before probing again
+    'MAX_COOLDOWN_SECONDS': 300, # Cooldown doubles on each failed probe up to this
+    'HALF_OPEN_PROBES': 1,       # Concurrent probe calls allowed while half-open
+    'PROBE_TIMEOUT_SECONDS': 90, # A probe never reported back is written off after this
+    'DEGRADED_CACHE_TTL': 120,   # Trips generated while not closed expire quickly
+}
+
+
+def get_health_config() -> Dict[str, Any]:
+    """Merge settings.AI_UPSTREAM_HEALTH over the defaults"""
+    config = dict(DEFAULT_HEALTH_CONFIG)
+    config.update(getattr(settings, 'AI_UPSTREAM_HEALTH', {}))
+    return config
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the upstream while the circuit is open"""
+
+
+class UpstreamHealth:
+    """Rolling error rate / p95 latency tracker with a three-state circuit breaker"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = config or get_health_config()
+        self.enabled = config['ENABLED']
+        self.window_seconds = config['WINDOW_SECONDS']
+        self.min_calls = config['MIN_CALLS']
+        self.error_rate_threshold = config['ERROR_RATE_THRESHOLD']
+        self.p95_latency_threshold = config['P95_LATENCY_THRESHOLD']
+        self.cooldown_seconds = config['COOLDOWN_SECONDS']
+        self.max_cooldown_seconds = config['MAX_COOLDOWN_SECONDS']
+        self.half_open_probes = config['HALF_OPEN_PROBES']
+        self.probe_timeout_seconds = config['PROBE_TIMEOUT_SECONDS']
+        self.degraded_cache_ttl = config['DEGRADED_CACHE_TTL']
+
+        self.state = self.CLOSED
+        self._calls = deque()  # (finished_at, success, latency)
+        self._opened_at = 0.0
+        self._cooldown = self.cooldown_seconds
+        self._probes_in_flight = deque()  # started_at of each unreported probe, oldest first
+        self._lock = threading.Lock()
+
+    def _prune(self, now: float):
+        while self._calls and now - self._calls[0][0] > self.window_seconds:
+            self._calls.popleft()
+
+    def _stats(self):
+        total = len(self._calls)
+        if not total:
+            return 0, 0.0, 0.0
+        failures = sum(1 for _, success, _ in self._calls if not success)
+        latencies = sorted(latency for _, _, latency in self._calls)
+        p95 = latencies[min(total - 1, int(total * 0.95))]
+        return total, failures / total, p95
+
+    def _open(self, now: float, reason: str):
+        self.state = self.OPEN
+        self._opened_at = now
+        self._probes_in_flight.clear()
+        logger.warning("OpenRouter circuit OPEN (%s), serving fast fallbacks for %.0fs", reason, self._cooldown,
+                       extra={'circuit_state': self.OPEN, 'cooldown': self._cooldown})
+
+    def _cooling_down(self, now: float) -> bool:
+        return self.state == self.OPEN and now - self._opened_at < self._cooldown
+
+    def _expire_probes(self, now: float):
+        """Write off probes that never reported back (e.g. a cancelled caller) so they cannot pin half-open"""
+        while self._probes_in_flight and now - self._probes_in_flight[0] > self.probe_timeout_seconds:
+            self._probes_in_flight.popleft()
+
+    def is_degraded(self) -> bool:
+        """True while requests should skip the upstream entirely"""
+        if not self.enabled:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            if self._cooling_down(now):
+                return True
+            self._expire_probes(now)
+            return self.state == self.HALF_OPEN and len(self._probes_in_flight) >= self.half_open_probes
+
+    def is_closed(self) -> bool:
+        return not self.enabled or self.state == self.CLOSED
+
+    def before_call(self) -> bool:
+        """
+        Claim permission for one upstream call; raises CircuitOpenError when refused.
+        Returns True if the call is a half-open probe (pass it back to record()).
+        """
+        if not self.enabled:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            if self.state == self.CLOSED:
+                return False
+            if self._cooling_down(now):
+                raise CircuitOpenError('OpenRouter circuit is open')
+            if self.state == self.OPEN:
+                self.state = self.HALF_OPEN
+                logger.info("OpenRouter circuit HALF-OPEN, probing upstream", extra={'circuit_state': self.HALF_OPEN})
+            self._expire_probes(now)
+            if len(self._probes_in_flight) >= self.half_open_probes:
+                raise CircuitOpenError('OpenRouter circuit is half-open and a probe is already running')
+            self._probes_in_flight.append(now)
+            return True
+
+    def record(self, success: bool, latency: float, probe: bool = False):
+        """Report the outcome of one upstream call"""
+        if not self.enabled:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if probe and self.state == self.HALF_OPEN:
+                if self._probes_in_flight:
+                    self._probes_in_flight.popleft()
+                if success and latency < self.p95_latency_threshold:
+                    self.state = self.CLOSED
+                    self._cooldown = self.cooldown_seconds
+                    self._calls.clear()
+                    logger.info("OpenRouter circuit CLOSED, upstream healthy again",
+                                extra={'circuit_state': self.CLOSED})
+                else:
+                    self._cooldown = min(self.max_cooldown_seconds, self._cooldown * 2)
+                    self._open(now, 'probe failed')
+                return
+            if self.state != self.CLOSED:
+                return  # Late answer from a call started before the circuit opened
+
+            self._calls.append((now, success, latency))
+            self._prune(now)
+            total, error_rate, p95 = self._stats()
+            if total < self.min_calls:
+                return
+            if error_rate >= self.error_rate_threshold:
+                self._open(now, f"error rate {error_rate:.0%} over {total} calls")
+            elif p95 >= self.p95_latency_threshold:
+                self._open(now, f"p95 latency {p95:.1f}s over {total} calls")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current state and window statistics, e.g. for a health endpoint"""
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            total, error_rate, p95 = self._stats()
+            retry_in = max(0.0, self._cooldown - (now - self._opened_at)) if self.state == self.OPEN else 0.0
+            return {
+                'state': self.state if self.enabled else 'disabled',
+                'calls': total,
+                'error_rate': round(error_rate, 3),
+                'p95_latency': round(p95, 3),
+                'retry_in': round(retry_in, 1),
+            }
+
+
+_health = None
+_health_lock = threading.Lock()
+
+
+def get_upstream_health() -> UpstreamHealth:
+    """Return the process-wide tracker, creating it on first use"""
+    global _health
+    if _health is None:
+        with _health_lock:
+            if _health is None:
+                _health = UpstreamHealth()
+    return _health
+
+
+def reset_upstream_health():
+    """Forget all recorded calls and close the circuit (re-reads settings)"""
+    global _health
+    with _health_lock:
+        _health = None
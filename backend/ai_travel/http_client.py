@@ -0,0 +1,144 @@
+"""
+Pooled, keep-alive HTTP client for OpenRouter chat completions.
+
+One requests.Session per process is shared by every AIService call, so TLS
+handshakes are paid once per pooled connection instead of once per request.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from django.conf import settings
+
+DEFAULT_HTTP_CONFIG = {
+    'CONNECT_TIMEOUT': 5,    # Seconds to establish the TCP+TLS connection
+    'READ_TIMEOUT': 60,      # Seconds to wait for the upstream response
+    'POOL_SIZE': 20,         # Max idle keep-alive connections kept per host
+    'KEEPALIVE': True,       # Send Connection: close after each call when False
+    'ASYNC_MAX_CONNECTIONS': 200,  # Concurrent upstream calls per event loop (async path)
+}
+
+_call_state = threading.local()
+
+
+class _TrackingPoolMixin:
+    """Records whether each checked-out connection already had a live socket"""
+
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout)
+        _call_state.reused = getattr(conn, 'sock', None) is not None
+        return conn
+
+
+class _TrackingHTTPConnectionPool(_TrackingPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class _TrackingHTTPSConnectionPool(_TrackingPoolMixin, HTTPSConnectionPool):
+    pass
+
+
+class OpenRouterClient:
+    """Thread-safe pooled client with per-call connection reuse stats"""
+
+    def __init__(self, config: Dict[str, Any]):
+        self.connect_timeout = config['CONNECT_TIMEOUT']
+        self.read_timeout = config['READ_TIMEOUT']
+        self.pool_size = config['POOL_SIZE']
+        self.keepalive = config['KEEPALIVE']
+
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size, max_retries=0)
+        adapter.poolmanager.pool_classes_by_scheme = {
+            'http': _TrackingHTTPConnectionPool,
+            'https': _TrackingHTTPSConnectionPool,
+        }
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'Content-Type': 'application/json',
+            'Connection': 'keep-alive' if self.keepalive else 'close',
+        })
+
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._reused = 0
+
+    def post(self, url: str, api_key: str, payload: Dict[str, Any],
+             timeout: Optional[Union[float, Tuple[float, float]]] = None, **kwargs) -> requests.Response:
+        """
+        POST a chat completion payload.
+        The response carries ``connection_reused`` and ``upstream_latency``
+        attributes describing this call.
+        """
+        if timeout is None:
+            timeout = (self.connect_timeout, self.read_timeout)
+        elif not isinstance(timeout, tuple):
+            timeout = (self.connect_timeout, timeout)
+
+        _call_state.reused = False
+        start_time = time.time()
+        response = self.session.post(
+            url,
+            headers={'Authorization': f'Bearer {api_key}'},
+            json=payload,
+            timeout=timeout,
+            **kwargs
+        )
+        response.connection_reused = _call_state.reused
+        response.upstream_latency = time.time() - start_time
+
+        with self._lock:
+            self._requests += 1
+            if response.connection_reused:
+                self._reused += 1
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        """Aggregate connection reuse since process start"""
+        with self._lock:
+            return {
+                'requests': self._requests,
+                'reused_connections': self._reused,
+                'new_connections': self._requests - self._reused,
+                'reuse_rate': round(self._reused / self._requests, 3) if self._requests else 0.0,
+                'pool_size': self.pool_size,
+                'keepalive': self.keepalive,
+            }
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_http_config() -> Dict[str, Any]:
+    """Merge settings.AI_HTTP over the defaults"""
+    config = dict(DEFAULT_HTTP_CONFIG)
+    config.update(getattr(settings, 'AI_HTTP', {}))
+    return config
+
+
+def get_http_client() -> OpenRouterClient:
+    """Return the process-wide OpenRouter client, building it on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = OpenRouterClient(get_http_config())
+    return _client
+
+
+def reset_http_client():
+    """Close the pooled session so the next call re-reads settings"""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
@@ -0,0 +1,204 @@
+"""
+Database-backed job queue for itinerary generation.
+
+generate_ai_itinerary can enqueue a request instead of holding the HTTP
+worker for the whole LLM round trip. Jobs live in AIGenerationJob, are claimed
+by ``python manage.py run_ai_worker`` and their result is read back through
+the jobs/<id>/ endpoint or pushed to an optional callback URL.
+"""
+
+import json
+import logging
+import socket
+import os
+from datetime import timedelta
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import AIGenerationJob
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOB_CONFIG = {
+    'MAX_ATTEMPTS': 2,              # Runs per job before it is marked failed
+    'LEASE_SECONDS': 600,           # Running jobs older than this are assumed dead and requeued
+    'CALLBACK_TIMEOUT': 10,
+    'CALLBACK_ALLOWED_HOSTS': [],   # Hosts allowed as callback_url targets, '*' allows any
+}
+
+
+def get_job_config() -> Dict[str, Any]:
+    """Merge settings.AI_JOBS over the defaults"""
+    config = dict(DEFAULT_JOB_CONFIG)
+    config.update(getattr(settings, 'AI_JOBS', {}))
+    return config
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def callback_allowed(url: str) -> bool:
+    """Only notify hosts the deployment has opted in to"""
+    allowed = get_job_config()['CALLBACK_ALLOWED_HOSTS']
+    parsed = urlparse(url)
+    if parsed.scheme not in ('http', 'https'):
+        return False
+    return '*' in allowed or parsed.hostname in allowed
+
+
+def enqueue_generation(request_data: Dict[str, Any], user_id: Optional[int] = None,
+                       session_id: Optional[str] = None, callback_url: str = '') -> AIGenerationJob:
+    """Store a validated generation request for the worker pool"""
+    data = json.loads(json.dumps(request_data, cls=DjangoJSONEncoder))
+    for key in ('background', 'stream', 'callback_url'):
+        data.pop(key, None)
+    job = AIGenerationJob.objects.create(
+        user_id=user_id,
+        session_id=session_id or None,
+        request_data=data,
+        callback_url=callback_url or '',
+    )
+    logger.info("Queued generation job %s for %s", job.id, data.get('destination', 'Unknown'), extra={'job_id': str(job.id)})
+    return job
+
+
+def claim_next_job(worker_id: str) -> Optional[AIGenerationJob]:
+    """
+    Atomically move the oldest queued job to running.
+    SKIP LOCKED keeps workers off each other's rows where the database supports
+    it, and the conditional update makes the claim safe on SQLite as well.
+    """
+    with transaction.atomic():
+        candidates = (
+            AIGenerationJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(status=AIGenerationJob.STATUS_QUEUED)
+            .order_by('created_at')
+            .values_list('pk', flat=True)[:5]
+        )
+        for job_id in list(candidates):
+            claimed = AIGenerationJob.objects.filter(
+                pk=job_id, status=AIGenerationJob.STATUS_QUEUED
+            ).update(
+                status=AIGenerationJob.STATUS_RUNNING,
+                worker_id=worker_id,
+                started_at=timezone.now(),
+                attempts=F('attempts') + 1,
+            )
+            if claimed:
+                return AIGenerationJob.objects.get(pk=job_id)
+    return None
+
+
+def requeue_stale_jobs() -> int:
+    """Give jobs whose worker died mid-run back to the queue (or fail them)"""
+    config = get_job_config()
+    cutoff = timezone.now() - timedelta(seconds=config['LEASE_SECONDS'])
+    stale = AIGenerationJob.objects.filter(status=AIGenerationJob.STATUS_RUNNING, started_at__lt=cutoff)
+    failed = stale.filter(attempts__gte=config['MAX_ATTEMPTS']).update(
+        status=AIGenerationJob.STATUS_FAILED,
+        error_message='Worker stopped responding',
+        finished_at=timezone.now(),
+    )
+    requeued = stale.update(status=AIGenerationJob.STATUS_QUEUED, worker_id='')
+    if failed or requeued:
+        logger.warning("Stale jobs: %d requeued, %d failed", requeued, failed)
+    return requeued
+
+
+def run_job(job: AIGenerationJob) -> AIGenerationJob:
+    """Generate, save and record the result of one claimed job"""
+    # Imported here: views import this module to enqueue jobs, keep it free of their dependencies
+    from .serializers import ItineraryRequestSerializer
+    from .persistence import save_generated_itinerary
+    from .scheduler import priority_for_user, upstream_priority
+    from .registry import get_ai_service
+
+    logger.info("Running job %s (attempt %d)", job.id, job.attempts, extra={'job_id': str(job.id)})
+    try:
+        serializer = ItineraryRequestSerializer(data=job.request_data)
+        serializer.is_valid(raise_exception=True)
+        validated_data = serializer.validated_data
+
+        with upstream_priority(priority_for_user(job.user_id)):
+            itinerary_content, budget_content, generation_time = get_ai_service().generate_complete_trip(validated_data)
+        if budget_content is None or 'error' in budget_content:
+            budget_content = {"error": "Budget generation failed"}
+
+        # Written synchronously: the job row links to the saved itinerary
+        payload, response_status = save_generated_itinerary(
+            validated_data, job.user_id, itinerary_content, budget_content, generation_time, defer=False
+        )
+        if response_status >= 400:
+            raise RuntimeError(payload.get('error', 'Failed to save itinerary'))
+
+        job.result = json.loads(json.dumps(payload, cls=DjangoJSONEncoder))
+        job.itinerary_id = payload['itinerary']['id']
+        job.status = AIGenerationJob.STATUS_SUCCEEDED
+        job.error_message = ''
+    except Exception as e:
+        logger.warning("Job %s failed: %s", job.id, e, exc_info=True, extra={'job_id': str(job.id)})
+        job.error_message = str(e)
+        if job.attempts < get_job_config()['MAX_ATTEMPTS']:
+            job.status = AIGenerationJob.STATUS_QUEUED
+            job.worker_id = ''
+            job.save(update_fields=['status', 'worker_id', 'error_message'])
+            return job
+        job.status = AIGenerationJob.STATUS_FAILED
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'itinerary', 'error_message', 'finished_at'])
+    duration = (job.finished_at - job.started_at).total_seconds()
+    logger.info("Job %s %s in %.2fs", job.id, job.status, duration, extra={
+        'job_id': str(job.id),
+        'status': job.status,
+        'duration': round(duration, 3),
+    })
+
+    if job.callback_url:
+        notify_callback(job)
+    return job
+
+
+def job_payload(job: AIGenerationJob) -> Dict[str, Any]:
+    """Response body for polling and callbacks"""
+    payload = {
+        'success': job.status != AIGenerationJob.STATUS_FAILED,
+        'job_id': str(job.id),
+        'status': job.status,
+        'created_at': job.created_at,
+        'started_at': job.started_at,
+        'finished_at': job.finished_at,
+        'attempts': job.attempts,
+    }
+    if job.status == AIGenerationJob.STATUS_SUCCEEDED and job.result:
+        payload.update(job.result)
+    elif job.status == AIGenerationJob.STATUS_FAILED:
+        payload['error'] = 'Failed to generate itinerary'
+        payload['details'] = job.error_message
+    return payload
+
+
+def notify_callback(job: AIGenerationJob):
+    """POST the finished job to its callback URL; failures are logged and ignored"""
+    if not callback_allowed(job.callback_url):
+        logger.warning("Callback host not allowed for job %s: %s", job.id, job.callback_url)
+        return
+    try:
+        response = requests.post(
+            job.callback_url,
+            data=json.dumps(job_payload(job), cls=DjangoJSONEncoder),
+            headers={'Content-Type': 'application/json'},
+            timeout=get_job_config()['CALLBACK_TIMEOUT'],
+        )
+        logger.info("Callback for job %s: HTTP %s", job.id, response.status_code)
+    except requests.exceptions.RequestException as e:
+        logger.warning("Callback for job %s failed: %s", job.id, e)
@@ -0,0 +1,140 @@
+"""
+Tolerant, incremental JSON extraction for LLM responses.
+
+Model output is often wrapped in a markdown fence, followed by prose, or cut
+off when max_tokens runs out. PartialJSONParser scans the text once and
+remembers the last point where every open value was complete, so a truncated
+response can be closed off and parsed instead of thrown away.
+"""
+
+import json
+import re
+from typing import Any, List, Optional, Tuple
+
+_TRAILING_COMMA = re.compile(r',\s*([}\]])')
+
+
+class PartialJSONParser:
+    """Feed text as it arrives; result() returns the best parse so far"""
+
+    def __init__(self):
+        self.buffer = ''
+        self._pos = 0
+        self._start: Optional[int] = None
+        self._end: Optional[int] = None
+        self._stack: List[list] = []  # [opening char, expecting_key]
+        self._in_string = False
+        self._escape = False
+        self._string_is_key = False
+        self._safe_cut: Optional[int] = None
+        self._safe_closers = ''
+
+    @property
+    def done(self) -> bool:
+        """True once the top-level value has been closed"""
+        return self._end is not None
+
+    def feed(self, text: str) -> 'PartialJSONParser':
+        self.buffer += text
+        if self.done:
+            return self
+        buffer = self.buffer
+        index = self._pos
+        length = len(buffer)
+
+        if self._start is None:
+            index = self._find_start(index)
+            if index is None:
+                self._pos = length
+                return self
+
+        while index < length:
+            char = buffer[index]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if not self._string_is_key:
+                        self._mark_safe(index + 1)
+            elif char == '"':
+                self._in_string = True
+                top = self._stack[-1] if self._stack else None
+                self._string_is_key = bool(top and top[0] == '{' and top[1])
+            elif char == '{' or char == '[':
+                self._stack.append([char, char == '{'])
+                self._mark_safe(index + 1)
+            elif char == '}' or char == ']':
+                if self._stack:
+                    self._stack.pop()
+                if not self._stack:
+                    self._end = index + 1
+                    break
+                self._mark_safe(index + 1)
+            elif char == ':':
+                if self._stack:
+                    self._stack[-1][1] = False
+            elif char == ',':
+                self._mark_safe(index)
+                if self._stack and self._stack[-1][0] == '{':
+                    self._stack[-1][1] = True
+            index += 1
+        self._pos = index
+        return self
+
+    def result(self) -> Tuple[Optional[Any], bool]:
+        """
+        Parse what has been seen so far.
+        Returns: (data, complete) where complete is False when the value had
+        to be closed off at the last safe point, and data is None if nothing
+        usable was found.
+        """
+        if self._start is None:
+            return None, False
+        if self.done:
+            data = _loads(self.buffer[self._start:self._end])
+            if data is not None:
+                return data, True
+        if self._safe_cut is None:
+            return None, False
+        return _loads(self.buffer[self._start:self._safe_cut] + self._safe_closers), False
+
+    def _find_start(self, index: int) -> Optional[int]:
+        buffer = self.buffer
+        # Skip an opening markdown fence so its language tag is never scanned
+        fence = buffer.find('```', index)
+        brace = min((p for p in (buffer.find('{', index), buffer.find('[', index)) if p != -1), default=-1)
+        if fence != -1 and (brace == -1 or fence < brace):
+            newline = buffer.find('\n', fence)
+            if newline == -1:
+                return None
+            return self._find_start(newline + 1)
+        if brace == -1:
+            return None
+        self._start = brace
+        return brace
+
+    def _mark_safe(self, index: int):
+        self._safe_cut = index
+        self._safe_closers = ''.join('}' if opener == '{' else ']' for opener, _ in reversed(self._stack))
+
+
+def _loads(text: str) -> Optional[Any]:
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    try:
+        return json.loads(_TRAILING_COMMA.sub(r'\1', text))
+    except json.JSONDecodeError:
+        return None
+
+
+def extract_json(content: str) -> Tuple[Optional[Any], bool]:
+    """
+    Pull the first JSON value out of an LLM response.
+    Returns: (data, complete); see PartialJSONParser.result
+    """
+    return PartialJSONParser().feed(content or '').result()
@@ -0,0 +1,228 @@
+import logging
+import os
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+
+from ai_travel import views
+from ai_travel.cache import get_trip_cache, reset_trip_cache
+from ai_travel.health import get_upstream_health, reset_upstream_health
+from ai_travel.mock_openrouter import MockOpenRouter
+from ai_travel.models import AIItinerary
+from ai_travel.scheduler import get_upstream_scheduler, reset_upstream_scheduler
+from ai_travel.services import AIService
+
+MODES = ['fast', 'hybrid', 'ai', 'combined']
+DESTINATIONS = ['Tokyo', 'Paris', 'London', 'Dubai', 'New York', 'Rome', 'Lisbon', 'Bangkok', 'Sydney', 'Istanbul']
+BUDGETS = ['budget', 'mid-range', 'luxury']
+STYLES = ['cultural', 'adventure', 'relaxation', 'romantic']
+INTERESTS = ['food', 'art', 'history', 'nightlife', 'shopping', 'nature', 'museums']
+
+# Long enough for AIService._recommendations_preflight; only ever sent to the mock
+MOCK_API_KEY = 'mock-openrouter-benchmark-key'
+
+
+def percentile(values, pct: float) -> float:
+    """Nearest-rank percentile of an unsorted list"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def build_request_bodies(total: int, unique: int, session_id: str, seed: int):
+    """Request mix: `unique` distinct trips, each repeated by parties of different sizes"""
+    rng = random.Random(seed)
+    start_date = timezone.localdate() + timedelta(days=30)
+    trips = []
+    for index in range(max(1, unique)):
+        duration = 2 + index % 4
+        trips.append({
+            'destination': DESTINATIONS[index % len(DESTINATIONS)],
+            'duration_days': duration,
+            'budget': BUDGETS[index % len(BUDGETS)],
+            'travel_style': STYLES[(index // len(DESTINATIONS)) % len(STYLES)],
+            'start_date': start_date.isoformat(),
+            'end_date': (start_date + timedelta(days=duration)).isoformat(),
+        })
+    bodies = []
+    for index in range(total):
+        body = dict(trips[index % len(trips)])
+        body.update({
+            'adults': rng.randint(1, 4),
+            'children': rng.randint(0, 2),
+            'interests': rng.sample(INTERESTS, rng.randint(1, 3)),
+            'session_id': session_id,
+        })
+        bodies.append(body)
+    return bodies
+
+
+class Command(BaseCommand):
+    help = ('Load test POST /api/ai-travel/generate/ against a mock OpenRouter and report throughput, '
+            'latency percentiles and cache hit rate per performance mode')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', nargs='+', choices=MODES, default=MODES)
+        parser.add_argument('--requests', type=int, default=40, help='Requests per mode')
+        parser.add_argument('--concurrency', type=int, default=8, help='Requests in flight at once')
+        parser.add_argument('--unique', type=int, default=10,
+                            help='Distinct trips in the mix; repeats are cacheable')
+        parser.add_argument('--stream', action='store_true', help='Use the server-sent events endpoint mode')
+        parser.add_argument('--api-url', help='Use this upstream instead of the built-in mock')
+        parser.add_argument('--latency', type=float, default=1.0, help='Mock latency (seconds)')
+        parser.add_argument('--jitter', type=float, default=0.2, help='Mock latency jitter (seconds)')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Mock error rate (0-1)')
+        parser.add_argument('--truncate-rate', type=float, default=0.0, help='Mock truncation rate (0-1)')
+        parser.add_argument('--rate', type=float,
+                            help='Upstream calls per second allowed by the scheduler (default: settings.AI_SCHEDULER)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--keep', action='store_true',
+                            help='Keep the generated itineraries and usage rows in the database')
+        parser.add_argument('--verbose', action='store_true', help='Show service output while running')
+
+    def handle(self, *args, **options):
+        mock = None
+        api_url = options['api_url']
+        if not api_url:
+            mock = MockOpenRouter(
+                latency=options['latency'],
+                jitter=options['jitter'],
+                error_rate=options['error_rate'],
+                truncate_rate=options['truncate_rate'],
+                seed=options['seed'],
+            ).start()
+            api_url = mock.url
+            self.stdout.write(f"🧪 Mock OpenRouter at {api_url} (latency {options['latency']}s, "
+                              f"errors {options['error_rate']:.0%}, truncated {options['truncate_rate']:.0%})")
+
+        overrides = {
+            'OPENROUTER_API_URL': api_url,
+            'AI_CACHE': {'BACKEND': 'memory'},  # Isolated from the real cache, emptied per mode
+            'AI_REUSE': {'ENABLED': False},     # Stored itineraries would hide upstream work
+        }
+        if mock is not None:
+            overrides['OPENROUTER_API_KEY'] = MOCK_API_KEY
+        if not options['keep']:
+            overrides['AI_USAGE'] = {'ENABLED': False}
+        if options['rate']:
+            overrides['AI_SCHEDULER'] = dict(getattr(settings, 'AI_SCHEDULER', {}), RATE=options['rate'])
+
+        results = []
+        configured_mode = AIService.default_performance_mode
+        try:
+            with override_settings(**overrides):
+                for mode in options['modes']:
+                    results.append(self._run_mode(mode, mock, options))
+        finally:
+            AIService.default_performance_mode = configured_mode
+            reset_trip_cache()
+            reset_upstream_health()
+            reset_upstream_scheduler()
+            if mock is not None:
+                mock.stop()
+
+        self.stdout.write('\n=== SUMMARY ===')
+        self.stdout.write(f"{'mode':<10}{'ok':>8}{'req/s':>9}{'p50':>8}{'p95':>8}{'p99':>8}{'hit rate':>10}{'calls/req':>11}")
+        for result in results:
+            calls = f"{result['upstream_calls'] / result['requests']:.2f}" if result['upstream_calls'] is not None else '-'
+            self.stdout.write(
+                f"{result['mode']:<10}{result['ok']:>4}/{result['requests']:<3}{result['throughput']:>9.2f}"
+                f"{result['p50']:>8.2f}{result['p95']:>8.2f}{result['p99']:>8.2f}"
+                f"{result['hit_rate']:>10.0%}{calls:>11}"
+            )
+        self.stdout.write(self.style.SUCCESS('✅ Benchmark complete'))
+
+    def _run_mode(self, mode, mock, options):
+        AIService.default_performance_mode = mode
+        reset_trip_cache()
+        reset_upstream_health()
+        reset_upstream_scheduler()
+        session_id = f'ai-bench-{uuid.uuid4().hex[:12]}'
+        bodies = build_request_bodies(options['requests'], options['unique'], session_id, options['seed'])
+        if options['stream']:
+            for body in bodies:
+                body['stream'] = True
+        factory = APIRequestFactory()
+        calls_before = mock.snapshot()['requests'] if mock is not None else None
+
+        def send(body):
+            request = factory.post('/api/ai-travel/generate/', body, format='json')
+            start_time = time.perf_counter()
+            first_byte = None
+            try:
+                response = views.generate_ai_itinerary(request)
+                if response.streaming:
+                    for _ in response.streaming_content:
+                        if first_byte is None:
+                            first_byte = time.perf_counter() - start_time
+                else:
+                    response.render()
+                ok = response.status_code < 400
+            except Exception as e:
+                print(f"❌ Benchmark request failed: {e}")
+                ok = False
+            finally:
+                close_old_connections()
+            return time.perf_counter() - start_time, first_byte, ok
+
+        self.stdout.write(f"\n=== MODE: {mode.upper()} ===")
+        started = time.perf_counter()
+        if not options['verbose']:
+            logging.disable(logging.WARNING)  # Per-request INFO logs would drown the report
+        try:
+            with open(os.devnull, 'w') as devnull:
+                with redirect_stdout(self.stdout._out if options['verbose'] else devnull):
+                    with ThreadPoolExecutor(max_workers=max(1, options['concurrency'])) as executor:
+                        outcomes = list(executor.map(send, bodies))
+        finally:
+            logging.disable(logging.NOTSET)
+        wall_time = time.perf_counter() - started
+
+        latencies = [latency for latency, _, _ in outcomes]
+        first_bytes = [first_byte for _, first_byte, _ in outcomes if first_byte is not None]
+        cache_stats = get_trip_cache().stats()
+        result = {
+            'mode': mode,
+            'requests': len(outcomes),
+            'ok': sum(1 for _, _, ok in outcomes if ok),
+            'throughput': len(outcomes) / wall_time if wall_time else 0.0,
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99),
+            'hit_rate': cache_stats['hit_rate'],
+            'upstream_calls': mock.snapshot()['requests'] - calls_before if mock is not None else None,
+        }
+
+        self.stdout.write(f"Requests: {result['requests']} ({result['ok']} ok) in {wall_time:.2f}s "
+                          f"at concurrency {options['concurrency']}")
+        self.stdout.write(f"Throughput: {result['throughput']:.2f} req/s")
+        self.stdout.write(f"Latency p50/p95/p99: {result['p50']:.3f}s / {result['p95']:.3f}s / {result['p99']:.3f}s")
+        if first_bytes:
+            self.stdout.write(f"First event p50/p95: {percentile(first_bytes, 50):.3f}s / {percentile(first_bytes, 95):.3f}s")
+        self.stdout.write(f"Cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+                          f"({cache_stats['hit_rate']:.0%})")
+        if result['upstream_calls'] is not None:
+            self.stdout.write(f"Upstream calls: {result['upstream_calls']}")
+        self.stdout.write(f"Circuit: {get_upstream_health().snapshot()['state']}")
+        for name, stats in get_upstream_scheduler().snapshot()['classes'].items():
+            if stats['granted'] or stats['timeouts']:
+                self.stdout.write(f"Queue ({name}): {stats['granted']} calls, avg {stats['avg_wait']:.3f}s, "
+                                  f"p95 {stats['p95_wait']:.3f}s, max {stats['max_wait']:.3f}s, "
+                                  f"{stats['timeouts']} timed out")
+
+        if not options['keep']:
+            deleted, _ = AIItinerary.objects.filter(session_id=session_id).delete()
+            self.stdout.write(f"🧹 Removed {deleted} benchmark rows")
+        return result
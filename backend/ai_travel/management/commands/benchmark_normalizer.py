@@ -0,0 +1,136 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from ai_travel.normalizer import normalize_itinerary
+
+DAY_COUNTS = [14, 21, 30]
+TIMES = ['08:00', '10:30', '13:00', '15:30', '19:00', '21:30']
+
+
+def build_itinerary(days: int, activities_per_day: int):
+    """Synthetic AI payload in the enhanced format, shaped like a real long trip"""
+    daily_schedule = []
+    for day in range(1, days + 1):
+        daily_schedule.append({
+            'day': day,
+            'date': f'2026-11-{day:02d}' if day <= 30 else '',
+            'title': f'Day {day} in the old town',
+            'activities': [{
+                'time': TIMES[index % len(TIMES)],
+                'activity': f'Activity {day}.{index}',
+                'description': 'Walk through the neighbourhood and stop at the market for lunch.',
+                'location': f'District {index}',
+                'estimated_cost': 25 + index,
+                'type': 'sightseeing',
+                'duration': '2 hours',
+                'tips': 'Arrive early to avoid the queues.',
+                'why_special': 'Oldest covered market in the city.',
+                'matched_interests': ['food', 'history'],
+            } for index in range(activities_per_day)],
+            'dining_recommendations': [{'name': f'Restaurant {day}', 'cuisine': 'local', 'cost': 30}],
+            'daily_cost_estimate': 180,
+        })
+    return {'itinerary_content': {
+        'overview': f'{days} days exploring the city',
+        'total_estimated_cost': 180 * days,
+        'daily_schedule': daily_schedule,
+        'recommendations': {'restaurants': ['A', 'B'], 'tips': ['Carry cash']},
+        'expert_recommendations': {'cultural_etiquette': ['Greet shopkeepers'], 'unique_experiences': ['Night tour']},
+        'practical_information': {'packing_essentials': ['Umbrella'], 'useful_phrases': {'hello': 'ola'}},
+        'budget_tips': ['Buy a transit pass'],
+        'personalization': {'adults': 2, 'children': 0},
+        'generated_at': '2026-10-17T09:00:00+00:00',
+    }}
+
+
+def reference_normalize(itinerary_content, trip_data):
+    """The per-field loop that format_itinerary_for_frontend used before the compiled schemas"""
+    content = itinerary_content['itinerary_content']
+    daily_schedule = []
+    for day_info in content.get('daily_schedule', []):
+        activities = []
+        for activity in day_info.get('activities', []):
+            activities.append({
+                'time': activity.get('time', ''),
+                'activity': activity.get('activity', ''),
+                'description': activity.get('description', ''),
+                'location': activity.get('location', ''),
+                'estimated_cost': activity.get('estimated_cost', 0),
+                'type': activity.get('type', 'activity'),
+                'duration': activity.get('duration', ''),
+                'tips': activity.get('tips', ''),
+                'cultural_context': activity.get('why_special', ''),
+                'photo_opportunity': activity.get('tips', ''),
+                'matched_interests': activity.get('matched_interests', [])
+            })
+        daily_schedule.append({
+            'date': day_info.get('date', ''),
+            'theme': day_info.get('theme', day_info.get('title', '')),
+            'activities': activities,
+            'dining_recommendations': day_info.get('dining_recommendations', []),
+            'daily_cost_estimate': day_info.get('daily_cost_estimate', 0),
+            'weather_note': day_info.get('weather_note', '')
+        })
+
+    recommendations = dict(content.get('recommendations', {}))
+    if 'expert_recommendations' in content:
+        expert_recs = content['expert_recommendations']
+        recommendations.update({
+            'local_etiquette': expert_recs.get('cultural_etiquette', []),
+            'must_try_restaurants': expert_recs.get('must_try_restaurants', []),
+            'unique_experiences': expert_recs.get('unique_experiences', []),
+            'best_shopping': expert_recs.get('best_shopping', []),
+            'transportation_guide': expert_recs.get('transportation_guide', [])
+        })
+    practical_info = content.get('practical_information', {})
+    return {
+        'overview': content.get('overview', 'Generated travel itinerary'),
+        'total_estimated_cost': content.get('total_estimated_cost', 0),
+        'budget_breakdown': content.get('detailed_budget_breakdown', content.get('budget_breakdown', {})),
+        'daily_schedule': daily_schedule,
+        'recommendations': recommendations,
+        'practical_information': practical_info,
+        'seasonal_notes': content.get('seasonal_notes', ''),
+        'budget_tips': content.get('budget_tips', []),
+        'packing_suggestions': practical_info.get('packing_essentials', content.get('packing_suggestions', [])),
+        'best_photo_spots': practical_info.get('photography_spots', content.get('best_photo_spots', [])),
+        'local_phrases': practical_info.get('useful_phrases', content.get('local_phrases', {})),
+        'emergency_info': practical_info.get('emergency_contacts', content.get('emergency_info', {})),
+        'images': content.get('images', []),
+        'personalization': content.get('personalization', {}),
+        'generated_at': content.get('generated_at', '')
+    }
+
+
+class Command(BaseCommand):
+    help = 'Time itinerary normalization on synthetic 14-30 day trips against the hand-written reference'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', nargs='+', type=int, default=DAY_COUNTS, help='Trip lengths to benchmark')
+        parser.add_argument('--activities', type=int, default=6, help='Activities per day')
+        parser.add_argument('--repeat', type=int, default=5, help='Timing rounds (best one is reported)')
+        parser.add_argument('--number', type=int, default=200, help='Calls per round')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"📐 {options['activities']} activities/day, best of {options['repeat']} x {options['number']} calls")
+        self.stdout.write('\n=== NORMALIZATION ===')
+        self.stdout.write(f"{'days':<6}{'activities':>12}{'reference':>14}{'normalizer':>14}{'speedup':>10}")
+
+        for days in options['days']:
+            payload = build_itinerary(days, options['activities'])
+            trip_data = {'duration_days': days}
+            if normalize_itinerary(payload, trip_data) != reference_normalize(payload, trip_data):
+                self.stdout.write(self.style.ERROR(f'❌ {days}-day output differs from the reference'))
+                continue
+
+            timings = {}
+            for name, fn in (('reference', reference_normalize), ('normalizer', normalize_itinerary)):
+                best = min(timeit.repeat(lambda: fn(payload, trip_data), repeat=options['repeat'], number=options['number']))
+                timings[name] = best / options['number'] * 1e6
+            self.stdout.write(
+                f"{days:<6}{days * options['activities']:>12}{timings['reference']:>12.1f}µs"
+                f"{timings['normalizer']:>12.1f}µs{timings['reference'] / timings['normalizer']:>9.2f}x"
+            )
+
+        self.stdout.write(self.style.SUCCESS('✅ Benchmark complete'))
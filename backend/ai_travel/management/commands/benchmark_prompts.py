@@ -0,0 +1,82 @@
+import re
+
+from django.core.management.base import BaseCommand
+
+from ai_travel.prompts import PROMPT_TEMPLATES, get_prompt_config, get_prompt_template, prompt_context
+
+# Representative requests; prompt size depends on duration and interests
+CANNED_TRIPS = [
+    {'destination': 'Tokyo', 'duration_days': 3, 'budget': 'mid-range', 'travel_style': 'cultural',
+     'adults': 2, 'children': 0, 'interests': ['food', 'temples']},
+    {'destination': 'Paris', 'duration_days': 5, 'budget': 'luxury', 'travel_style': 'romantic',
+     'adults': 2, 'children': 0, 'interests': ['art', 'wine', 'architecture']},
+    {'destination': 'New York', 'duration_days': 7, 'budget': 'budget', 'travel_style': 'adventure',
+     'adults': 2, 'children': 2, 'interests': ['museums', 'parks', 'street food', 'broadway']},
+    {'destination': 'Dubai', 'duration_days': 4, 'budget': 'luxury', 'travel_style': 'relaxation',
+     'adults': 1, 'children': 0, 'interests': []},
+    {'destination': 'Lisbon', 'duration_days': 2, 'budget': 'budget', 'travel_style': 'cultural',
+     'adults': 3, 'children': 1, 'interests': ['history']},
+    {'destination': 'Ho Chi Minh City', 'duration_days': 10, 'budget': 'mid-range', 'travel_style': 'adventure',
+     'adults': 2, 'children': 0, 'interests': ['food', 'markets', 'motorbikes']},
+]
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def _get_token_counter(encoding_name: str):
+    """tiktoken if it is installed, otherwise an offline word/punctuation estimate"""
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding(encoding_name)
+        return (lambda text: len(encoding.encode(text))), f'tiktoken/{encoding_name}'
+    except Exception:
+        # BPE tokenizers average ~1.3 tokens per English word; punctuation is mostly 1 token
+        return (lambda text: round(sum(
+            1.3 if token[0].isalnum() else 1.0 for token in _TOKEN_PATTERN.findall(text)
+        ))), 'estimate'
+
+
+class Command(BaseCommand):
+    help = 'Compare prompt template versions by token count on a canned set of trips (no API calls)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kinds', nargs='+', choices=sorted(PROMPT_TEMPLATES), default=sorted(PROMPT_TEMPLATES),
+                            help='Request kinds to compare')
+        parser.add_argument('--versions', nargs='+',
+                            help='Template versions to compare (default: every version)')
+        parser.add_argument('--encoding', default='cl100k_base',
+                            help='tiktoken encoding used when tiktoken is installed')
+
+    def handle(self, *args, **options):
+        count_tokens, counter_name = _get_token_counter(options['encoding'])
+        active = get_prompt_config()
+        self.stdout.write(f'📏 Token counter: {counter_name}, {len(CANNED_TRIPS)} canned trips')
+
+        for kind in options['kinds']:
+            versions = options['versions'] or sorted(PROMPT_TEMPLATES[kind])
+            self.stdout.write(f'\n=== {kind.upper()} ===')
+            self.stdout.write(f"{'version':<10}{'prompt avg':>12}{'prompt max':>12}{'max_tokens':>12}{'worst case':>12}{'vs first':>10}")
+
+            baseline = None
+            for version in versions:
+                if version not in PROMPT_TEMPLATES[kind]:
+                    self.stdout.write(self.style.WARNING(f'⚠️ {kind} has no version {version}'))
+                    continue
+                template = get_prompt_template(kind, version)
+                counts = [
+                    sum(count_tokens(message['content']) for message in template.render(prompt_context(trip)))
+                    for trip in CANNED_TRIPS
+                ]
+                average = sum(counts) / len(counts)
+                worst_case = max(counts) + template.max_tokens
+                if baseline is None:
+                    baseline = average
+                change = (average - baseline) / baseline * 100 if baseline else 0.0
+                marker = ' *' if active.get(kind) == version else ''
+                self.stdout.write(
+                    f'{version + marker:<10}{average:>12.0f}{max(counts):>12}{template.max_tokens:>12}'
+                    f'{worst_case:>12}{change:>+9.0f}%'
+                )
+
+        self.stdout.write('\n* = version selected by settings.AI_PROMPTS')
+        self.stdout.write(self.style.SUCCESS('✅ Benchmark complete'))
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ai_travel.canonical import canonicalize_destination
+from ai_travel.models import AIItinerary
+
+
+class Command(BaseCommand):
+    help = 'Recompute AIItinerary.destination_key with the current aliases and city catalog'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Rows written per UPDATE batch (default 500)')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only count the rows whose key would change')
+
+    def handle(self, *args, **options):
+        start_time = time.time()
+        keys = {}
+        changed = []
+        checked = 0
+        for itinerary in AIItinerary.objects.only('id', 'destination', 'destination_key').iterator():
+            checked += 1
+            if itinerary.destination not in keys:
+                keys[itinerary.destination] = canonicalize_destination(itinerary.destination)
+            if itinerary.destination_key != keys[itinerary.destination]:
+                itinerary.destination_key = keys[itinerary.destination]
+                changed.append(itinerary)
+
+        if not options['dry_run']:
+            AIItinerary.objects.bulk_update(changed, ['destination_key'], batch_size=options['batch_size'])
+
+        self.stdout.write('\n=== DESTINATION KEYS ===')
+        self.stdout.write(f'Itineraries checked: {checked}')
+        self.stdout.write(f"{'Would re-key' if options['dry_run'] else 'Re-keyed'}: {len(changed)}")
+        self.stdout.write(f'Distinct destinations: {len(keys)}')
+        self.stdout.write(self.style.SUCCESS(f'✅ Done in {time.time() - start_time:.2f}s'))
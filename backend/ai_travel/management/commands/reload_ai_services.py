@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from ai_travel.registry import get_reload_config, touch_reload_trigger
+
+
+class Command(BaseCommand):
+    help = 'Make running workers rebuild the shared AI services, catalog and destination index'
+
+    def handle(self, *args, **options):
+        trigger_file = touch_reload_trigger()
+        if trigger_file is None:
+            self.stdout.write(self.style.WARNING(
+                '⚠️ AI_RELOAD TRIGGER_FILE is not set; workers only reload when the catalog file changes'
+            ))
+            return
+
+        self.stdout.write('\n=== AI SERVICES RELOAD ===')
+        self.stdout.write(f'Touched: {trigger_file}')
+        self.stdout.write(f"Workers reload within {get_reload_config()['CHECK_SECONDS']}s of their next request")
+        self.stdout.write(self.style.SUCCESS('✅ Reload requested'))
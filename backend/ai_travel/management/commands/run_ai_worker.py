@@ -0,0 +1,60 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from ai_travel.jobs import claim_next_job, default_worker_id, requeue_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = 'Run queued AI itinerary generation jobs (generate/ with "background": true)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4,
+                            help='Jobs generated at the same time (default 4)')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds to wait when the queue is empty (default 1)')
+        parser.add_argument('--once', action='store_true',
+                            help='Drain the queue and exit instead of polling forever')
+        parser.add_argument('--worker-id', default=default_worker_id(),
+                            help='Name recorded on claimed jobs (default host:pid)')
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options['concurrency'])
+        worker_id = options['worker_id']
+        self.stdout.write(f'🛠️ AI worker {worker_id} started with {concurrency} slot(s)')
+
+        processed = 0
+        running = set()
+        last_requeue = 0.0
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='ai-worker') as executor:
+            try:
+                while True:
+                    running = {future for future in running if not future.done()}
+
+                    if time.monotonic() - last_requeue > 60:
+                        requeue_stale_jobs()
+                        last_requeue = time.monotonic()
+
+                    job = claim_next_job(worker_id) if len(running) < concurrency else None
+                    if job is not None:
+                        running.add(executor.submit(self._run, job))
+                        processed += 1
+                        continue
+
+                    if options['once'] and not running:
+                        break
+                    time.sleep(options['poll_interval'])
+            except KeyboardInterrupt:
+                self.stdout.write('⏹️ Stopping, waiting for running jobs to finish...')
+
+        self.stdout.write(self.style.SUCCESS(f'✅ AI worker {worker_id} processed {processed} job(s)'))
+
+    @staticmethod
+    def _run(job):
+        try:
+            run_job(job)
+        finally:
+            # Each pool thread holds its own connection
+            close_old_connections()
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+
+from ai_travel.mock_openrouter import MockOpenRouter
+
+
+class Command(BaseCommand):
+    help = 'Serve a local stand-in for the OpenRouter API (set OPENROUTER_API_URL to the printed URL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency', type=float, default=1.0,
+                            help='Mean seconds before the first byte of each answer')
+        parser.add_argument('--jitter', type=float, default=0.2,
+                            help='Standard deviation of the latency (seconds)')
+        parser.add_argument('--error-rate', type=float, default=0.0,
+                            help='Share of requests answered with --error-status (0-1)')
+        parser.add_argument('--error-status', type=int, default=500,
+                            help='HTTP status of injected failures, e.g. 429 or 503')
+        parser.add_argument('--truncate-rate', type=float, default=0.0,
+                            help='Share of answers cut off part way, as if max_tokens was hit (0-1)')
+        parser.add_argument('--chunk-size', type=int, default=40,
+                            help='Characters per streamed delta')
+        parser.add_argument('--chunk-interval', type=float, default=0.01,
+                            help='Seconds between streamed deltas')
+        parser.add_argument('--seed', type=int, help='Random seed for reproducible runs')
+
+    def handle(self, *args, **options):
+        mock = MockOpenRouter(
+            host=options['host'],
+            port=options['port'],
+            latency=options['latency'],
+            jitter=options['jitter'],
+            error_rate=options['error_rate'],
+            error_status=options['error_status'],
+            truncate_rate=options['truncate_rate'],
+            chunk_size=options['chunk_size'],
+            chunk_interval=options['chunk_interval'],
+            seed=options['seed'],
+        )
+        self.stdout.write(f"🧪 Mock OpenRouter listening on http://{options['host']}:{options['port']}/api/v1/chat/completions")
+        self.stdout.write(f"   latency {options['latency']}s ±{options['jitter']}s, "
+                          f"errors {options['error_rate']:.0%} ({options['error_status']}), "
+                          f"truncated {options['truncate_rate']:.0%}")
+        try:
+            mock.serve_forever()
+        except KeyboardInterrupt:
+            stats = mock.snapshot()
+            self.stdout.write(f"\n⏹️ Stopped after {stats['requests']} requests "
+                              f"({stats['errors']} errors, {stats['truncated']} truncated, {stats['streamed']} streamed)")
@@ -0,0 +1,69 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ai_travel.warming import get_warming_config, in_off_peak_window, warm_cache
+
+
+class Command(BaseCommand):
+    help = 'Precompute AI itineraries for the most requested trips so they are served from cache'
+
+    def add_arguments(self, parser):
+        config = get_warming_config()
+        parser.add_argument('--top', type=int, default=config['TOP_N'],
+                            help='Number of destination/duration/budget/style combinations to consider')
+        parser.add_argument('--days', type=int, default=config['LOOKBACK_DAYS'],
+                            help='History window (days) used to rank combinations')
+        parser.add_argument('--concurrency', type=int, default=config['CONCURRENCY'],
+                            help='Generations running at the same time')
+        parser.add_argument('--token-budget', type=int, default=config['TOKEN_BUDGET'],
+                            help='Estimated upstream tokens one run may spend')
+        parser.add_argument('--ttl', type=int, default=config['TTL'],
+                            help='Seconds warmed entries stay cached')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only show what would be generated')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep running, warming once per --interval inside the off-peak window')
+        parser.add_argument('--interval', type=int, default=3600,
+                            help='Seconds between runs in --loop mode (default 3600)')
+        parser.add_argument('--off-peak', default=config['OFF_PEAK'],
+                            help='Local time window for --loop runs, e.g. 01:00-06:00 ("" for always)')
+
+    def handle(self, *args, **options):
+        if not options['loop']:
+            self._run_once(options)
+            return
+
+        self.stdout.write(f"🌙 Cache warming loop started (window: {options['off_peak'] or 'always'})")
+        try:
+            while True:
+                if in_off_peak_window(options['off_peak']):
+                    self._run_once(options)
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('⏹️ Cache warming loop stopped')
+
+    def _run_once(self, options):
+        start_time = time.time()
+        summary = warm_cache(
+            top_n=options['top'],
+            concurrency=options['concurrency'],
+            token_budget=options['token_budget'],
+            ttl=options['ttl'],
+            lookback_days=options['days'],
+            dry_run=options['dry_run'],
+        )
+
+        if options['dry_run']:
+            self.stdout.write('\n=== WOULD WARM ===')
+            for cache_key in summary['planned']:
+                self.stdout.write(f'- {cache_key}')
+
+        self.stdout.write('\n=== CACHE WARMING SUMMARY ===')
+        self.stdout.write(f"Combinations considered: {summary['considered']}")
+        self.stdout.write(f"Already cached: {summary['already_cached']}")
+        self.stdout.write(f"Warmed: {summary['warmed']}")
+        self.stdout.write(f"Failed: {summary['failed']}")
+        self.stdout.write(f"Skipped (token budget): {summary['skipped_for_budget']}")
+        self.stdout.write(f"Estimated tokens: {summary['estimated_tokens']} / {summary['token_budget']}")
+        self.stdout.write(self.style.SUCCESS(f'✅ Done in {time.time() - start_time:.2f}s'))
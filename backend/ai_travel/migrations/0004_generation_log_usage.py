@@ -0,0 +1,82 @@
+# Generated by Django 5.2.5 on 2026-10-17 02:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_travel', '0003_aigenerationjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aigenerationlog',
+            name='cache_hit',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='aigenerationlog',
+            name='cache_key',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='aigenerationlog',
+            name='completion_tokens',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='aigenerationlog',
+            name='destination',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='aigenerationlog',
+            name='model_name',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='aigenerationlog',
+            name='performance_mode',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='aigenerationlog',
+            name='prompt_tokens',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='aigenerationlog',
+            name='retries',
+            field=models.IntegerField(default=0, help_text='Earlier attempts for the same call'),
+        ),
+        migrations.AddField(
+            model_name='aigenerationlog',
+            name='status_code',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='aigenerationlog',
+            name='time_to_first_byte',
+            field=models.FloatField(blank=True, help_text='Seconds until upstream response headers', null=True),
+        ),
+        migrations.AlterField(
+            model_name='aigenerationlog',
+            name='itinerary',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='generation_logs', to='ai_travel.aiitinerary'),
+        ),
+        migrations.AlterField(
+            model_name='aigenerationlog',
+            name='request_type',
+            field=models.CharField(choices=[('itinerary', 'Itinerary Generation'), ('budget', 'Budget Estimation'), ('recommendations', 'Recommendations'), ('trip', 'Complete Trip')], max_length=50),
+        ),
+        migrations.AddIndex(
+            model_name='aigenerationlog',
+            index=models.Index(fields=['destination', 'timestamp'], name='ai_travel_a_destina_f3493b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aigenerationlog',
+            index=models.Index(fields=['request_type', 'timestamp'], name='ai_travel_a_request_d45d25_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-17 02:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_travel', '0004_generation_log_usage'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='aigenerationlog',
+            name='request_type',
+            field=models.CharField(choices=[('itinerary', 'Itinerary Generation'), ('budget', 'Budget Estimation'), ('recommendations', 'Recommendations'), ('combined', 'Combined Trip Generation'), ('trip', 'Complete Trip')], max_length=50),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-17 02:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_travel', '0005_generation_log_combined'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aigenerationlog',
+            name='priority',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='aigenerationlog',
+            name='queue_time',
+            field=models.FloatField(blank=True, help_text='Seconds spent waiting for an upstream rate-limit slot', null=True),
+        ),
+    ]
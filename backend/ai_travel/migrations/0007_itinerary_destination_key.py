@@ -0,0 +1,40 @@
+# Generated by Django 5.2.5 on 2026-10-17 02:42
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+
+def fill_destination_keys(apps, schema_editor):
+    # Frozen, model-free normalizer (accent fold + lowercase). Aliases and the
+    # city catalog are applied afterwards by `manage.py rekey_ai_destinations`.
+    def normalize(text):
+        text = unicodedata.normalize('NFKD', text or '')
+        text = ''.join(char for char in text if not unicodedata.combining(char)).lower()
+        return ' '.join(re.sub(r'[^\w]+', ' ', text.replace("'", '')).split())
+
+    AIItinerary = apps.get_model('ai_travel', 'AIItinerary')
+    for itinerary in AIItinerary.objects.filter(destination_key='').only('id', 'destination').iterator():
+        itinerary.destination_key = normalize(itinerary.destination)[:200]
+        itinerary.save(update_fields=['destination_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_travel', '0006_generation_log_queue_time'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aiitinerary',
+            name='destination_key',
+            field=models.CharField(blank=True, help_text='Canonical destination used to reuse stored trips', max_length=200),
+        ),
+        migrations.AddIndex(
+            model_name='aiitinerary',
+            index=models.Index(fields=['destination_key', 'duration_days', 'budget', 'travel_style', '-created_at'], name='ai_itinerary_reuse_idx'),
+        ),
+        migrations.RunPython(fill_destination_keys, migrations.RunPython.noop),
+    ]
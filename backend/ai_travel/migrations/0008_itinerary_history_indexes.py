@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-17 03:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_travel', '0007_itinerary_destination_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='aiitinerary',
+            index=models.Index(fields=['user', '-created_at'], name='ai_itinerary_user_hist_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aiitinerary',
+            index=models.Index(fields=['session_id', '-created_at'], name='ai_itinerary_session_hist_idx'),
+        ),
+    ]
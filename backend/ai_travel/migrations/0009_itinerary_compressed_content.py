@@ -0,0 +1,112 @@
+# Generated by Django 5.2.5 on 2026-10-17 03:05
+
+from django.db import migrations, models
+
+import ai_travel.storage
+
+COLUMNS = ['itinerary_content', 'budget_breakdown', 'recommendations']
+SHARED_SECTIONS = {'recommendations': 'recommendations', 'budget_breakdown': 'budget_breakdown'}
+
+
+def pack_content(apps, schema_editor):
+    # Saving the packed fields compresses them and, while the JSON columns still
+    # exist, replaces the sections repeated from them with references
+    AIItinerary = apps.get_model('ai_travel', 'AIItinerary')
+    for itinerary in AIItinerary.objects.only('id', *COLUMNS).iterator(chunk_size=500):
+        for column in COLUMNS:
+            setattr(itinerary, f'packed_{column}', getattr(itinerary, column))
+        itinerary.save(update_fields=[f'packed_{column}' for column in COLUMNS])
+
+
+def unpack_content(apps, schema_editor):
+    AIItinerary = apps.get_model('ai_travel', 'AIItinerary')
+    for itinerary in AIItinerary.objects.only('id', *(f'packed_{column}' for column in COLUMNS)).iterator(chunk_size=500):
+        packed = {column: getattr(itinerary, f'packed_{column}') for column in COLUMNS}
+        ai_travel.storage.unpack_sections(packed['itinerary_content'], SHARED_SECTIONS, packed)
+        for column in COLUMNS:
+            setattr(itinerary, column, packed[column])
+        itinerary.save(update_fields=COLUMNS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_travel', '0008_itinerary_history_indexes'),
+    ]
+
+    operations = [
+        # Nullable while both layouts exist, so the migration can also be reversed
+        migrations.AlterField(
+            model_name='aiitinerary',
+            name='itinerary_content',
+            field=models.JSONField(help_text='AI-generated itinerary in JSON format', null=True),
+        ),
+        migrations.AlterField(
+            model_name='aiitinerary',
+            name='budget_breakdown',
+            field=models.JSONField(help_text='AI-generated budget breakdown', null=True),
+        ),
+        migrations.AlterField(
+            model_name='aiitinerary',
+            name='recommendations',
+            field=models.JSONField(default=list, help_text='Additional recommendations', null=True),
+        ),
+        migrations.AddField(
+            model_name='aiitinerary',
+            name='packed_itinerary_content',
+            field=ai_travel.storage.CompressedJSONField(editable=True, help_text='AI-generated itinerary in JSON format', null=True, shared_sections=SHARED_SECTIONS),
+        ),
+        migrations.AddField(
+            model_name='aiitinerary',
+            name='packed_budget_breakdown',
+            field=ai_travel.storage.CompressedJSONField(editable=True, help_text='AI-generated budget breakdown', null=True),
+        ),
+        migrations.AddField(
+            model_name='aiitinerary',
+            name='packed_recommendations',
+            field=ai_travel.storage.CompressedJSONField(default=list, editable=True, help_text='Additional recommendations', null=True),
+        ),
+        migrations.RunPython(pack_content, unpack_content),
+        migrations.RemoveField(
+            model_name='aiitinerary',
+            name='itinerary_content',
+        ),
+        migrations.RemoveField(
+            model_name='aiitinerary',
+            name='budget_breakdown',
+        ),
+        migrations.RemoveField(
+            model_name='aiitinerary',
+            name='recommendations',
+        ),
+        migrations.RenameField(
+            model_name='aiitinerary',
+            old_name='packed_itinerary_content',
+            new_name='itinerary_content',
+        ),
+        migrations.RenameField(
+            model_name='aiitinerary',
+            old_name='packed_budget_breakdown',
+            new_name='budget_breakdown',
+        ),
+        migrations.RenameField(
+            model_name='aiitinerary',
+            old_name='packed_recommendations',
+            new_name='recommendations',
+        ),
+        migrations.AlterField(
+            model_name='aiitinerary',
+            name='itinerary_content',
+            field=ai_travel.storage.CompressedJSONField(editable=True, help_text='AI-generated itinerary in JSON format', shared_sections=SHARED_SECTIONS),
+        ),
+        migrations.AlterField(
+            model_name='aiitinerary',
+            name='budget_breakdown',
+            field=ai_travel.storage.CompressedJSONField(editable=True, help_text='AI-generated budget breakdown'),
+        ),
+        migrations.AlterField(
+            model_name='aiitinerary',
+            name='recommendations',
+            field=ai_travel.storage.CompressedJSONField(default=list, editable=True, help_text='Additional recommendations'),
+        ),
+    ]
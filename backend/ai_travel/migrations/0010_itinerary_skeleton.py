@@ -0,0 +1,20 @@
+# Generated by Django 5.2.5 on 2026-10-17 04:10
+
+from django.db import migrations
+
+import ai_travel.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_travel', '0009_itinerary_compressed_content'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aiitinerary',
+            name='skeleton',
+            field=ai_travel.storage.CompressedJSONField(blank=True, editable=False, help_text='Unpersonalized generator output (itinerary and budget) served when the trip is reused', null=True),
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:30
+
+from datetime import datetime
+
+import ai_travel.storage
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def copy_latest_skeletons(apps, schema_editor):
+    # Keep the newest stored skeleton of each trip; older per-row copies are dropped with the column
+    AIItinerary = apps.get_model('ai_travel', 'AIItinerary')
+    TripSkeleton = apps.get_model('ai_travel', 'TripSkeleton')
+    seen = set()
+    rows = AIItinerary.objects.filter(skeleton__isnull=False).exclude(destination_key='').only(
+        'destination_key', 'duration_days', 'budget', 'travel_style', 'skeleton', 'created_at'
+    ).order_by('-created_at')
+    for itinerary in rows.iterator():
+        trip_key = (itinerary.destination_key, itinerary.duration_days, itinerary.budget, itinerary.travel_style)
+        if trip_key in seen or not isinstance(itinerary.skeleton, dict):
+            continue
+        seen.add(trip_key)
+        generated_at = itinerary.created_at
+        content = (itinerary.skeleton.get('itinerary') or {}).get('itinerary_content')
+        if isinstance(content, dict) and isinstance(content.get('generated_at'), str):
+            try:
+                generated_at = datetime.fromisoformat(content['generated_at'])
+                if timezone.is_naive(generated_at):
+                    generated_at = timezone.make_aware(generated_at)
+            except ValueError:
+                pass
+        TripSkeleton.objects.create(
+            destination_key=itinerary.destination_key, duration_days=itinerary.duration_days,
+            budget=itinerary.budget, travel_style=itinerary.travel_style,
+            content=itinerary.skeleton, generated_at=generated_at,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_travel', '0010_itinerary_skeleton'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TripSkeleton',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('destination_key', models.CharField(help_text='Canonical destination (see ai_travel/canonical.py)', max_length=200)),
+                ('duration_days', models.IntegerField()),
+                ('budget', models.CharField(choices=[('budget', 'Budget'), ('mid-range', 'Mid-range'), ('luxury', 'Luxury')], max_length=20)),
+                ('travel_style', models.CharField(choices=[('cultural', 'Cultural'), ('adventure', 'Adventure'), ('relaxation', 'Relaxation'), ('family', 'Family'), ('romantic', 'Romantic'), ('solo', 'Solo'), ('business', 'Business')], max_length=20)),
+                ('content', ai_travel.storage.CompressedJSONField(editable=True, help_text="{'itinerary': ..., 'budget': ...} for one adult in one room")),
+                ('generated_at', models.DateTimeField(help_text='When the content was generated (reused trips keep the original time)')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Trip Skeleton',
+                'verbose_name_plural': 'Trip Skeletons',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='tripskeleton',
+            constraint=models.UniqueConstraint(fields=('destination_key', 'duration_days', 'budget', 'travel_style'), name='ai_trip_skeleton_key'),
+        ),
+        migrations.RunPython(copy_latest_skeletons, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='aiitinerary',
+            name='ai_itinerary_reuse_idx',
+        ),
+        migrations.RemoveField(
+            model_name='aiitinerary',
+            name='skeleton',
+        ),
+    ]
@@ -0,0 +1,254 @@
+"""
+Local stand-in for the OpenRouter chat completions API.
+
+MockOpenRouter answers POST requests with synthetic itinerary, budget,
+recommendations or combined JSON (picked from the prompt), after a
+configurable delay, and can inject errors, truncated responses and
+server-sent event streaming. It lets the AI path be load tested without
+spending tokens. Point settings.OPENROUTER_API_URL at it, or run it through
+the run_mock_openrouter and benchmark_ai_generate commands.
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+_DAYS_PATTERN = re.compile(r'(\d+)[- ]day')
+_DESTINATION_PATTERN = re.compile(r'\d+-day (?:itinerary for )?([^.:,\n]+?)(?: itinerary| trip|\.|:)')
+
+
+def _prompt_text(request: Dict[str, Any]) -> str:
+    return '\n'.join(str(message.get('content', '')) for message in request.get('messages') or [])
+
+
+def detect_request_kind(prompt: str) -> str:
+    """Which AIService call a prompt belongs to"""
+    if 'daily_schedule' in prompt:
+        return 'combined' if 'total_estimates' in prompt else 'itinerary'
+    if 'total_estimates' in prompt:
+        return 'budget'
+    return 'recommendations'
+
+
+def _fake_recommendations(destination: str) -> Dict[str, List[str]]:
+    return {
+        key: [f"{label} {index} in {destination} (Central District) - ${10 * index}-{15 * index}, mock detail"
+              for index in range(1, 7)]
+        for key, label in (
+            ('must_visit_attractions', 'Landmark'), ('local_cuisine', 'Signature dish at Bistro'),
+            ('must_try_restaurants', 'Restaurant'), ('hidden_gems', 'Hidden courtyard'),
+            ('cultural_tips', 'Etiquette tip'), ('budget_tips', 'Saving tip'),
+        )
+    }
+
+
+def _fake_budget(days: int) -> Dict[str, Any]:
+    return {
+        'accommodation': {'budget_min': 90 * days, 'budget_max': 240 * days,
+                          'recommendations': ['Mock Hotel Central: $120/night, Old Town']},
+        'transportation': {'airport_transfers': 60, 'local_daily': 15, 'total_transport': 60 + 15 * days},
+        'food': {'budget_daily': 45, 'luxury_daily': 140, 'dining_recommendations': ['Mock Brasserie: $35']},
+        'activities': {'daily_activity_budget': 60,
+                       'must_see_attractions': [{'name': 'Mock Museum', 'cost': 25}]},
+        'shopping': {'souvenirs': 80},
+        'miscellaneous': {'emergency_fund': 150},
+        'total_estimates': {'budget_total': 220 * days, 'mid_range_total': 380 * days, 'luxury_total': 800 * days},
+        'daily_breakdown': {'budget_per_day': 220, 'luxury_per_day': 800},
+    }
+
+
+def _fake_itinerary(destination: str, days: int) -> Dict[str, Any]:
+    schedule = []
+    for day in range(1, days + 1):
+        activities = [
+            {
+                'time': slot, 'activity': f'{destination} mock venue {day}.{index}',
+                'description': f'Synthetic activity {index} on day {day}, sized like a real model answer.',
+                'location': f'District {index}', 'type': kind, 'estimated_cost': 20 * index,
+                'duration': '2 hours', 'tips': 'Arrive early to skip the queue.',
+            }
+            for index, (slot, kind) in enumerate(
+                [('9:00 AM', 'sightseeing'), ('12:30 PM', 'dining'), ('3:00 PM', 'cultural'), ('7:30 PM', 'dining')],
+                start=1
+            )
+        ]
+        schedule.append({
+            'day': day, 'title': f'Day {day} in {destination}', 'activities': activities,
+            'dining_recommendations': [f'Mock Cafe {day}: local, $15-25'],
+            'daily_cost_estimate': sum(activity['estimated_cost'] for activity in activities),
+        })
+    return {
+        'overview': f'Mock {days}-day trip to {destination}.',
+        'total_estimated_cost': sum(day['daily_cost_estimate'] for day in schedule),
+        'daily_schedule': schedule,
+        'recommendations': _fake_recommendations(destination),
+    }
+
+
+def build_mock_content(request: Dict[str, Any]) -> str:
+    """Synthetic model answer shaped like the schema the prompt asked for"""
+    prompt = _prompt_text(request)
+    days_match = _DAYS_PATTERN.search(prompt)
+    days = min(int(days_match.group(1)), 30) if days_match else 3
+    destination_match = _DESTINATION_PATTERN.search(prompt)
+    destination = destination_match.group(1).strip() if destination_match else 'Mock City'
+
+    kind = detect_request_kind(prompt)
+    if kind == 'recommendations':
+        data = _fake_recommendations(destination)
+    elif kind == 'budget':
+        data = _fake_budget(days)
+    else:
+        data = _fake_itinerary(destination, days)
+        if kind == 'combined':
+            data['budget'] = _fake_budget(days)
+    return json.dumps(data)
+
+
+class MockOpenRouter:
+    """Threaded HTTP server imitating OpenRouter's chat completions endpoint"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 1.0, jitter: float = 0.2,
+                 error_rate: float = 0.0, error_status: int = 500, truncate_rate: float = 0.0,
+                 chunk_size: int = 40, chunk_interval: float = 0.01, seed: Optional[int] = None):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.truncate_rate = truncate_rate
+        self.chunk_size = max(1, chunk_size)
+        self.chunk_interval = chunk_interval
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.stats = {'requests': 0, 'errors': 0, 'truncated': 0, 'streamed': 0}
+        self.kinds: Dict[str, int] = {}
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        return f'http://{self.host}:{self.port}/api/v1/chat/completions'
+
+    def _roll(self) -> float:
+        with self._random_lock:
+            return self._random.random()
+
+    def _delay(self) -> float:
+        with self._random_lock:
+            return max(0.0, self._random.gauss(self.latency, self.jitter))
+
+    def _count(self, key: str, kind: Optional[str] = None):
+        with self._stats_lock:
+            self.stats[key] += 1
+            if kind:
+                self.kinds[kind] = self.kinds.get(kind, 0) + 1
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                try:
+                    request = json.loads(self.rfile.read(length) or b'{}')
+                except ValueError:
+                    request = {}
+                kind = detect_request_kind(_prompt_text(request))
+                mock._count('requests', kind)
+                time.sleep(mock._delay())
+
+                if mock._roll() < mock.error_rate:
+                    mock._count('errors')
+                    self._send_json(mock.error_status, {'error': {'message': 'Injected mock failure',
+                                                                  'code': mock.error_status}})
+                    return
+
+                content = build_mock_content(request)
+                finish_reason = 'stop'
+                if mock._roll() < mock.truncate_rate:
+                    mock._count('truncated')
+                    content = content[:int(len(content) * (0.4 + 0.5 * mock._roll()))]
+                    finish_reason = 'length'
+                usage = {
+                    'prompt_tokens': len(_prompt_text(request)) // 4,
+                    'completion_tokens': len(content) // 4,
+                }
+                usage['total_tokens'] = usage['prompt_tokens'] + usage['completion_tokens']
+
+                if request.get('stream'):
+                    mock._count('streamed')
+                    self._send_stream(content, finish_reason, usage if request.get('stream_options') else None)
+                else:
+                    self._send_json(200, {
+                        'id': 'mock-completion',
+                        'model': request.get('model', 'mock'),
+                        'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content},
+                                     'finish_reason': finish_reason}],
+                        'usage': usage,
+                    })
+
+            def _send_json(self, status_code: int, body: Dict[str, Any]):
+                data = json.dumps(body).encode()
+                self.send_response(status_code)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_stream(self, content: str, finish_reason: str, usage: Optional[Dict[str, int]]):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Connection', 'close')
+                self.end_headers()
+                self.close_connection = True
+                try:
+                    for start in range(0, len(content), mock.chunk_size):
+                        chunk = {'choices': [{'delta': {'content': content[start:start + mock.chunk_size]}}]}
+                        self.wfile.write(f'data: {json.dumps(chunk)}\n\n'.encode())
+                        self.wfile.flush()
+                        time.sleep(mock.chunk_interval)
+                    final = {'choices': [{'delta': {}, 'finish_reason': finish_reason}]}
+                    self.wfile.write(f'data: {json.dumps(final)}\n\n'.encode())
+                    if usage:
+                        self.wfile.write(f"data: {json.dumps({'choices': [], 'usage': usage})}\n\n".encode())
+                    self.wfile.write(b'data: [DONE]\n\n')
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # Client gave up (timeout or hedged attempt won)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _bind(self) -> ThreadingHTTPServer:
+        self._server = ThreadingHTTPServer((self.host, self.port), self._handler())
+        self._server.daemon_threads = True
+        self.port = self._server.server_port
+        return self._server
+
+    def start(self) -> 'MockOpenRouter':
+        """Serve in a daemon thread; returns self so .url can be read"""
+        threading.Thread(target=self._bind().serve_forever, name='mock-openrouter', daemon=True).start()
+        return self
+
+    def serve_forever(self):
+        """Serve in the calling thread (used by run_mock_openrouter)"""
+        self._bind().serve_forever()
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return dict(self.stats, kinds=dict(self.kinds))
@@ -2,6 +2,8 @@ from django.db import models
 from django.contrib.auth.models import User
 import uuid
 
+from .storage import CompressedJSONField, resolve_shared_sections, with_shared_columns
+
 class AIItinerary(models.Model):
     """Model for storing AI-generated travel itineraries"""
     BUDGET_CHOICES = [
@@ -26,6 +28,7 @@ class AIItinerary(models.Model):
     
     # Trip Details
     destination = models.CharField(max_length=200)
+    destination_key = models.CharField(max_length=200, blank=True, help_text="Canonical destination used to reuse stored trips")
     start_date = models.DateField()
     end_date = models.DateField()
     duration_days = models.IntegerField()
@@ -41,10 +44,13 @@ class AIItinerary(models.Model):
     accommodation_preference = models.CharField(max_length=100, blank=True)
     transportation_preference = models.CharField(max_length=100, blank=True)
     
-    # AI Generated Content
-    itinerary_content = models.JSONField(help_text="AI-generated itinerary in JSON format")
-    budget_breakdown = models.JSONField(help_text="AI-generated budget breakdown")
-    recommendations = models.JSONField(default=list, help_text="Additional recommendations")
+    # AI Generated Content (compressed; sections repeated from the other two columns are stored once, see storage.py)
+    itinerary_content = CompressedJSONField(
+        help_text="AI-generated itinerary in JSON format",
+        shared_sections={'recommendations': 'recommendations', 'budget_breakdown': 'budget_breakdown'}
+    )
+    budget_breakdown = CompressedJSONField(help_text="AI-generated budget breakdown")
+    recommendations = CompressedJSONField(default=list, help_text="Additional recommendations")
     
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
@@ -54,12 +60,30 @@ class AIItinerary(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Cursor-paginated history pages (see ai_travel/pagination.py)
+            models.Index(fields=['user', '-created_at'], name='ai_itinerary_user_hist_idx'),
+            models.Index(fields=['session_id', '-created_at'], name='ai_itinerary_session_hist_idx'),
+        ]
         verbose_name = "AI Itinerary"
         verbose_name_plural = "AI Itineraries"
         
     def __str__(self):
         return f"AI Itinerary for {self.destination} ({self.duration_days} days)"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        resolve_shared_sections(instance)
+        return instance
+    
+    def save(self, *args, **kwargs):
+        if not self.destination_key:
+            from .canonical import canonicalize_destination
+            self.destination_key = canonicalize_destination(self.destination)
+        kwargs['update_fields'] = with_shared_columns(self, kwargs.get('update_fields'))
+        super().save(*args, **kwargs)
+    
     @property
     def is_anonymous(self):
         return self.user is None
@@ -68,6 +92,29 @@ class AIItinerary(models.Model):
     def total_travelers(self):
         return self.adults + self.children
 
+class TripSkeleton(models.Model):
+    """Unpersonalized generator output (itinerary and budget), stored once per trip and served when it is reused"""
+    destination_key = models.CharField(max_length=200, help_text="Canonical destination (see ai_travel/canonical.py)")
+    duration_days = models.IntegerField()
+    budget = models.CharField(max_length=20, choices=AIItinerary.BUDGET_CHOICES)
+    travel_style = models.CharField(max_length=20, choices=AIItinerary.TRAVEL_STYLE_CHOICES)
+    
+    content = CompressedJSONField(help_text="{'itinerary': ..., 'budget': ...} for one adult in one room")
+    generated_at = models.DateTimeField(help_text="When the content was generated (reused trips keep the original time)")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        constraints = [
+            # Stored-trip reuse lookup (see ai_travel/reuse.py)
+            models.UniqueConstraint(fields=['destination_key', 'duration_days', 'budget', 'travel_style'],
+                                    name='ai_trip_skeleton_key'),
+        ]
+        verbose_name = "Trip Skeleton"
+        verbose_name_plural = "Trip Skeletons"
+        
+    def __str__(self):
+        return f"Skeleton for {self.destination_key} ({self.duration_days} days, {self.budget}, {self.travel_style})"
+
 class BudgetEstimate(models.Model):
     """Model for storing detailed budget estimates"""
     itinerary = models.OneToOneField(AIItinerary, on_delete=models.CASCADE, related_name='detailed_budget')
@@ -120,18 +167,35 @@ class BudgetEstimate(models.Model):
 
 class AIGenerationLog(models.Model):
     """Model for tracking AI API usage and performance"""
-    itinerary = models.ForeignKey(AIItinerary, on_delete=models.CASCADE, related_name='generation_logs')
+    # Upstream calls are logged before any itinerary exists, so the link is optional
+    itinerary = models.ForeignKey(AIItinerary, on_delete=models.CASCADE, related_name='generation_logs', null=True, blank=True)
     
     request_type = models.CharField(max_length=50, choices=[
         ('itinerary', 'Itinerary Generation'),
         ('budget', 'Budget Estimation'),
         ('recommendations', 'Recommendations'),
+        ('combined', 'Combined Trip Generation'),
+        ('trip', 'Complete Trip'),
     ])
     
+    # Request context
+    destination = models.CharField(max_length=200, blank=True)
+    performance_mode = models.CharField(max_length=20, blank=True)
+    model_name = models.CharField(max_length=100, blank=True)
+    cache_key = models.CharField(max_length=255, blank=True)
+    
     prompt_sent = models.TextField()
     response_received = models.TextField()
+    prompt_tokens = models.IntegerField(null=True, blank=True)
+    completion_tokens = models.IntegerField(null=True, blank=True)
     tokens_used = models.IntegerField(null=True, blank=True)
     response_time = models.FloatField(help_text="Response time in seconds")
+    time_to_first_byte = models.FloatField(null=True, blank=True, help_text="Seconds until upstream response headers")
+    retries = models.IntegerField(default=0, help_text="Earlier attempts for the same call")
+    queue_time = models.FloatField(null=True, blank=True, help_text="Seconds spent waiting for an upstream rate-limit slot")
+    priority = models.CharField(max_length=20, blank=True)
+    cache_hit = models.BooleanField(default=False)
+    status_code = models.IntegerField(null=True, blank=True)
     
     success = models.BooleanField(default=True)
     error_message = models.TextField(blank=True)
@@ -140,9 +204,59 @@ class AIGenerationLog(models.Model):
     
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['destination', 'timestamp']),
+            models.Index(fields=['request_type', 'timestamp']),
+        ]
         verbose_name = "AI Generation Log"
         verbose_name_plural = "AI Generation Logs"
         
     def __str__(self):
         status = "✓" if self.success else "✗"
         return f"{status} {self.request_type} - {self.timestamp.strftime('%Y-%m-%d %H:%M')}"
+
+class AIGenerationJob(models.Model):
+    """Queued itinerary generation, picked up by the run_ai_worker command"""
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    session_id = models.CharField(max_length=100, null=True, blank=True)
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    request_data = models.JSONField(help_text="Original generation request body")
+    callback_url = models.URLField(max_length=500, blank=True, help_text="Notified with the result when the job finishes")
+    
+    # Result
+    itinerary = models.ForeignKey(AIItinerary, on_delete=models.SET_NULL, null=True, blank=True, related_name='generation_jobs')
+    result = models.JSONField(null=True, blank=True, help_text="Response payload of the finished generation")
+    error_message = models.TextField(blank=True)
+    
+    # Worker bookkeeping
+    attempts = models.IntegerField(default=0)
+    worker_id = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['created_at']
+        indexes = [models.Index(fields=['status', 'created_at'])]
+        verbose_name = "AI Generation Job"
+        verbose_name_plural = "AI Generation Jobs"
+        
+    def __str__(self):
+        return f"{self.status} job for {self.request_data.get('destination', 'Unknown')}"
+    
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_SUCCEEDED, self.STATUS_FAILED)
@@ -0,0 +1,281 @@
+"""
+Schema-driven normalization of generated trips into the frontend shape.
+
+The field schemas below say, for every key the frontend reads, which keys of
+the AI payload it comes from and what the default is. compile_mapper() turns
+a schema, nested list schemas included, into a mapper function at import:
+source keys, defaults and nested item mappers are resolved once into plain
+field tuples, so converting a trip does no per-field schema interpretation.
+"""
+
+import logging
+from datetime import timedelta
+from typing import Any, Callable, Dict, NamedTuple, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (output key, source keys tried in order, default); sources=None marks a value
+# the caller computes and passes in, in schema order
+Schema = Sequence[Tuple[str, Optional[Tuple[str, ...]], Any]]
+
+
+class Each(NamedTuple):
+    """Schema default for a list field whose items are mapped with their own schema"""
+    schema: Any
+
+
+ACTIVITY_SCHEMA: Schema = (
+    ('time', ('time',), ''),
+    ('activity', ('activity',), ''),
+    ('description', ('description',), ''),
+    ('location', ('location',), ''),
+    ('estimated_cost', ('estimated_cost',), 0),
+    ('type', ('type',), 'activity'),
+    ('duration', ('duration',), ''),
+    ('tips', ('tips',), ''),
+    ('cultural_context', ('why_special',), ''),
+    ('photo_opportunity', ('tips',), ''),
+    ('matched_interests', ('matched_interests',), []),
+)
+
+DAY_SCHEMA: Schema = (
+    ('date', ('date',), ''),
+    ('theme', ('theme', 'title'), ''),
+    ('activities', ('activities',), Each(ACTIVITY_SCHEMA)),
+    ('dining_recommendations', ('dining_recommendations',), []),
+    ('daily_cost_estimate', ('daily_cost_estimate',), 0),
+    ('weather_note', ('weather_note',), ''),
+)
+
+CONTENT_SCHEMA: Schema = (
+    ('overview', ('overview',), 'Generated travel itinerary'),
+    ('total_estimated_cost', ('total_estimated_cost',), 0),
+    ('budget_breakdown', ('detailed_budget_breakdown', 'budget_breakdown'), {}),
+    ('daily_schedule', ('daily_schedule',), Each(DAY_SCHEMA)),
+    ('recommendations', None, None),
+    ('practical_information', None, None),
+    ('seasonal_notes', ('seasonal_notes',), ''),
+    ('budget_tips', ('budget_tips',), []),
+    ('packing_suggestions', None, None),
+    ('best_photo_spots', None, None),
+    ('local_phrases', None, None),
+    ('emergency_info', None, None),
+    ('images', ('images',), []),
+    ('personalization', ('personalization',), {}),
+    ('generated_at', ('generated_at',), ''),
+)
+
+# practical_information key -> (top-level fallback key, default)
+PRACTICAL_FIELDS = {
+    'packing_suggestions': ('packing_essentials', []),
+    'best_photo_spots': ('photography_spots', []),
+    'local_phrases': ('useful_phrases', {}),
+    'emergency_info': ('emergency_contacts', {}),
+}
+
+EXPERT_RECOMMENDATION_FIELDS = (
+    ('local_etiquette', 'cultural_etiquette'),
+    ('must_try_restaurants', 'must_try_restaurants'),
+    ('unique_experiences', 'unique_experiences'),
+    ('best_shopping', 'best_shopping'),
+    ('transportation_guide', 'transportation_guide'),
+)
+
+
+def compile_mapper(schema: Schema, name: str = 'mapper') -> Callable[..., Dict[str, Any]]:
+    """
+    Build mapper(source, *computed) -> dict for a schema.
+    Source keys, defaults and nested item mappers are resolved once into plain
+    field tuples; single-key fields (most of them) are then filled by one
+    C-level map over source.get, and only fallback chains and nested lists
+    take the Python loop.
+    """
+    output_keys = tuple(output_key for output_key, _, _ in schema)
+    computed_keys = tuple(output_key for output_key, sources, _ in schema if sources is None)
+    plain_keys, plain_sources, plain_defaults = [], [], []
+    mutable_defaults = []  # (output key, shared default) replaced by a fresh copy per result
+    chained = []           # (output key, source keys, default, item mapper)
+    for output_key, sources, default in schema:
+        if sources is None:
+            continue
+        if isinstance(default, Each):
+            item_mapper = compile_mapper(default.schema, f'{name}_{output_key}')
+            if item_mapper.computed_keys:
+                raise ValueError(f'Computed fields are only supported at the top level: {item_mapper.computed_keys}')
+            chained.append((output_key, tuple(sources), [], item_mapper))
+        elif len(sources) > 1:
+            chained.append((output_key, tuple(sources), default, None))
+        else:
+            plain_keys.append(output_key)
+            plain_sources.append(sources[0])
+            plain_defaults.append(default)
+            if isinstance(default, (list, dict)):
+                mutable_defaults.append((output_key, default))
+    plain_keys, plain_sources, plain_defaults = tuple(plain_keys), tuple(plain_sources), tuple(plain_defaults)
+    mutable_defaults, chained = tuple(mutable_defaults), tuple(chained)
+
+    def plain_mapper(source: Dict[str, Any]) -> Dict[str, Any]:
+        result = dict(zip(plain_keys, map(source.get, plain_sources, plain_defaults)))
+        for output_key, default in mutable_defaults:
+            if result[output_key] is default:
+                result[output_key] = default.copy()
+        return result
+
+    def mapper(source: Dict[str, Any], *values: Any) -> Dict[str, Any]:
+        if len(values) != len(computed_keys):
+            raise TypeError(f'{name}() expects {len(computed_keys)} computed values, got {len(values)}')
+        result = dict.fromkeys(output_keys)  # Fixes the key order to the schema's
+        result.update(zip(plain_keys, map(source.get, plain_sources, plain_defaults)))
+        for output_key, default in mutable_defaults:
+            if result[output_key] is default:
+                result[output_key] = default.copy()
+        for output_key, sources, default, item_mapper in chained:
+            # First key present wins, as in a hand-written fallback chain
+            for key in sources:
+                if key in source:
+                    value = source[key]
+                    break
+            else:
+                value = default.copy() if isinstance(default, (list, dict)) else default
+            if item_mapper is not None:
+                value = list(map(item_mapper, value))
+            result[output_key] = value
+        if computed_keys:
+            result.update(zip(computed_keys, values))
+        return result
+
+    if not chained and not computed_keys:
+        mapper = plain_mapper  # e.g. activities: every field is a single-key lookup
+    mapper.__name__ = mapper.__qualname__ = name
+    mapper.computed_keys = computed_keys
+    return mapper
+
+
+map_day = compile_mapper(DAY_SCHEMA, 'map_day')
+map_content = compile_mapper(CONTENT_SCHEMA, 'map_content')
+
+
+def normalize_day(day: Dict[str, Any]) -> Dict[str, Any]:
+    """One daily_schedule entry in the frontend shape"""
+    return map_day(day)
+
+
+def _normalize_content(content: Dict[str, Any]) -> Dict[str, Any]:
+    recommendations = content.get('recommendations', {})
+    if 'expert_recommendations' in content:
+        expert = content['expert_recommendations']
+        recommendations = dict(recommendations)
+        for output_key, source_key in EXPERT_RECOMMENDATION_FIELDS:
+            recommendations[output_key] = expert.get(source_key, [])
+
+    practical = content.get('practical_information', {})
+    extras = {
+        output_key: practical.get(practical_key, content.get(output_key, default))
+        for output_key, (practical_key, default) in PRACTICAL_FIELDS.items()
+    }
+    return map_content(
+        content,
+        recommendations,
+        practical,
+        extras['packing_suggestions'],
+        extras['best_photo_spots'],
+        extras['local_phrases'],
+        extras['emergency_info'],
+    )
+
+
+def _normalize_legacy(itinerary_content: Dict[str, Any], trip_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Older {'itinerary': {'day1': {'morning': ...}}} responses"""
+    daily_schedule = []
+    start_date = trip_data.get('start_date')
+    ai_itinerary = itinerary_content['itinerary']
+    for day_key in sorted(ai_itinerary.keys()):
+        if not day_key.startswith('day'):
+            continue
+        day_data = ai_itinerary[day_key]
+        activities = []
+        for time_period in ('morning', 'midday', 'afternoon', 'evening', 'night'):
+            activity_data = day_data.get(time_period)
+            if isinstance(activity_data, dict):
+                activities.append({
+                    'time': activity_data.get('time', ''),
+                    'activity': activity_data.get('activity', ''),
+                    'description': activity_data.get('notes', activity_data.get('description', '')),
+                    'location': activity_data.get('location', ''),
+                    'estimated_cost': activity_data.get('cost', ''),
+                    'type': 'activity',
+                    'cultural_context': activity_data.get('culturalContext', ''),
+                    'photo_opportunity': activity_data.get('photoOpportunity', '')
+                })
+        day_number = int(day_key.replace('day', ''))
+        day_date = start_date + timedelta(days=day_number - 1) if start_date else None
+        daily_schedule.append({
+            'date': day_date.isoformat() if day_date else f"Day {day_number}",
+            'theme': day_data.get('theme', f"Day {day_number}"),
+            'activities': activities
+        })
+
+    images = []
+    images_data = itinerary_content.get('images')
+    if isinstance(images_data, dict) and isinstance(images_data.get('gallery'), list):
+        images = images_data['gallery']
+
+    def _typed(key, kind):
+        value = itinerary_content.get(key)
+        return value if isinstance(value, kind) else kind()
+
+    return {
+        'overview': itinerary_content.get('destination_overview', itinerary_content.get('tripName', '')),
+        'daily_schedule': daily_schedule,
+        'recommendations': {
+            'local_etiquette': _typed('localEtiquette', dict),
+            'useful_phrases': _typed('usefulPhrases', dict),
+            'cultural_tips': _typed('culturalTips', list),
+        },
+        'images': images
+    }
+
+
+def normalize_itinerary(itinerary_content: Dict[str, Any], trip_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert an AI itinerary payload (any supported format) to the frontend shape"""
+    try:
+        if 'itinerary_content' in itinerary_content:
+            return _normalize_content(itinerary_content['itinerary_content'])
+        if itinerary_content.get('itinerary'):
+            return _normalize_legacy(itinerary_content, trip_data)
+
+        # Bare itinerary without a wrapper
+        daily_schedule = itinerary_content.get('daily_schedule')
+        recommendations = itinerary_content.get('recommendations')
+        return {
+            'overview': itinerary_content.get('overview', itinerary_content.get('destination_overview', 'Generated travel itinerary')),
+            'daily_schedule': daily_schedule if isinstance(daily_schedule, list) else [],
+            'recommendations': recommendations if isinstance(recommendations, dict) else {},
+            'total_estimated_cost': itinerary_content.get('total_estimated_cost', 0),
+            'budget_breakdown': itinerary_content.get('budget_breakdown', itinerary_content.get('detailed_budget_breakdown', {})),
+            'images': []
+        }
+    except Exception:
+        logger.exception("Could not normalize itinerary, returning an empty one")
+        return {
+            'overview': 'Generated travel itinerary',
+            'daily_schedule': [],
+            'recommendations': {},
+            'images': []
+        }
+
+
+def normalize_trip(itinerary_content: Dict[str, Any], budget_content: Dict[str, Any],
+                   trip_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Frontend itinerary with the generated budget merged in (what AIItinerary.itinerary_content stores)"""
+    itinerary = normalize_itinerary(itinerary_content, trip_data)
+    if isinstance(budget_content, dict) and 'error' not in budget_content:
+        if not itinerary.get('budget_breakdown'):
+            itinerary['budget_breakdown'] = budget_content
+        if itinerary.get('total_estimated_cost', 0) == 0:
+            total_estimates = budget_content.get('total_estimates', {})
+            if 'luxury_total' in total_estimates:
+                itinerary['total_estimated_cost'] = total_estimates['luxury_total']
+            elif 'budget_total' in total_estimates:
+                itinerary['total_estimated_cost'] = total_estimates['budget_total']
+    return itinerary
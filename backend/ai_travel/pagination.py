@@ -0,0 +1,23 @@
+"""
+Cursor pagination for itinerary history endpoints.
+
+Cursors stay stable while new itineraries are generated, and each page is a
+single indexed range query instead of an OFFSET scan over a user's history.
+"""
+
+from rest_framework.pagination import CursorPagination
+
+
+class ItineraryCursorPagination(CursorPagination):
+    """Newest first; clients pass ?page_size= (up to 100) and follow the next/previous links"""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+
+    def get_pagination_info(self):
+        return {
+            'page_size': self.page_size,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+        }
@@ -0,0 +1,201 @@
+"""
+Persistence of generated trips.
+
+save_generated_itinerary() turns an AIService result into the stored
+AIItinerary plus its BudgetEstimate and AIGenerationLog rows. The three rows
+are built in memory and inserted in one transaction, one INSERT each, so a
+remote database costs a single commit instead of three autocommit round
+trips. With settings.AI_PERSISTENCE['DEFERRED'] the insert runs on a
+background thread after the response payload is built, which takes the
+database off the response path entirely.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.db import close_old_connections, models, transaction
+from django.utils import timezone
+from rest_framework import status
+
+from .models import AIGenerationLog, AIItinerary, BudgetEstimate
+from .normalizer import normalize_trip
+from .reuse import store_skeleton
+from .serializers import AIItineraryCreateSerializer, AIItinerarySerializer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PERSISTENCE_CONFIG = {
+    'DEFERRED': False,  # Insert after the response is built (the row appears a moment later)
+    'WORKERS': 2,       # Background writer threads when DEFERRED
+}
+
+
+def get_persistence_config() -> Dict[str, Any]:
+    """Merge settings.AI_PERSISTENCE over the defaults"""
+    config = dict(DEFAULT_PERSISTENCE_CONFIG)
+    config.update(getattr(settings, 'AI_PERSISTENCE', {}))
+    return config
+
+
+def build_budget_estimate(itinerary: AIItinerary, budget_content: Dict[str, Any], duration_days: int) -> BudgetEstimate:
+    """Unsaved BudgetEstimate with the detailed breakdown of a generated budget"""
+    return BudgetEstimate(
+        itinerary=itinerary,
+        accommodation_min=budget_content.get('accommodation', {}).get('budget_min', 0),
+        accommodation_max=budget_content.get('accommodation', {}).get('budget_max', 0),
+        accommodation_recommendations=budget_content.get('accommodation', {}).get('recommendations', []),
+        transportation_min=budget_content.get('transportation', {}).get('local', {}).get('daily_transport', 0) * duration_days,
+        transportation_max=budget_content.get('transportation', {}).get('local', {}).get('daily_transport', 0) * duration_days * 1.5,
+        transportation_breakdown=budget_content.get('transportation', {}),
+        food_min=budget_content.get('food', {}).get('budget_daily', 0) * duration_days,
+        food_max=budget_content.get('food', {}).get('luxury_daily', 0) * duration_days,
+        dining_recommendations=budget_content.get('food', {}).get('dining_recommendations', []),
+        activities_min=budget_content.get('activities', {}).get('daily_activity_budget', 0) * duration_days,
+        activities_max=budget_content.get('activities', {}).get('daily_activity_budget', 0) * duration_days * 1.5,
+        activities_breakdown=budget_content.get('activities', {}).get('must_see_attractions', []),
+        shopping_min=budget_content.get('shopping', {}).get('souvenirs', 0),
+        shopping_max=budget_content.get('shopping', {}).get('souvenirs', 0) * 2,
+        miscellaneous=budget_content.get('miscellaneous', {}).get('emergency_fund', 0),
+        emergency_fund=budget_content.get('miscellaneous', {}).get('emergency_fund', 0),
+        total_min=budget_content.get('total_estimates', {}).get('budget_total', 0),
+        total_max=budget_content.get('total_estimates', {}).get('luxury_total', 0),
+        budget_alternatives=budget_content.get('budget_alternatives', []),
+        luxury_alternatives=budget_content.get('luxury_upgrades', [])
+    )
+
+
+def write_generated_rows(itinerary: AIItinerary, budget_estimate: Optional[BudgetEstimate],
+                         generation_log: AIGenerationLog, skeleton: Optional[Dict[str, Any]] = None):
+    """
+    Insert a generated trip's rows in one transaction (all or nothing), then
+    keep its skeleton for reuse (see reuse.py) outside of it.
+    """
+    with transaction.atomic():
+        itinerary.save(force_insert=True)
+        if budget_estimate is not None:
+            budget_estimate.save(force_insert=True)
+        generation_log.save(force_insert=True)
+    logger.info("Saved itinerary", extra={'itinerary_id': str(itinerary.id)})
+    if skeleton is not None:
+        try:
+            store_skeleton(itinerary, skeleton)
+        except Exception as e:
+            logger.warning("Storing the trip skeleton failed: %s", e)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def _get_writer(workers: int) -> ThreadPoolExecutor:
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ai-persist')
+    return _writer
+
+
+def _write_in_background(*rows):
+    try:
+        write_generated_rows(*rows)
+    except Exception as e:
+        logger.exception("Deferred save of itinerary %s failed: %s", rows[0].id, e)
+    finally:
+        close_old_connections()
+
+
+def save_generated_itinerary(validated_data, user_id, itinerary_content, budget_content, generation_time,
+                             defer: Optional[bool] = None) -> Tuple[Dict[str, Any], int]:
+    """
+    Format, persist and serialize a generated trip.
+    Returns: (response_payload, http_status) so sync and async views can share it
+    """
+    # Frontend shape with the generated budget merged in
+    formatted_itinerary = normalize_trip(itinerary_content, budget_content, validated_data)
+    
+    # Prepare data for database storage
+    itinerary_data = validated_data.copy()
+    
+    # Convert interests list to comma-separated string for model storage
+    if 'interests' in itinerary_data and isinstance(itinerary_data['interests'], list):
+        itinerary_data['interests'] = ', '.join(itinerary_data['interests'])
+    
+    itinerary_data.update({
+        'user': user_id,
+        'itinerary_content': formatted_itinerary,  # Use formatted version
+        'budget_breakdown': budget_content,
+        'generation_time': generation_time,
+        'recommendations': formatted_itinerary.get('recommendations', [])
+    })
+    
+    # Validate, then build every row in memory so they can be inserted together
+    itinerary_serializer = AIItineraryCreateSerializer(data=itinerary_data)
+    if not itinerary_serializer.is_valid():
+        logger.error("Itinerary failed validation before saving", extra={'errors': itinerary_serializer.errors})
+        return {
+            'success': False,
+            'error': 'Failed to save itinerary',
+            'details': itinerary_serializer.errors
+        }, status.HTTP_500_INTERNAL_SERVER_ERROR
+    
+    itinerary = AIItinerary(**itinerary_serializer.validated_data)
+    skeleton = itinerary_content.get('skeleton')  # Unpersonalized copy for reuse (see reuse.py)
+    itinerary.created_at = itinerary.updated_at = timezone.now()  # Overwritten on insert, needed to serialize first
+    
+    # Detailed budget estimate if budget generation was successful
+    budget_estimate = None
+    if 'error' not in budget_content:
+        try:
+            budget_estimate = build_budget_estimate(itinerary, budget_content, validated_data['duration_days'])
+            # Amounts are checked up front so a malformed budget cannot roll back the itinerary insert
+            for field in BudgetEstimate._meta.concrete_fields:
+                if isinstance(field, models.DecimalField):
+                    setattr(budget_estimate, field.attname, field.clean(getattr(budget_estimate, field.attname), budget_estimate))
+        except Exception as e:
+            logger.warning("Error creating detailed budget: %s", e)
+            budget_estimate = None
+            AIItinerary.detailed_budget.related.delete_cached_value(itinerary)
+    
+    generation_log = AIGenerationLog(
+        itinerary=itinerary,
+        request_type='itinerary',
+        destination=itinerary.destination,
+        prompt_sent=f"Generated itinerary for {validated_data['destination']}",
+        response_received=str(itinerary_content.get('itinerary_content', itinerary_content))[:1000],  # Truncate for storage
+        response_time=generation_time,
+        success=True
+    )
+    
+    config = get_persistence_config()
+    if config['DEFERRED'] if defer is None else defer:
+        # Serialize from memory; the primary key is a client-side UUID, so the payload is final
+        response_serializer = AIItinerarySerializer(itinerary)
+        payload = response_serializer.data
+        _get_writer(config['WORKERS']).submit(_write_in_background, itinerary, budget_estimate, generation_log, skeleton)
+    else:
+        try:
+            write_generated_rows(itinerary, budget_estimate, generation_log, skeleton)
+        except Exception as e:
+            logger.exception("Database save failed: %s", e)
+            return {
+                'success': False,
+                'error': 'Failed to save itinerary',
+                'details': str(e)
+            }, status.HTTP_500_INTERNAL_SERVER_ERROR
+        payload = AIItinerarySerializer(itinerary).data
+    
+    # Return response
+    return {
+        'success': True,
+        'message': 'AI itinerary generated successfully',
+        'itinerary': payload,
+        'generation_time': round(generation_time, 2),
+        'performance': {
+            'total_time': round(generation_time, 2),
+            'speed': 'fast' if generation_time < 5 else 'normal'
+        }
+    }, status.HTTP_201_CREATED
@@ -0,0 +1,441 @@
+"""
+Versioned prompt templates for AIService.
+
+Each request kind (itinerary, budget, recommendations, combined) has numbered template
+versions. 'v1' is the original verbose prompt; 'v2' is a compact rewrite that
+asks only for the fields the views and frontend actually read, written as a
+minified schema. settings.AI_PROMPTS picks the version per kind, so a new
+version can be rolled out (and rolled back) without touching the service.
+Compare versions offline with: python manage.py benchmark_prompts
+"""
+
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROMPT_CONFIG = {
+    'itinerary': 'v2',
+    'budget': 'v2',
+    'recommendations': 'v2',
+    'combined': 'v1',
+}
+
+
+def get_prompt_config() -> Dict[str, str]:
+    """Merge settings.AI_PROMPTS (kind -> version) over the defaults"""
+    config = dict(DEFAULT_PROMPT_CONFIG)
+    config.update(getattr(settings, 'AI_PROMPTS', {}))
+    return config
+
+
+class PromptTemplate:
+    """System and user text plus sampling settings for one prompt version"""
+
+    def __init__(self, system: str, user: str, temperature: float, max_tokens: int, **extra):
+        self.system = system
+        self.user = user
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.extra = extra  # Other request fields, e.g. top_p
+
+    def render(self, context: Dict[str, Any]) -> List[Dict[str, str]]:
+        return [
+            {'role': 'system', 'content': self.system.format(**context)},
+            {'role': 'user', 'content': self.user.format(**context)},
+        ]
+
+
+def compact_schema(schema: Any) -> str:
+    """Minified JSON example, escaped for str.format"""
+    text = json.dumps(schema, separators=(',', ':'), ensure_ascii=False)
+    return text.replace('{', '{{').replace('}', '}}')
+
+
+# Minimal response shapes: only keys read by the normalizer schemas,
+# persistence.save_generated_itinerary / views.regenerate_budget and the frontend pages.
+# Dates are left out because _personalize_day stamps them from start_date, and the
+# itinerary's budget_breakdown because the budget call supplies it.
+ITINERARY_SCHEMA = {
+    'overview': 'str',
+    'total_estimated_cost': 0,
+    'daily_schedule': [{
+        'day': 1,
+        'title': 'theme',
+        'activities': [{
+            'time': '9:00 AM', 'activity': 'venue', 'description': 'str', 'location': 'area',
+            'type': 'sightseeing|dining|cultural', 'estimated_cost': 0, 'duration': '2 hours', 'tips': 'str',
+        }],
+        'dining_recommendations': ['Restaurant: cuisine, $'],
+        'daily_cost_estimate': 0,
+    }],
+    'recommendations': {
+        'must_visit_attractions': ['str'], 'local_cuisine': ['dish at restaurant - $'],
+        'must_try_restaurants': ['name (area): cuisine, $'], 'hidden_gems': ['str'],
+        'cultural_tips': ['str'], 'budget_tips': ['str'],
+    },
+}
+
+BUDGET_SCHEMA = {
+    'accommodation': {'budget_min': 0, 'budget_max': 0, 'recommendations': ['Hotel: $/night, area']},
+    'transportation': {'airport_transfers': 0, 'local_daily': 0, 'total_transport': 0},
+    'food': {'budget_daily': 0, 'luxury_daily': 0, 'dining_recommendations': ['Restaurant: $']},
+    'activities': {'daily_activity_budget': 0, 'must_see_attractions': [{'name': 'place', 'cost': 0}]},
+    'shopping': {'souvenirs': 0},
+    'miscellaneous': {'emergency_fund': 0},
+    'total_estimates': {'budget_total': 0, 'mid_range_total': 0, 'luxury_total': 0},
+    'daily_breakdown': {'budget_per_day': 0, 'luxury_per_day': 0},
+}
+
+RECOMMENDATIONS_SCHEMA = {
+    key: ['str'] for key in (
+        'budget_tips', 'cultural_tips', 'local_cuisine',
+        'must_visit_attractions', 'must_try_restaurants', 'hidden_gems',
+    )
+}
+
+# Combined mode: the itinerary keys at top level (so the streamed daily_schedule
+# is still found by DailyScheduleScanner) with the budget appended last
+COMBINED_SCHEMA = dict(ITINERARY_SCHEMA, budget=BUDGET_SCHEMA)
+
+COMPACT_SYSTEM = (
+    "Expert local travel planner. Use only real places with exact names, areas and "
+    "current prices; never generic placeholders. Reply with JSON only."
+)
+
+PROMPT_TEMPLATES = {
+    'itinerary': {
+        'v1': PromptTemplate(
+            system='''You are an expert travel planner with deep knowledge of destinations worldwide. 
+                
+CRITICAL INSTRUCTIONS:
+- Provide ONLY real, verifiable information about actual places
+- Use EXACT names of real restaurants, hotels, attractions, and landmarks
+- Include REAL addresses and specific location details
+- Never use generic placeholders like "Local Restaurant" or "Top attraction"
+- Research current 2024-2025 pricing and provide accurate estimates
+- Share authentic local experiences and insider knowledge
+- All recommendations must be places that actually exist and can be verified
+
+Create detailed, practical, and culturally rich travel itineraries with accurate pricing and logistics based on real venues and establishments.''',
+            user="""Create a {duration_days}-day itinerary for {destination}.
+
+Details: {duration_days} days, ${budget} budget, {travel_style} style, {adults} adults, {children} kids, Interests: {interests}
+
+RULES: Use ONLY real places with exact names, real addresses, and 2024-2025 pricing. No generic placeholders.
+
+JSON Response:
+{{
+  "overview": "Brief overview",
+  "total_estimated_cost": number,
+  "daily_schedule": [
+    {{
+      "day": 1,
+      "date": "YYYY-MM-DD",
+      "title": "Day theme",
+      "activities": [
+        {{
+          "time": "9:00 AM",
+          "activity": "Real venue name",
+          "description": "Why it's special",
+          "location": "Real address",
+          "type": "sightseeing/dining/cultural",
+          "estimated_cost": number,
+          "duration": "X hours",
+          "tips": "Insider tip"
+        }}
+      ],
+      "dining_recommendations": ["Restaurant: Cuisine, $XX-XX"],
+      "daily_cost_estimate": number
+    }}
+  ],
+  "recommendations": {{
+    "must_visit_attractions": ["Real attraction with description"],
+    "local_cuisine": ["Real dish at Real Restaurant - $XX"],
+    "must_try_restaurants": ["Name (Location): Cuisine, $XX, Details"],
+    "hidden_gems": ["Real lesser-known spot"],
+    "cultural_tips": ["Specific local tip"],
+    "budget_tips": ["Money-saving tip"]
+  }},
+  "budget_breakdown": {{
+    "accommodation_per_night": number,
+    "meals_per_day": number,
+    "activities_per_day": number,
+    "transportation_daily": number
+  }}
+}}
+
+Be specific and authentic. All {duration_days} days required.""",
+            temperature=0.7,
+            max_tokens=2500,
+        ),
+        'v2': PromptTemplate(
+            system=COMPACT_SYSTEM,
+            user=(
+                "{duration_days}-day {destination} itinerary: {budget} budget, {travel_style} style, "
+                "{adults} adults, {children} kids, interests: {interests}.\n"
+                "JSON: " + compact_schema(ITINERARY_SCHEMA) + "\n"
+                "All {duration_days} days, 3-4 activities each, 4-6 items per recommendations list."
+            ),
+            temperature=0.7,
+            max_tokens=2500,
+        ),
+    },
+    'budget': {
+        'v1': PromptTemplate(
+            system='''You are a financial travel advisor with expertise in global travel costs. 
+
+CRITICAL INSTRUCTIONS:
+- Provide accurate, realistic budget estimates based on CURRENT 2024-2025 market rates
+- Use REAL hotel names with actual price ranges
+- Include REAL restaurant names with current menu prices
+- Calculate accurate transportation costs for the specific destination
+- Never use placeholder prices - all costs must reflect actual current rates
+- Research and provide verifiable pricing information
+- Include specific venue names and real costs
+
+Provide accurate, realistic budget estimates based on current market rates and real establishments.''',
+            user="""Budget breakdown for {duration_days}-day {destination} trip.
+
+Details: {adults} adults, {children} kids, {budget} budget, {travel_style} style
+
+RULES: Use real 2024-2025 prices, real hotel/restaurant names.
+
+JSON:
+{{
+  "accommodation": {{
+    "budget_min": number,
+    "budget_max": number,
+    "recommendations": ["Hotel: $XX/night, Area"],
+    "daily_average": number
+  }},
+  "transportation": {{
+    "airport_transfers": number,
+    "local_daily": number,
+    "total_transport": number,
+    "options": ["Option: $XX"]
+  }},
+  "food": {{
+    "budget_daily": number,
+    "luxury_daily": number,
+    "total_food_budget": number,
+    "total_food_luxury": number,
+    "dining_recommendations": ["Restaurant: $XX"]
+  }},
+  "activities": {{
+    "daily_activity_budget": number,
+    "total_activities": number,
+    "must_see_attractions": [{{"name": "Real place", "cost": number}}],
+    "free_activities": ["Real free option"]
+  }},
+  "shopping": {{
+    "souvenirs_budget": number,
+    "luxury_shopping": number,
+    "local_markets": "Market: $XX"
+  }},
+  "miscellaneous": {{
+    "emergency_fund": number,
+    "tips_gratuities": number,
+    "phone_internet": number
+  }},
+  "total_estimates": {{
+    "budget_total": number,
+    "mid_range_total": number,
+    "luxury_total": number
+  }},
+  "daily_breakdown": {{
+    "budget_per_day": number,
+    "luxury_per_day": number
+  }},
+  "money_saving_tips": ["Specific tip for {destination}"],
+  "currency_info": {{
+    "local_currency": "Name (CODE)",
+    "exchange_rate_usd": number,
+    "payment_methods": ["Methods in {destination}"]
+  }}
+}}
+
+Be accurate and specific for {destination}.""",
+            temperature=0.3,
+            max_tokens=1500,
+        ),
+        'v2': PromptTemplate(
+            system=COMPACT_SYSTEM,
+            user=(
+                "{duration_days}-day {destination} trip budget in USD: {adults} adults, {children} kids, "
+                "{budget} budget, {travel_style} style. Totals cover the whole trip.\n"
+                "JSON: " + compact_schema(BUDGET_SCHEMA)
+            ),
+            temperature=0.3,
+            max_tokens=900,
+        ),
+    },
+    'recommendations': {
+        'v1': PromptTemplate(
+            system='''You are a local travel expert with insider knowledge of destinations worldwide.
+
+CRITICAL INSTRUCTIONS:
+- Provide ONLY real, verifiable places that actually exist
+- Use EXACT names of real restaurants, attractions, shops, neighborhoods
+- Include REAL addresses, districts, and specific location details
+- NEVER use generic terms like "Local Restaurant", "Top attraction", "City landmark"
+- Research and provide accurate 2024-2025 current pricing
+- Share authentic insider knowledge and local favorites
+- Every recommendation must be a place that can be found on Google Maps
+- Be specific about locations: use district names, street names, landmarks
+
+Your recommendations should be so specific that a traveler could immediately book or visit these exact places.''',
+            user="""You are a local expert creating a travel guide for {destination}.
+
+TRIP DETAILS:
+- Destination: {destination}
+- Duration: {duration_days} days
+- Budget: {budget}
+- Travel Style: {travel_style}
+
+CRITICAL REQUIREMENTS - READ CAREFULLY:
+1. ONLY use real, verifiable places that exist in {destination}
+2. Include EXACT business names (e.g., "Ichiran Ramen", NOT "a ramen shop")
+3. Include specific DISTRICTS/AREAS (e.g., "Shibuya", "Asakusa")
+4. Provide REAL 2024-2025 prices (e.g., "$12-18", NOT "affordable")
+5. Add insider details (e.g., "arrive before 9am to avoid queue")
+6. FORBIDDEN: Generic terms like "local restaurant", "top attraction", "hidden gem" without specific names
+7. Every place must be findable on Google Maps
+
+RESPONSE FORMAT (strict JSON):
+{{
+  "budget_tips": [
+    "Book [REAL HOTEL NAME] in [AREA] for $XX-YY/night, includes breakfast",
+    "Use [SPECIFIC TRANSPORT PASS] for ¥X,XXX ($XX) - unlimited travel",
+    "Eat at [REAL RESTAURANT CHAIN] for $X-X per meal - locals' favorite",
+    "Visit [SPECIFIC FREE ATTRACTION] - no entrance fee, open 24/7",
+    "Shop at [REAL STORE NAME] for souvenirs - 30-50% cheaper than tourist areas",
+    "Get [SPECIFIC CITY PASS] for $XX - includes YY attractions"
+  ],
+  "cultural_tips": [
+    "Remove shoes before entering [SPECIFIC SITUATIONS] - look for genkan entrance area",
+    "Bow at [X] degrees for casual greeting, [Y] degrees for formal situations",
+    "Learn these exact phrases: '[PHRASE 1]' ([meaning]), '[PHRASE 2]' ([meaning])",
+    "No tipping in {destination} - it's [cultural reason], service included",
+    "At [SPECIFIC VENUE TYPE], follow [SPECIFIC ETIQUETTE RULE]",
+    "Avoid [SPECIFIC BEHAVIOR] in [SPECIFIC PLACES] - considered disrespectful"
+  ],
+  "local_cuisine": [
+    "[DISH NAME] at [REAL RESTAURANT] ([Area]) - $XX-XX, [what makes it special]",
+    "[DISH NAME] at [REAL RESTAURANT] ([Area]) - $XX-XX, [unique feature, e.g., 'Michelin-starred']",
+    "[DISH NAME] at [REAL RESTAURANT] ([Area]) - $XX-XX, [insider tip, e.g., 'arrive before 11am']",
+    "[DISH NAME] at [REAL RESTAURANT] ([Area]) - $XX-XX, [what locals say]",
+    "[STREET FOOD] at [SPECIFIC MARKET/STREET] - $X-X, [when to go]",
+    "[SPECIALTY DISH] at [RESTAURANT NAME] - $XX-XX, [why it's famous]"
+  ],
+  "must_visit_attractions": [
+    "[EXACT ATTRACTION NAME] ([District]) - [Specific details: built in YEAR, height XXm, famous for YYY]",
+    "[REAL TEMPLE/SHRINE NAME] ([Area]) - [History: founded XXX, significance YYY, entrance fee $Z]",
+    "[SPECIFIC LANDMARK] ([Location]) - [Unique features, best time to visit, pro tip]",
+    "[MUSEUM/GALLERY NAME] ([District]) - [Collection highlights, ticket price, insider advice]",
+    "[NEIGHBORHOOD/DISTRICT NAME] - [What it's known for, what to see, when to go]",
+    "[VIEWPOINT/OBSERVATION DECK] ([Building]) - [Height, views, cost, best time]",
+    "[PARK/GARDEN NAME] ([Area]) - [Size, highlights, seasonal features, free/paid]",
+    "[CULTURAL VENUE] ([Location]) - [What happens there, prices, booking info]"
+  ],
+  "must_try_restaurants": [
+    "[RESTAURANT NAME] ([District]): [Cuisine], $XX-XX, [Signature dish, atmosphere, booking needed?]",
+    "[RESTAURANT NAME] ([Area]): [Cuisine], $XX-XX, [Awards/Michelin stars, specialty, insider tip]",
+    "[RESTAURANT NAME] ([Location]): [Cuisine], $XX-XX, [Why locals love it, best dishes]",
+    "[CHAIN/CASUAL NAME] ([Multiple]): [Cuisine], $X-X, [What to order, when crowded]",
+    "[FINE DINING NAME] ([District]): [Cuisine], $XXX-XXX, [Dress code, booking months ahead]",
+    "[STREET FOOD VENDOR] ([Market/Street]): [Specialty], $X-X, [Operating hours, cash only?]"
+  ],
+  "hidden_gems": [
+    "[SPECIFIC HIDDEN SPOT] ([Neighborhood]) - [Why tourists miss it, what makes it special, how to find it]",
+    "[LESSER-KNOWN ATTRACTION] ([Area]) - [What it is, why locals love it, best time to visit]",
+    "[SECRET BAR/CAFÉ/SHOP] ([District]) - [What's unique, how to access, insider knowledge]",
+    "[OFF-BEAT NEIGHBORHOOD] - [Vibe, what to see, why not in guidebooks]",
+    "[QUIRKY VENUE/EXPERIENCE] ([Location]) - [What it is, cost, why fun/interesting]",
+    "[LOCAL HANGOUT] ([Area]) - [What locals do there, best time, price range]"
+  ]
+}}
+
+EXAMPLES OF GOOD RESPONSES:
+✅ "Book Hotel Gracery Shinjuku for $80-120/night near Kabukicho, has Godzilla on roof"
+✅ "Tonkatsu at Maisen (Omotesando) - $15-25, in converted bathhouse, crispy Kurobuta pork"
+✅ "Yanaka Ginza (Yanaka) - 170m shopping street with 70+ stores, cat statues, zero tourists"
+
+EXAMPLES OF BAD RESPONSES:
+❌ "Book accommodations in advance for better rates" (no specific hotel)
+❌ "Try traditional local dish" (no restaurant name)
+❌ "Visit hidden gems off the beaten path" (no specific place)
+
+Generate recommendations NOW. Be specific or fail.""",
+            temperature=0.8,  # Slightly higher for creative recommendations
+            max_tokens=2000,
+            top_p=0.9,
+        ),
+        'v2': PromptTemplate(
+            system=COMPACT_SYSTEM,
+            user=(
+                "Insider guide for {destination}: {duration_days} days, {budget} budget, {travel_style} style.\n"
+                "JSON, 6 items per list: " + compact_schema(RECOMMENDATIONS_SCHEMA) + "\n"
+                "Each item: exact name (district) - 2024-2025 price - one specific detail, "
+                "e.g. \"Tonkatsu at Maisen (Omotesando) - $15-25, crispy Kurobuta pork\"."
+            ),
+            temperature=0.8,
+            max_tokens=1500,
+            top_p=0.9,
+        ),
+    },
+    'combined': {
+        'v1': PromptTemplate(
+            system=COMPACT_SYSTEM,
+            user=(
+                "{duration_days}-day {destination} trip: {budget} budget, {travel_style} style, "
+                "{adults} adults, {children} kids, interests: {interests}.\n"
+                "JSON with the itinerary, recommendations and a USD budget for the whole trip: "
+                + compact_schema(COMBINED_SCHEMA) + "\n"
+                "All {duration_days} days, 3-4 activities each, 4-6 items per recommendations list."
+            ),
+            temperature=0.5,
+            max_tokens=3200,
+        ),
+    },
+}
+
+
+def prompt_context(trip_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Values the templates may reference"""
+    interests = trip_data.get('interests', [])
+    return {
+        'destination': trip_data.get('destination', 'Unknown'),
+        'duration_days': trip_data.get('duration_days', 3),
+        'budget': trip_data.get('budget', 'mid-range'),
+        'travel_style': trip_data.get('travel_style', 'cultural'),
+        'adults': trip_data.get('adults', 2),
+        'children': trip_data.get('children', 0),
+        'interests': ', '.join(interests) if interests else 'general',
+    }
+
+
+def get_prompt_template(kind: str, version: Optional[str] = None) -> PromptTemplate:
+    versions = PROMPT_TEMPLATES[kind]
+    version = version or get_prompt_config().get(kind, 'v1')
+    if version not in versions:
+        logger.warning("Unknown %s prompt version %r, using v1", kind, version)
+        version = 'v1'
+    return versions[version]
+
+
+def build_prompt_payload(kind: str, trip_data: Dict[str, Any], model: str,
+                         version: Optional[str] = None) -> Dict[str, Any]:
+    """OpenRouter request body for one request kind"""
+    template = get_prompt_template(kind, version)
+    payload = {
+        'model': model,
+        'messages': template.render(prompt_context(trip_data)),
+        'temperature': template.temperature,
+        'max_tokens': template.max_tokens,
+    }
+    payload.update(template.extra)
+    return payload
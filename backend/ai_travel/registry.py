@@ -0,0 +1,180 @@
+"""
+Process-wide AIService instances.
+
+Views, background jobs and cache warming share one AIService (and one
+AsyncAIService) per process instead of building a fresh one per request.
+The services keep no per-request state: the caller's upstream priority
+travels in a context variable (scheduler.py), and the pieces that warm up
+over time, such as the HTTP pool, trip cache, circuit breaker, scheduler
+and fallback catalog, are module singletons the service reaches through
+get_*() accessors.
+
+Config is hot-reloaded. When a setting one of these objects was built from
+changes (override_settings, or reload_ai_services() after editing settings
+at runtime), only the affected singletons are dropped, and the next call
+rebuilds them from the new values. Running workers also reload everything
+when the fallback catalog file or the AI_RELOAD trigger file changes on
+disk (`python manage.py reload_ai_services` touches it); get_ai_service()
+checks their mtimes at most every CHECK_SECONDS.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from .async_services import AsyncAIService
+from .cache import reset_trip_cache
+from .canonical import reset_destination_index
+from .catalog import get_catalog_path, reset_fallback_catalog
+from .health import reset_upstream_health
+from .http_client import reset_http_client
+from .scheduler import reset_upstream_scheduler
+from .services import AIService
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RELOAD_CONFIG = {
+    'TRIGGER_FILE': '',   # Touch this file to reload every worker ('' to only watch the catalog)
+    'CHECK_SECONDS': 10,  # How often get_ai_service() looks at the watched files' mtimes
+}
+
+
+def get_reload_config() -> Dict[str, Any]:
+    """Merge settings.AI_RELOAD over the defaults"""
+    config = dict(DEFAULT_RELOAD_CONFIG)
+    config.update(getattr(settings, 'AI_RELOAD', {}))
+    return config
+
+
+_services: Dict[str, AIService] = {}
+_services_lock = threading.Lock()
+
+
+def _get_service(key: str, factory: Callable[[], AIService]) -> AIService:
+    service = _services.get(key)
+    if service is None:
+        with _services_lock:
+            service = _services.get(key)
+            if service is None:
+                service = _services[key] = factory()
+    return service
+
+
+_watched_mtimes: Optional[Dict[str, float]] = None
+_next_check = 0.0
+_watch_lock = threading.Lock()
+
+
+def _watched_files() -> List[str]:
+    paths = [str(get_catalog_path())]
+    trigger_file = get_reload_config()['TRIGGER_FILE']
+    if trigger_file:
+        paths.append(str(trigger_file))
+    return paths
+
+
+def _mtimes() -> Dict[str, float]:
+    mtimes = {}
+    for path in _watched_files():
+        try:
+            mtimes[path] = os.stat(path).st_mtime
+        except OSError:
+            mtimes[path] = 0.0
+    return mtimes
+
+
+def check_for_reload() -> bool:
+    """Reload every AI singleton if a watched file changed since the last check (throttled)"""
+    global _watched_mtimes, _next_check
+    now = time.monotonic()
+    if now < _next_check:
+        return False
+    with _watch_lock:
+        if now < _next_check:
+            return False
+        _next_check = now + get_reload_config()['CHECK_SECONDS']
+        mtimes = _mtimes()
+        changed = _watched_mtimes is not None and mtimes != _watched_mtimes
+        _watched_mtimes = mtimes
+    if changed:
+        reload_ai_services()
+    return changed
+
+
+def touch_reload_trigger() -> Optional[str]:
+    """Bump the trigger file's mtime so every worker reloads on its next check"""
+    trigger_file = get_reload_config()['TRIGGER_FILE']
+    if not trigger_file:
+        return None
+    with open(trigger_file, 'a'):
+        pass
+    os.utime(trigger_file)
+    return str(trigger_file)
+
+
+def get_ai_service() -> AIService:
+    """Return the process-wide AIService, building it on first use"""
+    check_for_reload()
+    return _get_service('sync', AIService)
+
+
+def get_async_ai_service() -> AsyncAIService:
+    """Return the process-wide AsyncAIService, building it on first use"""
+    check_for_reload()
+    return _get_service('async', AsyncAIService)
+
+
+def reset_ai_services():
+    """Drop the service instances so the next call rebuilds them from settings"""
+    with _services_lock:
+        _services.clear()
+
+
+def _reload_performance_mode():
+    AIService.default_performance_mode = getattr(settings, 'AI_PERFORMANCE_MODE', 'hybrid')
+
+
+# Setting -> what must be rebuilt when it changes. Settings read on every call
+# (AI_PROMPTS, AI_REUSE, AI_RETRY, AI_PERSISTENCE, ...) need no entry.
+RELOADERS: Dict[str, List[Callable[[], None]]] = {
+    'OPENROUTER_API_KEY': [reset_ai_services],
+    'OPENROUTER_API_URL': [reset_ai_services],
+    'AI_PERFORMANCE_MODE': [_reload_performance_mode],
+    'AI_CACHE': [reset_trip_cache],
+    'AI_HTTP': [reset_http_client],
+    'AI_UPSTREAM_HEALTH': [reset_upstream_health],
+    'AI_SCHEDULER': [reset_upstream_scheduler],
+    'AI_FALLBACK_CATALOG': [reset_fallback_catalog, reset_destination_index],
+    'AI_DESTINATION_ALIASES': [reset_destination_index],
+}
+
+
+def reload_ai_services(setting: Optional[str] = None):
+    """Rebuild what depends on one setting, or on every AI setting when none is given"""
+    names = [setting] if setting else list(RELOADERS)
+    done = set()
+    for name in names:
+        for reload in RELOADERS.get(name, []):
+            if reload not in done:
+                reload()
+                done.add(reload)
+    if done:
+        logger.info("Reloaded AI services for %s", ', '.join(names))
+
+
+@receiver(setting_changed)
+def _on_setting_changed(sender, setting, **kwargs):
+    global _watched_mtimes, _next_check
+    if setting in RELOADERS:
+        reload_ai_services(setting)
+    if setting in ('AI_RELOAD', 'AI_FALLBACK_CATALOG'):
+        with _watch_lock:
+            # Watch the new paths, on the new schedule, from the next call on
+            _watched_mtimes = None
+            _next_check = 0.0
@@ -0,0 +1,188 @@
+"""
+Deadline-bounded retry policy for optional AI calls.
+
+Instead of running attempts back to back with a fixed sleep, DeadlineRetry
+gives the whole operation one time budget. A second (hedged) attempt starts
+if the first is slow, failed attempts are retried after a jittered backoff,
+and the caller gets None the moment the budget is spent so it can fall back
+to static content.
+"""
+
+import asyncio
+import contextvars
+import logging
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RETRY_CONFIG = {
+    'DEADLINE': 20,         # Seconds the caller is willing to wait in total
+    'ATTEMPT_TIMEOUT': 15,  # Upper bound for a single upstream attempt
+    'MAX_ATTEMPTS': 3,      # Attempts started in total, hedges included
+    'HEDGE_AFTER': 6,       # Start a parallel attempt if none has answered by then
+    'BACKOFF_BASE': 0.5,    # Full-jitter backoff after a failed attempt
+    'BACKOFF_MAX': 4,
+    'WORKERS': 16,          # Shared threads for sync attempts
+}
+
+
+def get_retry_config() -> Dict[str, Any]:
+    """Merge settings.AI_RETRY over the defaults"""
+    config = dict(DEFAULT_RETRY_CONFIG)
+    config.update(getattr(settings, 'AI_RETRY', {}))
+    return config
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor(workers: int) -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ai-retry')
+    return _executor
+
+
+class DeadlineRetry:
+    """
+    Run attempt(timeout) until one returns a truthy result or the deadline passes.
+    Attempts receive the seconds they may spend and should return None on failure.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None, **overrides):
+        config = dict(config or get_retry_config())
+        config.update(overrides)
+        self.deadline = config['DEADLINE']
+        self.attempt_timeout = config['ATTEMPT_TIMEOUT']
+        self.max_attempts = config['MAX_ATTEMPTS']
+        self.hedge_after = config['HEDGE_AFTER']
+        self.backoff_base = config['BACKOFF_BASE']
+        self.backoff_max = config['BACKOFF_MAX']
+        self.workers = config['WORKERS']
+
+    def _backoff(self, failures: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** failures)))
+
+    def _attempt_budget(self, deadline_at: float) -> float:
+        return max(0.1, min(self.attempt_timeout, deadline_at - time.monotonic()))
+
+    def _next_event(self, now: float, deadline_at: float, retry_at: Optional[float],
+                    last_start: float, started: int, running: int) -> float:
+        """Seconds until the deadline, a scheduled retry or a hedge is due"""
+        events = [deadline_at]
+        if started < self.max_attempts:
+            if retry_at is not None:
+                events.append(retry_at)
+            elif running:
+                events.append(last_start + self.hedge_after)
+        return max(0.0, min(events) - now)
+
+    def run(self, attempt: Callable[[float], Any], label: str = 'AI call') -> Any:
+        """Blocking variant; abandoned attempts finish on the shared pool"""
+        executor = _get_executor(self.workers)
+        deadline_at = time.monotonic() + self.deadline
+        pending = set()
+        started = failures = 0
+        retry_at = None
+        last_start = 0.0
+
+        while True:
+            now = time.monotonic()
+            if now >= deadline_at:
+                logger.warning("%s: %ss budget spent after %d attempt(s)", label, self.deadline, started)
+                return None
+
+            due = retry_at is not None and now >= retry_at
+            hedge = retry_at is None and pending and now - last_start >= self.hedge_after
+            if started < self.max_attempts and (not pending and retry_at is None or due or hedge):
+                started += 1
+                retry_at = None
+                last_start = now
+                if hedge:
+                    logger.debug("%s: hedging with attempt %d/%d", label, started, self.max_attempts)
+                # Attempts run with the caller's context (upstream priority class)
+                pending.add(executor.submit(contextvars.copy_context().run, attempt, self._attempt_budget(deadline_at)))
+                continue
+
+            if not pending and retry_at is None:
+                logger.warning("%s: all %d attempt(s) failed", label, started)
+                return None
+
+            timeout = self._next_event(now, deadline_at, retry_at, last_start, started, len(pending))
+            if not pending:
+                time.sleep(timeout)
+                continue
+
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.warning("%s: attempt raised %s", label, e)
+                    result = None
+                if result:
+                    return result
+                failures += 1
+                if started < self.max_attempts and not pending:
+                    retry_at = time.monotonic() + self._backoff(failures)
+
+    async def arun(self, attempt: Callable[[float], Awaitable[Any]], label: str = 'AI call') -> Any:
+        """Coroutine variant; attempts still running at the end are cancelled"""
+        loop = asyncio.get_running_loop()
+        deadline_at = time.monotonic() + self.deadline
+        pending = set()
+        started = failures = 0
+        retry_at = None
+        last_start = 0.0
+
+        try:
+            while True:
+                now = time.monotonic()
+                if now >= deadline_at:
+                    logger.warning("%s: %ss budget spent after %d attempt(s)", label, self.deadline, started)
+                    return None
+
+                due = retry_at is not None and now >= retry_at
+                hedge = retry_at is None and pending and now - last_start >= self.hedge_after
+                if started < self.max_attempts and (not pending and retry_at is None or due or hedge):
+                    started += 1
+                    retry_at = None
+                    last_start = now
+                    if hedge:
+                        logger.debug("%s: hedging with attempt %d/%d", label, started, self.max_attempts)
+                    pending.add(loop.create_task(attempt(self._attempt_budget(deadline_at))))
+                    continue
+
+                if not pending and retry_at is None:
+                    logger.warning("%s: all %d attempt(s) failed", label, started)
+                    return None
+
+                timeout = self._next_event(now, deadline_at, retry_at, last_start, started, len(pending))
+                if not pending:
+                    await asyncio.sleep(timeout)
+                    continue
+
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        logger.warning("%s: attempt raised %s", label, e)
+                        result = None
+                    if result:
+                        return result
+                    failures += 1
+                    if started < self.max_attempts and not pending:
+                        retry_at = time.monotonic() + self._backoff(failures)
+        finally:
+            for task in pending:
+                task.cancel()
@@ -0,0 +1,107 @@
+"""
+Reuse of previously generated trips.
+
+Saved trips keep the unpersonalized skeleton they were built from in
+TripSkeleton, one row per canonical destination, duration, budget and style,
+so the table acts as a durable second-level cache behind the trip cache. On a
+miss, AIService serves the stored skeleton instead of calling the LLM as long
+as it falls inside the MAX_AGE_DAYS freshness window, measured from when the
+content was first generated.
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from .canonical import canonicalize_destination
+
+DEFAULT_REUSE_CONFIG = {
+    'ENABLED': True,
+    'MAX_AGE_DAYS': 7,   # Content older than this is regenerated
+}
+
+
+def get_reuse_config() -> Dict[str, Any]:
+    """Merge settings.AI_REUSE over the defaults"""
+    config = dict(DEFAULT_REUSE_CONFIG)
+    config.update(getattr(settings, 'AI_REUSE', {}))
+    return config
+
+
+def _skeleton_content(skeleton) -> Dict[str, Any]:
+    wrapper = skeleton.get('itinerary') if isinstance(skeleton, dict) else None
+    content = wrapper.get('itinerary_content') if isinstance(wrapper, dict) else None
+    return content if isinstance(content, dict) else {}
+
+
+def skeleton_generated_at(skeleton) -> Optional[datetime]:
+    """When a skeleton's content was generated (stamped by AIService._set_cache), or None"""
+    stamp = _skeleton_content(skeleton).get('generated_at')
+    if isinstance(stamp, str):
+        try:
+            generated_at = datetime.fromisoformat(stamp)
+            if timezone.is_naive(generated_at):
+                generated_at = timezone.make_aware(generated_at)
+            return generated_at
+        except ValueError:
+            pass
+    return None
+
+
+def _is_usable(skeleton, duration_days: int) -> bool:
+    days = _skeleton_content(skeleton).get('daily_schedule')
+    if not isinstance(days, list) or len(days) != duration_days:
+        return False
+    if not all(isinstance(day, dict) and day.get('activities') for day in days):
+        return False
+    budget = skeleton.get('budget')
+    return isinstance(budget, dict) and bool(budget) and 'error' not in budget
+
+
+def find_reusable_skeleton(trip_data: Dict[str, Any]):
+    """Stored TripSkeleton that can stand in for this trip's skeleton, or None"""
+    from .models import TripSkeleton
+
+    config = get_reuse_config()
+    if not config['ENABLED']:
+        return None
+    destination_key = canonicalize_destination(trip_data.get('destination', ''))
+    if not destination_key:
+        return None
+
+    duration_days = trip_data.get('duration_days', 3)
+    stored = TripSkeleton.objects.filter(
+        destination_key=destination_key,
+        duration_days=duration_days,
+        budget=trip_data.get('budget', 'mid-range'),
+        travel_style=trip_data.get('travel_style', 'cultural'),
+        generated_at__gte=timezone.now() - timedelta(days=config['MAX_AGE_DAYS']),
+    ).first()
+    if stored is not None and _is_usable(stored.content, duration_days):
+        return stored
+    return None
+
+
+def store_skeleton(itinerary, skeleton: Dict[str, Any]) -> bool:
+    """
+    Keep a saved itinerary's skeleton as the stored one for its trip.
+    Skipped when an equally fresh skeleton is already stored, so trips served
+    from the cache or from reuse do not write their content again.
+    """
+    from .models import TripSkeleton
+
+    if not itinerary.destination_key or not _is_usable(skeleton, itinerary.duration_days):
+        return False
+    trip_key = {
+        'destination_key': itinerary.destination_key,
+        'duration_days': itinerary.duration_days,
+        'budget': itinerary.budget,
+        'travel_style': itinerary.travel_style,
+    }
+    generated_at = skeleton_generated_at(skeleton) or itinerary.created_at
+    if TripSkeleton.objects.filter(generated_at__gte=generated_at, **trip_key).exists():
+        return False
+    TripSkeleton.objects.update_or_create(defaults={'content': skeleton, 'generated_at': generated_at}, **trip_key)
+    return True
@@ -0,0 +1,307 @@
+"""
+Rate-limited, priority-aware scheduler for upstream AI calls.
+
+Every OpenRouter call made by AIService first takes a token from a token
+bucket (settings.AI_SCHEDULER RATE/BURST), so bursts queue briefly instead
+of triggering 429s. Waiters are served by priority class: authenticated
+users before anonymous ones before background work, and itinerary/budget
+calls before recommendations. Priority improves with time spent waiting so
+nothing starves. The bucket is per process by default. Set SHARED_BUCKET
+to a file path to share it between workers on one host through SQLite.
+"""
+
+import asyncio
+import contextvars
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCHEDULER_CONFIG = {
+    'ENABLED': True,
+    'RATE': 5.0,            # Upstream calls per second (sustained)
+    'BURST': 10,            # Calls allowed back to back after an idle period
+    'MAX_QUEUE_WAIT': 15,   # Seconds a call may wait before it gives up (caller falls back)
+    'AGING_SECONDS': 5,     # Waiting this long is worth one priority step
+    'SHARED_BUCKET': '',    # SQLite file shared by all processes on the host ('' = per process)
+}
+
+# Lower is served first
+PRIORITY_CLASSES = {'authenticated': 0, 'anonymous': 1, 'background': 2}
+REQUEST_TYPE_RANKS = {'itinerary': 0, 'combined': 0, 'budget': 0, 'recommendations': 1}
+
+_priority: contextvars.ContextVar = contextvars.ContextVar('ai_upstream_priority', default='anonymous')
+
+
+def get_scheduler_config() -> Dict[str, Any]:
+    """Merge settings.AI_SCHEDULER over the defaults"""
+    config = dict(DEFAULT_SCHEDULER_CONFIG)
+    config.update(getattr(settings, 'AI_SCHEDULER', {}))
+    return config
+
+
+@contextmanager
+def upstream_priority(priority: str):
+    """Run upstream calls made inside the block with the given priority class"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+def priority_for_user(user_id) -> str:
+    """Priority class of a live request (user_id is None for anonymous visitors)"""
+    return 'authenticated' if user_id else 'anonymous'
+
+
+def submit_with_context(executor, fn, *args, **kwargs):
+    """executor.submit that carries the caller's priority into the worker thread"""
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def iterate_with_priority(priority: str, iterable: Iterable) -> Iterator:
+    """
+    Iterate a generator with the given priority. Needed for streamed responses,
+    whose body runs after the view (and any upstream_priority block) returned.
+    """
+    context = contextvars.copy_context()
+    context.run(_priority.set, priority)
+    iterator = iter(iterable)
+    while True:
+        try:
+            item = context.run(next, iterator)
+        except StopIteration:
+            return
+        yield item
+
+
+class UpstreamQueueTimeout(Exception):
+    """Raised when a call waited MAX_QUEUE_WAIT without getting a token"""
+
+
+class SharedTokenBucket:
+    """Token bucket stored in a SQLite file so every worker process draws from it"""
+
+    def __init__(self, path: str, rate: float, burst: int):
+        self.path = path
+        self.rate = rate
+        self.burst = burst
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS bucket (id INTEGER PRIMARY KEY, tokens REAL, updated_at REAL)')
+            conn.execute('INSERT OR IGNORE INTO bucket VALUES (1, ?, ?)', (burst, time.time()))
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def take(self) -> float:
+        """Take one token; returns 0 on success or the seconds until one is available"""
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            tokens, updated_at = conn.execute('SELECT tokens, updated_at FROM bucket WHERE id = 1').fetchone()
+            now = time.time()
+            tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+            if not wait:
+                tokens -= 1
+            conn.execute('UPDATE bucket SET tokens = ?, updated_at = ? WHERE id = 1', (tokens, now))
+            conn.execute('COMMIT')
+            return wait
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+
+class _Waiter:
+    __slots__ = ('rank', 'enqueued_at', 'seq')
+
+    def __init__(self, rank: int, enqueued_at: float, seq: int):
+        self.rank = rank
+        self.enqueued_at = enqueued_at
+        self.seq = seq
+
+
+class UpstreamScheduler:
+    """Token bucket with a priority queue of waiting calls and queue-time metrics"""
+
+    HISTORY = 500  # Recent queue times kept per priority class
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = config or get_scheduler_config()
+        self.enabled = config['ENABLED']
+        self.rate = float(config['RATE'])
+        self.burst = max(1, int(config['BURST']))
+        self.max_queue_wait = config['MAX_QUEUE_WAIT']
+        self.aging_seconds = config['AGING_SECONDS']
+        self.shared = SharedTokenBucket(config['SHARED_BUCKET'], self.rate, self.burst) if config['SHARED_BUCKET'] else None
+
+        self._tokens = float(self.burst)
+        self._refilled_at = time.monotonic()
+        self._waiters: List[_Waiter] = []
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._granted = {name: 0 for name in PRIORITY_CLASSES}
+        self._timeouts = {name: 0 for name in PRIORITY_CLASSES}
+        self._queue_times = {name: deque(maxlen=self.HISTORY) for name in PRIORITY_CLASSES}
+
+    def _score(self, waiter: _Waiter, now: float) -> float:
+        return waiter.rank - (now - waiter.enqueued_at) / self.aging_seconds
+
+    def _next_waiter(self, now: float) -> _Waiter:
+        return min(self._waiters, key=lambda waiter: (self._score(waiter, now), waiter.seq))
+
+    def _take_token(self, now: float) -> float:
+        """0 if a token was taken, else seconds until the next one"""
+        if self.shared is not None:
+            return self.shared.take()
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    def _enqueue(self, request_type: str, priority: str) -> _Waiter:
+        """Add a waiter for this call (caller holds self._cond)"""
+        now = time.monotonic()
+        self._seq += 1
+        waiter = _Waiter(PRIORITY_CLASSES[priority] * 2 + REQUEST_TYPE_RANKS.get(request_type, 0), now, self._seq)
+        self._waiters.append(waiter)
+        return waiter
+
+    def _poll(self, waiter: _Waiter, request_type: str, priority: str) -> Tuple[Optional[float], float]:
+        """
+        One scheduling step (caller holds self._cond): (seconds queued, 0) once the
+        waiter got a token, else (None, seconds to wait before polling again).
+        Raises UpstreamQueueTimeout after MAX_QUEUE_WAIT.
+        """
+        now = time.monotonic()
+        wait = None
+        if self._next_waiter(now) is waiter:
+            wait = self._take_token(now)
+            if not wait:
+                queued = now - waiter.enqueued_at
+                self._granted[priority] += 1
+                self._queue_times[priority].append(queued)
+                if queued >= 1:
+                    logger.debug("%s %s call queued %.2fs for an upstream slot", priority, request_type, queued,
+                                 extra={'priority': priority, 'request_type': request_type, 'queue_time': round(queued, 3)})
+                return queued, 0.0
+        deadline = waiter.enqueued_at + self.max_queue_wait
+        if now >= deadline:
+            self._timeouts[priority] += 1
+            raise UpstreamQueueTimeout(
+                f"Waited {self.max_queue_wait}s for an upstream slot ({priority} {request_type})"
+            )
+        return None, min(deadline - now, wait if wait else 1 / self.rate)
+
+    def _dequeue(self, waiter: _Waiter):
+        with self._cond:
+            self._waiters.remove(waiter)
+            self._cond.notify_all()
+
+    @staticmethod
+    def _priority_class(priority: Optional[str]) -> str:
+        priority = priority or current_priority()
+        return priority if priority in PRIORITY_CLASSES else 'anonymous'
+
+    def acquire(self, request_type: str = 'itinerary', priority: Optional[str] = None) -> float:
+        """
+        Block until this call may go upstream; returns the seconds spent queued.
+        Raises UpstreamQueueTimeout after MAX_QUEUE_WAIT.
+        """
+        if not self.enabled:
+            return 0.0
+        priority = self._priority_class(priority)
+        with self._cond:
+            waiter = self._enqueue(request_type, priority)
+            try:
+                while True:
+                    queued, wait = self._poll(waiter, request_type, priority)
+                    if queued is not None:
+                        return queued
+                    self._cond.wait(wait)
+            finally:
+                self._waiters.remove(waiter)
+                self._cond.notify_all()
+
+    async def aacquire(self, request_type: str = 'itinerary', priority: Optional[str] = None) -> float:
+        """
+        acquire() for coroutines: waits with asyncio.sleep, so queued async calls
+        hold no thread. Shares the priority queue with blocking callers.
+        """
+        if not self.enabled:
+            return 0.0
+        priority = self._priority_class(priority)
+        with self._cond:
+            waiter = self._enqueue(request_type, priority)
+        try:
+            while True:
+                with self._cond:
+                    queued, wait = self._poll(waiter, request_type, priority)
+                if queued is not None:
+                    return queued
+                await asyncio.sleep(wait)
+        finally:
+            self._dequeue(waiter)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Queue depth and queue-time statistics per priority class"""
+        with self._cond:
+            classes = {}
+            for name, history in self._queue_times.items():
+                ordered = sorted(history)
+                classes[name] = {
+                    'granted': self._granted[name],
+                    'timeouts': self._timeouts[name],
+                    'avg_wait': round(sum(ordered) / len(ordered), 3) if ordered else 0.0,
+                    'p95_wait': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3) if ordered else 0.0,
+                    'max_wait': round(ordered[-1], 3) if ordered else 0.0,
+                }
+            return {
+                'enabled': self.enabled,
+                'rate': self.rate,
+                'burst': self.burst,
+                'shared': bool(self.shared),
+                'queued': len(self._waiters),
+                'classes': classes,
+            }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_upstream_scheduler() -> UpstreamScheduler:
+    """Return the process-wide scheduler, creating it on first use"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = UpstreamScheduler()
+    return _scheduler
+
+
+def reset_upstream_scheduler():
+    """Drop the scheduler so the next call re-reads settings"""
+    global _scheduler
+    with _scheduler_lock:
+        _scheduler = None
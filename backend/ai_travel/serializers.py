@@ -1,8 +1,18 @@
 from rest_framework import serializers
+from django.urls import reverse
 from .models import AIItinerary, BudgetEstimate, AIGenerationLog
+from .storage import CompressedJSONField
 from datetime import datetime
 
-class AIItineraryCreateSerializer(serializers.ModelSerializer):
+
+class ItineraryModelSerializer(serializers.ModelSerializer):
+    """ModelSerializer that reads and writes the compressed content columns as plain JSON"""
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        CompressedJSONField: serializers.JSONField,
+    }
+
+class AIItineraryCreateSerializer(ItineraryModelSerializer):
     """Serializer for creating AI itineraries"""
     
     class Meta:
@@ -35,7 +45,7 @@ class BudgetEstimateSerializer(serializers.ModelSerializer):
         model = BudgetEstimate
         fields = '__all__'
 
-class AIItinerarySerializer(serializers.ModelSerializer):
+class AIItinerarySerializer(ItineraryModelSerializer):
     """Serializer for retrieving AI itineraries"""
     detailed_budget = BudgetEstimateSerializer(read_only=True)
     is_anonymous = serializers.ReadOnlyField()
@@ -45,7 +55,7 @@ class AIItinerarySerializer(serializers.ModelSerializer):
         model = AIItinerary
         fields = '__all__'
 
-class AIItineraryListSerializer(serializers.ModelSerializer):
+class AIItineraryListSerializer(ItineraryModelSerializer):
     """Simplified serializer for listing itineraries"""
     is_anonymous = serializers.ReadOnlyField()
     total_travelers = serializers.ReadOnlyField()
@@ -59,6 +69,34 @@ class AIItineraryListSerializer(serializers.ModelSerializer):
             'is_anonymous', 'total_travelers'
         ]
 
+class AIItinerarySummarySerializer(serializers.ModelSerializer):
+    """History list entry without the JSON content; fetch the full itinerary from detail_url"""
+    is_anonymous = serializers.SerializerMethodField()
+    total_travelers = serializers.ReadOnlyField()
+    detail_url = serializers.SerializerMethodField()
+    
+    # Columns the summary needs, for .only() on list querysets
+    QUERY_FIELDS = [
+        'id', 'user', 'destination', 'start_date', 'end_date', 'duration_days', 'adults', 'children',
+        'budget', 'budget_amount', 'currency', 'travel_style', 'interests', 'created_at', 'generation_time'
+    ]
+    
+    class Meta:
+        model = AIItinerary
+        fields = [
+            'id', 'destination', 'start_date', 'end_date', 'duration_days',
+            'adults', 'children', 'budget', 'budget_amount', 'currency', 'travel_style',
+            'interests', 'created_at', 'generation_time', 'is_anonymous', 'total_travelers', 'detail_url'
+        ]
+    
+    def get_is_anonymous(self, obj):
+        return obj.user_id is None  # Avoids loading the user row per itinerary
+    
+    def get_detail_url(self, obj):
+        url = reverse('get_ai_itinerary', args=[obj.id])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
 class AIGenerationLogSerializer(serializers.ModelSerializer):
     """Serializer for AI generation logs"""
     
@@ -97,6 +135,15 @@ class ItineraryRequestSerializer(serializers.Serializer):
     accommodation_preference = serializers.CharField(required=False, allow_blank=True)
     transportation_preference = serializers.CharField(required=False, allow_blank=True)
     session_id = serializers.CharField(required=False, allow_blank=True)
+    stream = serializers.BooleanField(required=False, default=False)  # Server-sent events, one day at a time
+    background = serializers.BooleanField(required=False, default=False)  # Queue the job and return 202
+    callback_url = serializers.URLField(required=False, allow_blank=True)
+    
+    def validate_callback_url(self, value):
+        from .jobs import callback_allowed
+        if value and not callback_allowed(value):
+            raise serializers.ValidationError("Callback host is not allowed")
+        return value
     
     def validate(self, data):
         """Validate the request data"""
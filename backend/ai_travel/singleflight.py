@@ -0,0 +1,69 @@
+"""
+Request coalescing for identical concurrent AI generations.
+
+The first caller for a key runs the work; callers arriving while it is in
+flight block on the same result instead of starting their own upstream calls.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.finished = False
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Process-wide single-flight group keyed by an arbitrary string"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+
+    def do(self, key: str, fn: Callable[[], Any], timeout: Optional[float] = None) -> Tuple[Any, bool]:
+        """
+        Run fn once per key among concurrent callers.
+        Returns: (result, shared) where shared is True for callers that waited
+        on another caller's in-flight work. Followers that wait longer than
+        timeout, or whose leader died without a result or an error (e.g. a
+        BaseException), run fn themselves rather than failing the request.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+            else:
+                call.waiters += 1
+                leader = False
+
+        if not leader:
+            if call.done.wait(timeout):
+                if call.error is not None:
+                    raise call.error
+                if call.finished:
+                    return call.result, True
+            return fn(), False
+
+        try:
+            call.result = fn()
+            call.finished = True
+            return call.result, False
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def in_flight(self) -> Dict[str, int]:
+        """Snapshot of in-flight keys and how many callers are waiting on each"""
+        with self._lock:
+            return {key: call.waiters for key, call in self._calls.items()}
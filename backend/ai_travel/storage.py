@@ -0,0 +1,182 @@
+"""
+Compact storage for the itinerary JSON columns.
+
+AIItinerary keeps generated content in three columns, and the normalized
+itinerary repeats the other two inside itself: the recommendations word
+for word and, usually, the budget breakdown too. CompressedJSONField stores
+a column as bytes: compact JSON, compressed with zlib (or zstd when
+COMPRESSION is 'zstd' and the zstandard package is installed) once it is
+larger than MIN_SIZE. With shared_sections, a section equal to a sibling
+column is saved as a {'$ref': column} marker, so each section is stored
+once. AIItinerary.from_db resolves the markers, so model instances,
+serializers and the admin only ever see plain dicts and lists.
+"""
+
+import copy
+import json
+import zlib
+from typing import Any, Dict, Optional
+
+from django import forms
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+DEFAULT_STORAGE_CONFIG = {
+    'COMPRESSION': 'zlib',  # 'zlib', 'zstd' (needs the zstandard package) or 'none'
+    'LEVEL': 6,
+    'MIN_SIZE': 256,        # Smaller payloads are stored uncompressed
+}
+
+# First byte of every stored value says how the rest is encoded
+RAW, ZLIB, ZSTD = b'j', b'z', b's'
+REF_KEY = '$ref'
+
+
+def get_storage_config() -> Dict[str, Any]:
+    """Merge settings.AI_STORAGE over the defaults"""
+    config = dict(DEFAULT_STORAGE_CONFIG)
+    config.update(getattr(settings, 'AI_STORAGE', {}))
+    return config
+
+
+def encode_json(value: Any) -> bytes:
+    config = get_storage_config()
+    data = json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    compression = config['COMPRESSION']
+    if len(data) < config['MIN_SIZE'] or compression in (None, 'none'):
+        return RAW + data
+    if compression == 'zstd' and zstandard is not None:
+        return ZSTD + zstandard.ZstdCompressor(level=config['LEVEL']).compress(data)
+    return ZLIB + zlib.compress(data, config['LEVEL'])
+
+
+def decode_json(raw) -> Any:
+    raw = bytes(raw)  # memoryview on PostgreSQL
+    tag, body = raw[:1], raw[1:]
+    if tag == ZLIB:
+        body = zlib.decompress(body)
+    elif tag == ZSTD:
+        if zstandard is None:
+            raise ImproperlyConfigured('Stored itinerary data is zstd-compressed; install the zstandard package')
+        body = zstandard.ZstdDecompressor().decompress(body)
+    elif tag != RAW:
+        raise ValueError(f'Unknown stored JSON encoding {tag!r}')
+    return json.loads(body)
+
+
+def pack_sections(value: Any, shared_sections: Dict[str, str], columns: Dict[str, Any]) -> Any:
+    """Copy of value with every section equal to its sibling column replaced by a reference"""
+    if not isinstance(value, dict):
+        return value
+    packed = None
+    for key, column in shared_sections.items():
+        section = value.get(key)
+        if section and column in columns and section == columns[column]:
+            if packed is None:
+                packed = dict(value)
+            packed[key] = {REF_KEY: column}
+    return value if packed is None else packed
+
+
+def unpack_sections(value: Any, shared_sections: Dict[str, str], columns: Dict[str, Any]) -> Any:
+    """Replace section references in value (in place) with copies of the sibling columns"""
+    if isinstance(value, dict):
+        for key, column in shared_sections.items():
+            if value.get(key) == {REF_KEY: column}:
+                value[key] = copy.deepcopy(columns[column])
+    return value
+
+
+def resolve_shared_sections(instance: models.Model):
+    """Resolve references in a freshly loaded instance (a deferred sibling column is fetched)"""
+    deferred = instance.get_deferred_fields()
+    for field in instance._meta.concrete_fields:
+        shared_sections = getattr(field, 'shared_sections', None)
+        if not shared_sections or field.attname in deferred:
+            continue
+        value = getattr(instance, field.attname)
+        if not isinstance(value, dict):
+            continue
+        if any(value.get(key) == {REF_KEY: column} for key, column in shared_sections.items()):
+            columns = {column: getattr(instance, column) for column in set(shared_sections.values())}
+            unpack_sections(value, shared_sections, columns)
+
+
+def with_shared_columns(instance: models.Model, update_fields: Optional[list]) -> Optional[list]:
+    """
+    update_fields plus the columns that may reference the ones being saved, so a
+    reference is never left pointing at a changed sibling
+    """
+    if update_fields is None:
+        return None
+    update_fields = list(update_fields)
+    deferred = instance.get_deferred_fields()
+    for field in instance._meta.concrete_fields:
+        shared_sections = getattr(field, 'shared_sections', None)
+        if (shared_sections and field.name not in update_fields
+                and set(shared_sections.values()) & set(update_fields)):
+            if field.attname in deferred:
+                # Load it resolved against the stored siblings, before they are overwritten
+                columns = sorted(set(shared_sections.values()))
+                row = (type(instance)._base_manager.using(instance._state.db)
+                       .filter(pk=instance.pk).values_list(field.attname, *columns).get())
+                setattr(instance, field.attname, unpack_sections(row[0], shared_sections, dict(zip(columns, row[1:]))))
+            update_fields.append(field.name)
+    return update_fields
+
+
+class CompressedJSONField(models.BinaryField):
+    """JSON value stored as (optionally compressed) bytes, with sections shared with sibling columns"""
+
+    description = 'JSON stored as compressed bytes'
+
+    def __init__(self, *args, shared_sections: Optional[Dict[str, str]] = None, **kwargs):
+        self.shared_sections = dict(shared_sections or {})
+        kwargs.setdefault('editable', True)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        # BinaryField drops editable=False, which this field does not default to
+        kwargs['editable'] = self.editable
+        if self.shared_sections:
+            kwargs['shared_sections'] = self.shared_sections
+        return name, path, args, kwargs
+
+    def from_db_value(self, value, expression, connection):
+        return None if value is None else decode_json(value)
+
+    def to_python(self, value):
+        if isinstance(value, (bytes, memoryview)):
+            return decode_json(value)
+        if isinstance(value, str):
+            return json.loads(value)  # Fixtures (see value_to_string)
+        return value
+
+    def get_prep_value(self, value):
+        if value is None or isinstance(value, (bytes, memoryview)):
+            return value
+        return encode_json(value)
+
+    def pre_save(self, model_instance, add):
+        value = super().pre_save(model_instance, add)
+        if self.shared_sections and isinstance(value, dict):
+            deferred = model_instance.get_deferred_fields()
+            columns = {
+                column: getattr(model_instance, column)
+                for column in set(self.shared_sections.values()) if column not in deferred
+            }
+            value = pack_sections(value, self.shared_sections, columns)
+        return value
+
+    def value_to_string(self, obj):
+        return json.dumps(self.value_from_object(obj))
+
+    def formfield(self, **kwargs):
+        return super().formfield(**{'form_class': forms.JSONField, **kwargs})
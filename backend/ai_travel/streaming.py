@@ -0,0 +1,116 @@
+"""
+Helpers for streaming itinerary generation.
+
+OpenRouter streams the itinerary JSON as text deltas. DailyScheduleScanner
+watches that text and hands back each ``daily_schedule`` entry as soon as its
+closing brace arrives, so the client can render day 1 while later days are
+still being written.
+"""
+
+import json
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+class DailyScheduleScanner:
+    """Incrementally extracts complete day objects from a streamed itinerary"""
+
+    def __init__(self, array_key: str = 'daily_schedule'):
+        self.array_key = array_key
+        self.buffer = ''
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._pending_key: Optional[str] = None
+        self._array_depth: Optional[int] = None
+        self._item_start: Optional[int] = None
+        self.days_emitted = 0
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """Add streamed text, returning any day objects completed by it"""
+        self.buffer += text
+        completed = []
+        buffer = self.buffer
+        for index in range(self._pos, len(buffer)):
+            char = buffer[index]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._last_string = buffer[self._string_start + 1:index]
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = index
+            elif char == ':':
+                self._pending_key = self._last_string
+            elif char in '{[':
+                # The schedule array is the value of a key on the top-level object
+                if (char == '[' and self._array_depth is None and self._stack == ['{']
+                        and self._pending_key == self.array_key):
+                    self._array_depth = len(self._stack) + 1
+                elif char == '{' and self._array_depth is not None and len(self._stack) == self._array_depth:
+                    self._item_start = index
+                self._stack.append(char)
+                self._pending_key = None
+            elif char in '}]':
+                if self._stack:
+                    self._stack.pop()
+                if (char == '}' and self._item_start is not None
+                        and len(self._stack) == self._array_depth):
+                    day = self._parse(buffer[self._item_start:index + 1])
+                    if day is not None:
+                        completed.append(day)
+                        self.days_emitted += 1
+                    self._item_start = None
+                elif char == ']' and self._array_depth is not None and len(self._stack) < self._array_depth:
+                    self._array_depth = -1  # Schedule finished; ignore any later arrays
+            elif char == ',':
+                self._pending_key = None
+        self._pos = len(buffer)
+        return completed
+
+    @staticmethod
+    def _parse(fragment: str) -> Optional[Dict[str, Any]]:
+        try:
+            day = json.loads(fragment)
+        except json.JSONDecodeError:
+            return None
+        return day if isinstance(day, dict) else None
+
+
+def iter_sse_deltas(lines: Iterator[str], on_usage: Optional[Callable[[Dict[str, Any]], Any]] = None) -> Iterator[str]:
+    """
+    Yield content deltas from an OpenAI-compatible server-sent event stream.
+    on_usage receives the ``usage`` block if the stream reports one.
+    """
+    for line in lines:
+        if not line or not line.startswith('data:'):
+            continue
+        data = line[len('data:'):].strip()
+        if data == '[DONE]':
+            return
+        try:
+            chunk = json.loads(data)
+        except json.JSONDecodeError:
+            continue
+        if on_usage is not None and chunk.get('usage'):
+            on_usage(chunk['usage'])
+        choices = chunk.get('choices') or []
+        if not choices:
+            continue
+        delta = choices[0].get('delta') or {}
+        content = delta.get('content')
+        if content:
+            yield content
+
+
+def format_sse(event: str, data: Any, encoder=None) -> str:
+    """Serialize one server-sent event frame"""
+    return f"event: {event}\ndata: {json.dumps(data, cls=encoder)}\n\n"
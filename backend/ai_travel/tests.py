@@ -1,3 +1,718 @@
-from django.test import TestCase
+import asyncio
+import copy
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction
+from django.core.cache import caches
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from .cache import DjangoTripCache, MemoryTripCache, get_cache_config
+from .canonical import DestinationIndex, get_destination_index, reset_destination_index
+from travel_backend.log import RequestLogMiddleware
+
+from .async_services import AsyncAIService
+from .catalog import FallbackCatalog, get_catalog_path
+from .health import CircuitOpenError, UpstreamHealth, get_health_config
+from .jobs import claim_next_job, enqueue_generation, requeue_stale_jobs, run_job
+from .models import AIGenerationJob, AIGenerationLog, AIItinerary, TripSkeleton
+from .normalizer import normalize_day, normalize_itinerary
+from .persistence import save_generated_itinerary
+from .registry import check_for_reload, get_ai_service
+from .reuse import find_reusable_skeleton
+from .scheduler import UpstreamQueueTimeout, UpstreamScheduler, get_scheduler_config
+from .services import AIService
+from .singleflight import SingleFlight
+from .storage import REF_KEY
+
+
+class DestinationIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = DestinationIndex({'roma': 'rome'})
+        self.index.add_city('Paris', 'France', 'FR')
+        self.index.add_city('Rome', 'Italy', 'IT')
+        self.index.add_city('Portland', 'United States', 'US')
+        self.index.add_city('Cambridge', 'United Kingdom', 'GB')
+        self.index.add_city('Marrakesh', 'Morocco', 'MA')
+
+    def test_spellings_of_a_known_city_share_a_key(self):
+        for destination in ['Paris', 'paris, france', 'Paris (FR)', 'París', 'PARIS - France', 'paris france']:
+            self.assertEqual(self.index.canonicalize(destination), 'paris', destination)
+        self.assertEqual(self.index.canonicalize('Roma, Italy'), 'rome')
+
+    def test_paris_texas_is_not_paris(self):
+        self.assertEqual(self.index.canonicalize('Paris, Texas'), 'paris texas')
+        self.assertEqual(self.index.display_name('Paris, Texas'), 'Paris, Texas')
+        self.assertEqual(self.index.display_name('paris, france'), 'Paris')
+
+    def test_portland_states_keep_separate_keys(self):
+        maine = self.index.canonicalize('Portland, Maine')
+        oregon = self.index.canonicalize('Portland, Oregon')
+        self.assertEqual(maine, 'portland maine')
+        self.assertEqual(oregon, 'portland oregon')
+        self.assertEqual(self.index.canonicalize('Portland, United States'), 'portland')
+
+    def test_region_qualifiers_are_kept(self):
+        self.assertEqual(self.index.canonicalize('Sydney, Nova Scotia'), 'sydney nova scotia')
+
+    def test_iso_code_only_strips_for_a_city_in_that_country(self):
+        # MA is Morocco's code, but Cambridge is only known in the United Kingdom
+        self.assertEqual(self.index.canonicalize('Cambridge, MA'), 'cambridge ma')
+        self.assertEqual(self.index.canonicalize('Cambridge (GB)'), 'cambridge')
+
+    def test_unknown_city_with_a_known_country_name(self):
+        self.assertEqual(self.index.canonicalize('Aix-en-Provence, France'), 'aix en provence')
+
+    def test_typos_are_fuzzy_matched(self):
+        self.assertEqual(self.index.canonicalize('Pariss'), 'paris')
+        self.assertEqual(self.index.canonicalize('Cambrdge'), 'cambridge')
+
+
+class DestinationIndexCachingTests(TestCase):
+    def setUp(self):
+        reset_destination_index()
+        self.addCleanup(reset_destination_index)
+
+    def test_partial_index_is_not_cached(self):
+        partial = DestinationIndex()
+        partial.failed_sources = ['destinations.City']
+        with mock.patch('ai_travel.canonical.build_destination_index', return_value=partial) as build:
+            self.assertIs(get_destination_index(), partial)
+            self.assertIs(get_destination_index(), partial)
+        self.assertEqual(build.call_count, 2)
+
+        complete = get_destination_index()
+        self.assertEqual(complete.failed_sources, [])
+        with mock.patch('ai_travel.canonical.build_destination_index', return_value=partial):
+            reset_destination_index()
+            self.assertIs(get_destination_index(), partial)
+        self.assertIsNot(get_destination_index(), partial)
+
+    def test_async_trip_builds_the_index_off_the_event_loop(self):
+        service = AsyncAIService()
+        trip_data = {'destination': 'paris, france', 'duration_days': 3, 'adults': 1, 'children': 0}
+        acoalesce = mock.AsyncMock(return_value=skeleton_trip())
+        with mock.patch.object(AsyncAIService, '_acoalesce', acoalesce), \
+                mock.patch.object(AsyncAIService, '_get_stored_result', return_value=None), \
+                mock.patch('ai_travel.services.record_ai_call'), \
+                self.assertNoLogs('ai_travel.canonical', 'WARNING'):
+            asyncio.run(service.agenerate_complete_trip(trip_data))
+        self.assertEqual(acoalesce.call_args.args[0], 'skeleton:paris_3d_mid-range_cultural')
+        self.assertEqual(get_destination_index().failed_sources, [])
+
+
+class FallbackCatalogTests(TestCase):
+    def setUp(self):
+        reset_destination_index()
+        self.addCleanup(reset_destination_index)
+
+    def test_benchmark_destinations_are_curated(self):
+        catalog = FallbackCatalog(get_catalog_path())
+        for destination in ['Tokyo', 'Paris', 'London', 'Dubai', 'New York', 'Rome', 'Lisbon', 'Bangkok', 'Sydney', 'Istanbul']:
+            entry = catalog.lookup(destination)
+            self.assertIsNotNone(entry, destination)
+            self.assertTrue(entry['activities'], destination)
+
+    def test_lookup_spellings(self):
+        catalog = FallbackCatalog(get_catalog_path())
+        self.assertEqual(catalog.lookup('Rome, Italy')['name'], 'Rome')
+        self.assertEqual(catalog.lookup('Lisboa')['name'], 'Lisbon')
+        self.assertEqual(catalog.lookup('Bangkok (TH)')['name'], 'Bangkok')
+        self.assertEqual(catalog.lookup('東京')['name'], 'Tokyo')
+        self.assertIsNone(catalog.lookup('Paris, Texas'))
+        self.assertIsNone(catalog.lookup('Sydney, Nova Scotia'))
+
+    def test_hyphenated_names_are_not_split(self):
+        data = {'version': 1, 'destinations': {
+            'baden': {'name': 'Baden', 'country': 'Switzerland', 'aliases': []},
+            'baden-baden': {'name': 'Baden-Baden', 'country': 'Germany', 'aliases': []},
+        }}
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as fh:
+            json.dump(data, fh)
+            fh.flush()
+            with override_settings(AI_FALLBACK_CATALOG=fh.name):
+                reset_destination_index()
+                catalog = FallbackCatalog(fh.name)
+                self.assertEqual(catalog.lookup('Baden-Baden')['name'], 'Baden-Baden')
+                self.assertEqual(catalog.lookup('Baden-Baden, Germany')['name'], 'Baden-Baden')
+                self.assertEqual(catalog.lookup('Baden')['name'], 'Baden')
+                self.assertIsNone(catalog.lookup('Aix-en-Provence'))
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'ai-cache-tests'},
+})
+class AsyncCoalesceTests(SimpleTestCase):
+    def test_follower_takes_over_when_the_leader_is_cancelled(self):
+        calls = []
+
+        async def generate(trip_data, cache_key):
+            calls.append(cache_key)
+            if len(calls) == 1:
+                await asyncio.sleep(5)
+            return {'days': []}, {'total': 1}
+
+        async def run():
+            service = AsyncAIService()
+            leader = asyncio.ensure_future(service._acoalesce('trip', {}))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(service._acoalesce('trip', {}))
+            await asyncio.sleep(0)
+            leader.cancel()
+            return await follower
+
+        with mock.patch.object(AsyncAIService, '_agenerate_and_cache', side_effect=generate):
+            result = asyncio.run(run())
+        self.assertEqual(result, ({'days': []}, {'total': 1}))
+        self.assertEqual(calls, ['trip', 'trip'])
+
+
+class SingleFlightTests(SimpleTestCase):
+    def test_follower_runs_fn_when_leader_dies_without_a_result(self):
+        class Abort(BaseException):
+            pass
+
+        group = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+
+        def leader_fn():
+            started.set()
+            release.wait(5)
+            raise Abort()
+
+        def lead():
+            try:
+                group.do('paris', leader_fn)
+            except Abort:
+                pass
+
+        leader = threading.Thread(target=lead)
+        leader.start()
+        started.wait(5)
+        results = []
+        follower = threading.Thread(target=lambda: results.append(group.do('paris', lambda: 'fresh', timeout=5)))
+        follower.start()
+        while group.in_flight().get('paris') != 1:
+            time.sleep(0.01)
+        release.set()
+        leader.join()
+        follower.join()
+        self.assertEqual(results, [('fresh', False)])
+
+
+class TripCacheTests(SimpleTestCase):
+    def test_memory_ttl_zero_is_not_the_default(self):
+        cache = MemoryTripCache(get_cache_config())
+        cache.set('kept', {'a': 1})
+        cache.set('expired', {'a': 1}, ttl=0)
+        self.assertEqual(cache.get('kept'), {'a': 1})
+        self.assertIsNone(cache.get('expired'))
+
+    def test_django_clear_only_drops_trip_entries(self):
+        shared = caches['default']
+        shared.clear()
+        shared.set('session:abc', 'still here')
+        cache = DjangoTripCache(get_cache_config())
+        cache.set('paris|3', {'a': 1})
+        self.assertEqual(cache.get('paris|3'), {'a': 1})
+
+        cache.clear()
+        self.assertIsNone(cache.get('paris|3'))
+        self.assertEqual(shared.get('session:abc'), 'still here')
+
+        cache.set('paris|3', {'a': 2})
+        cache.clear()
+        self.assertIsNone(cache.get('paris|3'))
+        self.assertEqual(shared.get('session:abc'), 'still here')
+
+    def test_set_cache_stamps_a_copy(self):
+        service = AIService()
+        self.addCleanup(service.cache.delete, 'skeleton:paris_3d_mid-range_cultural')
+        trip = skeleton_trip()
+        cached = service._set_cache('skeleton:paris_3d_mid-range_cultural', trip)
+        self.assertNotIn('generated_at', trip[0]['itinerary_content'])
+        self.assertIn('generated_at', cached[0]['itinerary_content'])
+        self.assertEqual(list(service.cache.get('skeleton:paris_3d_mid-range_cultural')), list(cached))
+
+
+class UpstreamSchedulerTests(SimpleTestCase):
+    def make_scheduler(self, **overrides):
+        config = get_scheduler_config()
+        config.update({'ENABLED': True, 'RATE': 20.0, 'BURST': 1, 'MAX_QUEUE_WAIT': 5, 'SHARED_BUCKET': ''})
+        config.update(overrides)
+        return UpstreamScheduler(config)
+
+    def test_async_waiters_are_paced_without_threads(self):
+        scheduler = self.make_scheduler()
+        threads_before = threading.active_count()
+
+        async def run():
+            acquired = [scheduler.aacquire('itinerary', 'anonymous') for _ in range(5)]
+            tasks = [asyncio.ensure_future(call) for call in acquired]
+            await asyncio.sleep(0.05)
+            self.assertEqual(threading.active_count(), threads_before)
+            return await asyncio.gather(*tasks)
+
+        start = time.monotonic()
+        queued = asyncio.run(run())
+        # One burst token, then one every 50ms
+        self.assertGreaterEqual(time.monotonic() - start, 0.18)
+        self.assertEqual(len(queued), 5)
+        self.assertEqual(scheduler.snapshot()['queued'], 0)
+        self.assertEqual(scheduler.snapshot()['classes']['anonymous']['granted'], 5)
+
+    def test_async_waiter_times_out(self):
+        scheduler = self.make_scheduler(RATE=0.1, MAX_QUEUE_WAIT=0.1)
+        scheduler.acquire('itinerary', 'anonymous')
+        with self.assertRaises(UpstreamQueueTimeout):
+            asyncio.run(scheduler.aacquire('itinerary', 'anonymous'))
+        self.assertEqual(scheduler.snapshot()['queued'], 0)
+        self.assertEqual(scheduler.snapshot()['classes']['anonymous']['timeouts'], 1)
+
+    def test_async_and_blocking_waiters_share_the_queue(self):
+        scheduler = self.make_scheduler(RATE=10.0)
+        scheduler.acquire('itinerary', 'background')
+        results = []
+        worker = threading.Thread(target=lambda: results.append(scheduler.acquire('itinerary', 'background')))
+        worker.start()
+        queued = asyncio.run(scheduler.aacquire('itinerary', 'authenticated'))
+        worker.join()
+        # The authenticated call is served first even though both waited
+        self.assertLess(queued, results[0])
+
+
+class UpstreamHealthTests(SimpleTestCase):
+    def setUp(self):
+        self.now = 1000.0
+        clock = mock.patch('ai_travel.health.time.monotonic', side_effect=lambda: self.now)
+        clock.start()
+        self.addCleanup(clock.stop)
+        self.health = UpstreamHealth(dict(get_health_config(), ENABLED=True, MIN_CALLS=2, COOLDOWN_SECONDS=30,
+                                          PROBE_TIMEOUT_SECONDS=60))
+
+    def trip_breaker(self):
+        for _ in range(2):
+            self.health.record(False, 1.0)
+        self.assertEqual(self.health.state, UpstreamHealth.OPEN)
+        self.now += 31
+
+    def test_one_probe_at_a_time_while_half_open(self):
+        self.trip_breaker()
+        self.assertTrue(self.health.before_call())
+        self.assertTrue(self.health.is_degraded())
+        with self.assertRaises(CircuitOpenError):
+            self.health.before_call()
+
+        self.health.record(True, 1.0, probe=True)
+        self.assertEqual(self.health.state, UpstreamHealth.CLOSED)
+        self.assertFalse(self.health.is_degraded())
+        self.assertFalse(self.health.before_call())
+
+    def test_failed_probe_reopens_with_longer_cooldown(self):
+        self.trip_breaker()
+        probe = self.health.before_call()
+        self.health.record(False, 1.0, probe=probe)
+        self.assertEqual(self.health.state, UpstreamHealth.OPEN)
+        self.now += 31
+        self.assertTrue(self.health.is_degraded())  # Cooldown doubled to 60s
+        self.now += 30
+        self.assertTrue(self.health.before_call())
+
+    def test_unreported_probe_expires(self):
+        self.trip_breaker()
+        self.health.before_call()  # Caller vanishes without calling record()
+        self.now += 59
+        self.assertTrue(self.health.is_degraded())
+        self.now += 2
+        self.assertFalse(self.health.is_degraded())
+        self.assertTrue(self.health.before_call())
+
+    def test_cancelled_async_probe_is_released(self):
+        self.trip_breaker()
+        client = mock.Mock()
+        client.send = mock.AsyncMock(side_effect=asyncio.CancelledError)
+        scheduler = mock.Mock(aacquire=mock.AsyncMock(return_value=0.0))
+        with mock.patch('ai_travel.async_services.get_async_http_client', return_value=client), \
+                mock.patch('ai_travel.async_services.get_upstream_scheduler', return_value=scheduler), \
+                mock.patch('ai_travel.async_services.get_upstream_health', return_value=self.health), \
+                mock.patch('ai_travel.services.get_upstream_health', return_value=self.health), \
+                mock.patch('ai_travel.services.record_ai_call'):
+            with self.assertRaises(asyncio.CancelledError):
+                asyncio.run(AsyncAIService()._apost_chat({'messages': []}))
+
+        # The cancelled probe counts as a failure instead of pinning the circuit half-open
+        self.assertEqual(len(self.health._probes_in_flight), 0)
+        self.assertEqual(self.health.state, UpstreamHealth.OPEN)
+
+
+def skeleton_trip(days: int = 3):
+    """(itinerary, budget) skeleton for one adult, shaped like the generators' output"""
+    itinerary = {'itinerary_content': {
+        'total_estimated_cost': 100 * days,
+        'daily_schedule': [
+            {'day': day, 'title': f'Day {day}', 'daily_cost_estimate': 100,
+             'activities': [{'activity': 'Museum', 'estimated_cost': 33}]}
+            for day in range(1, days + 1)
+        ],
+        'budget_breakdown': {'accommodation_per_night': 90, 'meals_per_day': 45, 'shopping_souvenirs': 80},
+    }}
+    budget = {
+        'accommodation': {'budget_min': 90 * days, 'budget_max': 240 * days},
+        'transportation': {'airport_transfers': 60, 'local_daily': 15, 'total_transport': 60 + 15 * days},
+        'food': {'budget_daily': 45, 'luxury_daily': 140},
+        'activities': {'daily_activity_budget': 60},
+        'shopping': {'souvenirs': 80},
+        'miscellaneous': {'emergency_fund': 150},
+        'total_estimates': {'budget_total': 220 * days, 'mid_range_total': 380 * days, 'luxury_total': 800 * days},
+        'daily_breakdown': {'budget_per_day': 220, 'luxury_per_day': 800},
+    }
+    return itinerary, budget
+
+
+class PersonalizeTripTests(SimpleTestCase):
+    def setUp(self):
+        self.service = AIService()
+        self.itinerary, self.budget = skeleton_trip()
+        self.trip_data = {'duration_days': 3, 'adults': 4, 'children': 0}
+
+    def test_rooms_and_per_person_lines_scale_separately(self):
+        _, budget = self.service._personalize_trip(self.itinerary, self.budget, self.trip_data)
+        # Four adults share two rooms
+        self.assertEqual(budget['accommodation'], {'budget_min': 540, 'budget_max': 1440})
+        self.assertEqual(budget['food']['budget_daily'], 180)
+        self.assertEqual(budget['transportation']['total_transport'], 420)
+        self.assertEqual(budget['shopping'], {'souvenirs': 80})
+        self.assertEqual(budget['miscellaneous'], {'emergency_fund': 150})
+        # budget: (105 transport + 180 activities + 135 food) x 3 more travelers + 270 for the second room
+        self.assertEqual(budget['total_estimates']['budget_total'], 660 + 3 * 420 + 270)
+        self.assertEqual(budget['total_estimates']['luxury_total'], 2400 + 3 * 705 + 720)
+        self.assertEqual(budget['daily_breakdown']['budget_per_day'], 220 + (3 * 420 + 270) // 3)
+
+    def test_itinerary_breakdown_only_scales_party_lines(self):
+        itinerary, _ = self.service._personalize_trip(self.itinerary, self.budget, self.trip_data)
+        self.assertEqual(itinerary['itinerary_content']['budget_breakdown'], {
+            'accommodation_per_night': 180, 'meals_per_day': 180, 'shopping_souvenirs': 80,
+        })
+        self.assertEqual(itinerary['itinerary_content']['daily_schedule'][0]['activities'][0]['estimated_cost'], 132)
+
+    def test_skeleton_travels_unscaled_with_the_result(self):
+        original = copy.deepcopy((self.itinerary, self.budget))
+        itinerary, _ = self.service._personalize_trip(self.itinerary, self.budget, self.trip_data)
+        self.assertEqual((self.itinerary, self.budget), original)
+        self.assertEqual(itinerary['skeleton'], {'itinerary': original[0], 'budget': original[1]})
+
+        # Re-personalizing the carried skeleton gives the same trip every time
+        again, budget_again = self.service._personalize_trip(
+            itinerary['skeleton']['itinerary'], itinerary['skeleton']['budget'], self.trip_data
+        )
+        self.assertEqual(again['itinerary_content'], itinerary['itinerary_content'])
+        self.assertEqual(budget_again, self.service._personalize_trip(self.itinerary, self.budget, self.trip_data)[1])
+
+
+class StoredSkeletonReuseTests(TestCase):
+    def setUp(self):
+        reset_destination_index()
+        self.addCleanup(reset_destination_index)
+
+    def test_reuse_serves_the_stored_skeleton(self):
+        skeleton = skeleton_trip()
+        trip_data = {
+            'destination': 'Paris', 'start_date': date(2026, 11, 1), 'end_date': date(2026, 11, 4),
+            'duration_days': 3, 'adults': 4, 'children': 0, 'budget': 'mid-range',
+            'travel_style': 'cultural', 'interests': ['museums'],
+        }
+        itinerary, budget = AIService()._personalize_trip(*skeleton, trip_data)
+        payload, response_status = save_generated_itinerary(trip_data, None, itinerary, budget, 1.0, defer=False)
+        self.assertEqual(response_status, 201, payload)
+        self.assertNotIn('skeleton', payload['itinerary'])
+
+        stored = find_reusable_skeleton(dict(trip_data, destination='paris, france', adults=1))
+        self.assertIsNotNone(stored)
+        self.assertEqual(stored.content, {'itinerary': skeleton[0], 'budget': skeleton[1]})
+
+    def test_skeleton_is_stored_once_per_trip(self):
+        service = AIService()
+        itinerary, budget = skeleton_trip()
+        itinerary['itinerary_content']['generated_at'] = timezone.now().isoformat()
+        trip_data = {
+            'destination': 'Paris', 'start_date': date(2026, 11, 1), 'end_date': date(2026, 11, 4),
+            'duration_days': 3, 'adults': 1, 'children': 0, 'budget': 'mid-range',
+            'travel_style': 'cultural', 'interests': ['museums'],
+        }
+        for adults in (1, 2, 4):
+            personalized = service._personalize_trip(itinerary, budget, dict(trip_data, adults=adults))
+            save_generated_itinerary(dict(trip_data, adults=adults), None, *personalized, 1.0, defer=False)
+        self.assertEqual(AIItinerary.objects.count(), 3)
+        self.assertEqual(TripSkeleton.objects.count(), 1)
+        first_write = TripSkeleton.objects.get().updated_at
+
+        # A newer generation of the same trip replaces the stored one
+        newer = copy.deepcopy(itinerary)
+        newer['itinerary_content']['generated_at'] = (timezone.now() + timedelta(minutes=1)).isoformat()
+        personalized = service._personalize_trip(newer, budget, trip_data)
+        save_generated_itinerary(trip_data, None, *personalized, 1.0, defer=False)
+        stored = TripSkeleton.objects.get()
+        self.assertGreater(stored.updated_at, first_write)
+        self.assertEqual(stored.content['itinerary'], newer)
+
+    def test_rekey_command_applies_the_full_canonicalizer(self):
+        trip_data = {
+            'destination': 'Paris, France', 'start_date': date(2026, 11, 1), 'end_date': date(2026, 11, 4),
+            'duration_days': 3, 'adults': 1, 'children': 0, 'budget': 'mid-range',
+            'travel_style': 'cultural', 'interests': ['museums'],
+        }
+        itinerary, budget = AIService()._personalize_trip(*skeleton_trip(), trip_data)
+        payload, response_status = save_generated_itinerary(trip_data, None, itinerary, budget, 1.0, defer=False)
+        self.assertEqual(response_status, 201, payload)
+        # What the 0007 backfill leaves behind for legacy rows
+        AIItinerary.objects.update(destination_key='paris france')
+
+        call_command('rekey_ai_destinations', stdout=tempfile.TemporaryFile('w+'))
+        self.assertEqual(list(AIItinerary.objects.values_list('destination_key', flat=True)), ['paris'])
+
+
+@override_settings(AI_JOBS={'MAX_ATTEMPTS': 2, 'LEASE_SECONDS': 600})
+class GenerationJobTests(TestCase):
+    def enqueue(self, destination):
+        job = enqueue_generation({'destination': destination, 'duration_days': 3, 'background': True})
+        # Distinct creation times so the queue order is well defined
+        AIGenerationJob.objects.filter(pk=job.pk).update(
+            created_at=timezone.now() - timedelta(minutes=10 - AIGenerationJob.objects.count())
+        )
+        return job
+
+    def test_claims_oldest_queued_job_once(self):
+        first, second = self.enqueue('Paris'), self.enqueue('Rome')
+        claimed = claim_next_job('worker-a')
+        self.assertEqual(claimed.pk, first.pk)
+        self.assertEqual((claimed.status, claimed.worker_id, claimed.attempts), ('running', 'worker-a', 1))
+        self.assertIsNotNone(claimed.started_at)
+        self.assertNotIn('background', claimed.request_data)
+
+        self.assertEqual(claim_next_job('worker-b').pk, second.pk)
+        self.assertIsNone(claim_next_job('worker-c'))
+
+    def test_stale_running_jobs_are_requeued_or_failed(self):
+        retry, exhausted, fresh = self.enqueue('Paris'), self.enqueue('Rome'), self.enqueue('Tokyo')
+        for job in (retry, exhausted, fresh):
+            claim_next_job('worker-a')
+        long_ago = timezone.now() - timedelta(seconds=601)
+        AIGenerationJob.objects.filter(pk__in=[retry.pk, exhausted.pk]).update(started_at=long_ago)
+        AIGenerationJob.objects.filter(pk=exhausted.pk).update(attempts=2)
+
+        self.assertEqual(requeue_stale_jobs(), 1)
+        retry.refresh_from_db()
+        exhausted.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual((retry.status, retry.worker_id), ('queued', ''))
+        self.assertEqual(exhausted.status, 'failed')
+        self.assertIsNotNone(exhausted.finished_at)
+        self.assertEqual(fresh.status, 'running')
+
+        # The requeued job is claimed again, as its second attempt
+        self.assertEqual(claim_next_job('worker-b').attempts, 2)
+
+    def test_failed_run_is_retried_until_max_attempts(self):
+        job = self.enqueue('Paris')
+        service = mock.Mock()
+        service.generate_complete_trip.side_effect = RuntimeError('upstream down')
+        body = {'destination': 'Paris', 'duration_days': 3, 'start_date': '2026-11-01', 'end_date': '2026-11-04'}
+        AIGenerationJob.objects.filter(pk=job.pk).update(request_data=body)
+
+        with mock.patch('ai_travel.registry.get_ai_service', return_value=service):
+            job = run_job(claim_next_job('worker-a'))
+            self.assertEqual((job.status, job.attempts), ('queued', 1))
+            job = run_job(claim_next_job('worker-a'))
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+        self.assertIn('upstream down', job.error_message)
+        self.assertIsNone(claim_next_job('worker-a'))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ItineraryHistoryPaginationTests(TestCase):
+    url = '/api/ai-travel/session/history-session/'
+
+    def create(self, destination, created_at):
+        itinerary = AIItinerary.objects.create(
+            session_id='history-session', destination=destination, start_date=date(2026, 11, 1),
+            end_date=date(2026, 11, 4), duration_days=3, interests='museums',
+            itinerary_content={'daily_schedule': []}, budget_breakdown={},
+        )
+        AIItinerary.objects.filter(pk=itinerary.pk).update(created_at=created_at)
+        return itinerary
+
+    def walk(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.content)
+            body = response.json()
+            self.assertLessEqual(body['count'], 2)
+            ids.extend(entry['id'] for entry in body['itineraries'])
+            url = body['pagination']['next']
+        return ids
+
+    def test_pages_are_newest_first_and_stable(self):
+        base = timezone.now() - timedelta(days=1)
+        # Two rows share a timestamp, so the id tie-breaker decides their order
+        for index, offset in enumerate([0, 1, 1, 2, 3]):
+            self.create(f'City {index}', base + timedelta(hours=offset))
+        expected = [str(pk) for pk in AIItinerary.objects.order_by('-created_at', '-id').values_list('id', flat=True)]
+
+        first = self.client.get(self.url, {'page_size': 2}).json()
+        self.assertEqual([entry['id'] for entry in first['itineraries']], expected[:2])
+        self.assertIsNone(first['pagination']['previous'])
+
+        # A trip generated mid-walk does not shift or repeat the remaining pages
+        self.create('Newest', timezone.now())
+        self.assertEqual(expected[:2] + self.walk(first['pagination']['next']), expected)
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'Invalid cursor')
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class RegenerateBudgetTests(TestCase):
+    def test_regeneration_is_logged_once_by_the_service(self):
+        itinerary = AIItinerary.objects.create(
+            destination='Paris', start_date=date(2026, 11, 1), end_date=date(2026, 11, 4), duration_days=3,
+            interests='museums', itinerary_content={'daily_schedule': []}, budget_breakdown={},
+        )
+        service = mock.Mock()
+        service.generate_budget_estimate.return_value = (skeleton_trip()[1], 0.5)
+        with mock.patch('ai_travel.views.get_ai_service', return_value=service):
+            response = self.client.post('/api/ai-travel/budget/regenerate/', {'itinerary_id': str(itinerary.id)},
+                                        content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertFalse(AIGenerationLog.objects.exists())
+
+
+class NormalizerTests(SimpleTestCase):
+    def test_day_fields_follow_the_schema(self):
+        day = normalize_day({'title': 'Old town', 'activities': [{'activity': 'Market', 'why_special': 'Oldest',
+                                                                  'tips': 'Go early'}]})
+        self.assertEqual(list(day), ['date', 'theme', 'activities', 'dining_recommendations',
+                                     'daily_cost_estimate', 'weather_note'])
+        self.assertEqual(day['theme'], 'Old town')
+        self.assertEqual(day['activities'][0]['cultural_context'], 'Oldest')
+        self.assertEqual(day['activities'][0]['photo_opportunity'], 'Go early')
+        self.assertEqual(day['activities'][0]['type'], 'activity')
+        self.assertEqual(normalize_day({'theme': 'A', 'title': 'B'})['theme'], 'A')
+
+    def test_defaults_are_not_shared_between_results(self):
+        first, second = normalize_day({'activities': [{}]}), normalize_day({'activities': [{}]})
+        first['dining_recommendations'].append('x')
+        first['activities'][0]['matched_interests'].append('x')
+        self.assertEqual(second['dining_recommendations'], [])
+        self.assertEqual(second['activities'][0]['matched_interests'], [])
+
+    def test_malformed_payload_is_logged_and_emptied(self):
+        with self.assertLogs('ai_travel.normalizer', 'ERROR'):
+            itinerary = normalize_itinerary({'itinerary_content': {'daily_schedule': None}}, {})
+        self.assertEqual(itinerary['daily_schedule'], [])
+
+
+class ReloadTriggerTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.trigger_file = os.path.join(directory.name, 'ai_reload.trigger')
+        settings_override = override_settings(AI_RELOAD={'TRIGGER_FILE': self.trigger_file, 'CHECK_SECONDS': 0})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_touching_the_trigger_rebuilds_services(self):
+        self.assertFalse(check_for_reload())  # First check only records the mtimes
+        service = get_ai_service()
+        self.assertIs(get_ai_service(), service)
+
+        call_command('reload_ai_services', stdout=tempfile.TemporaryFile('w+'))
+        stamp = os.stat(self.trigger_file).st_mtime + 5
+        os.utime(self.trigger_file, (stamp, stamp))  # Filesystems with coarse mtimes
+        self.assertTrue(check_for_reload())
+        self.assertIsNot(get_ai_service(), service)
+        self.assertFalse(check_for_reload())
+
+    @override_settings(AI_RELOAD={'TRIGGER_FILE': '', 'CHECK_SECONDS': 3600})
+    def test_checks_are_throttled(self):
+        check_for_reload()
+        with mock.patch('ai_travel.registry._mtimes') as mtimes:
+            self.assertFalse(check_for_reload())
+        mtimes.assert_not_called()
+
+
+class CompressedJSONFieldTests(TestCase):
+    def setUp(self):
+        self.recommendations = {'restaurants': ['Chez Marie'], 'tips': ['Carry cash'] * 40}
+        self.budget = {'food': {'budget_daily': 45}, 'total_estimates': {'budget_total': 660}}
+        self.itinerary = self.create()
+
+    def create(self):
+        return AIItinerary.objects.create(
+            destination='Paris', start_date=date(2026, 11, 1), end_date=date(2026, 11, 4), duration_days=3,
+            interests='museums', recommendations=self.recommendations, budget_breakdown=self.budget,
+            itinerary_content={'overview': 'Three days', 'daily_schedule': [],
+                               'recommendations': self.recommendations, 'budget_breakdown': self.budget},
+        )
+
+    def stored_content(self, itinerary=None):
+        # values_list() decodes the column but skips from_db, so references stay unresolved
+        pk = (itinerary or self.itinerary).pk
+        return AIItinerary.objects.filter(pk=pk).values_list('itinerary_content', flat=True).get()
+
+    def test_shared_sections_are_stored_once(self):
+        stored = self.stored_content()
+        self.assertEqual(stored['recommendations'], {REF_KEY: 'recommendations'})
+        self.assertEqual(stored['budget_breakdown'], {REF_KEY: 'budget_breakdown'})
+
+        loaded = AIItinerary.objects.get(pk=self.itinerary.pk)
+        self.assertEqual(loaded.itinerary_content['recommendations'], self.recommendations)
+        self.assertEqual(loaded.itinerary_content['budget_breakdown'], self.budget)
+        self.assertEqual(loaded.budget_breakdown, self.budget)
+
+    def test_references_resolve_when_the_sibling_is_deferred(self):
+        loaded = AIItinerary.objects.defer('budget_breakdown').get(pk=self.itinerary.pk)
+        self.assertEqual(loaded.itinerary_content['budget_breakdown'], self.budget)
+
+    def test_update_fields_keeps_the_itinerary_copy(self):
+        new_budget = {'food': {'budget_daily': 90}}
+        for deferred in ((), ('itinerary_content',)):
+            with self.subTest(deferred=deferred):
+                itinerary = AIItinerary.objects.defer(*deferred).get(pk=self.create().pk)
+                itinerary.budget_breakdown = new_budget
+                itinerary.save(update_fields=['budget_breakdown'])
+
+                reloaded = AIItinerary.objects.get(pk=itinerary.pk)
+                self.assertEqual(reloaded.budget_breakdown, new_budget)
+                self.assertEqual(reloaded.itinerary_content['budget_breakdown'], self.budget)
+                stored = self.stored_content(itinerary)
+                self.assertEqual(stored['budget_breakdown'], self.budget)
+                self.assertEqual(stored['recommendations'], {REF_KEY: 'recommendations'})
+
+
+class RequestLogMiddlewareTests(SimpleTestCase):
+    def test_async_chain_stays_async(self):
+        async def view(request):
+            return HttpResponse('ok')
+
+        middleware = RequestLogMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        request = RequestFactory().get('/api/ai-travel/generate/async/', HTTP_X_REQUEST_ID='abc123')
+        response = asyncio.run(middleware(request))
+        self.assertEqual(response['X-Request-ID'], 'abc123')
+
+    def test_sync_chain(self):
+        middleware = RequestLogMiddleware(lambda request: HttpResponse('ok'))
+        self.assertFalse(iscoroutinefunction(middleware))
+        self.assertEqual(len(middleware(RequestFactory().get('/'))['X-Request-ID']), 16)
@@ -4,6 +4,8 @@ from . import views
 urlpatterns = [
     # AI Itinerary Generation
     path('generate/', views.generate_ai_itinerary, name='generate_ai_itinerary'),
+    path('generate/async/', views.generate_ai_itinerary_async, name='generate_ai_itinerary_async'),  # ASGI only
+    path('jobs/<uuid:job_id>/', views.get_generation_job, name='get_generation_job'),
     path('itinerary/<uuid:itinerary_id>/', views.get_ai_itinerary, name='get_ai_itinerary'),
     path('itinerary/<uuid:itinerary_id>/delete/', views.delete_ai_itinerary, name='delete_ai_itinerary'),
     
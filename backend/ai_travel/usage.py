@@ -0,0 +1,168 @@
+"""
+Per-call usage and latency accounting for AIService.
+
+Every upstream call (and every trip-level cache lookup) produces one
+AIGenerationLog row carrying the OpenRouter ``usage`` block, latency,
+time-to-first-byte, retry number and cache hit flag. Rows are buffered in
+memory and written with bulk_create by a background flusher, so request
+threads never wait on an INSERT.
+"""
+
+import atexit
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USAGE_CONFIG = {
+    'ENABLED': True,
+    'BATCH_SIZE': 50,        # Flush as soon as this many rows are waiting
+    'FLUSH_INTERVAL': 5,     # ...or at least this often (seconds)
+    'MAX_BUFFER': 5000,      # Oldest rows are dropped beyond this if the DB is unreachable
+    'PROMPT_CHARS': 4000,    # Stored prefix of the prompt sent
+    'RESPONSE_CHARS': 1000,  # Stored prefix of the response received
+}
+
+
+def get_usage_config() -> Dict[str, Any]:
+    """Merge settings.AI_USAGE over the defaults"""
+    config = dict(DEFAULT_USAGE_CONFIG)
+    config.update(getattr(settings, 'AI_USAGE', {}))
+    return config
+
+
+class UsageRecorder:
+    """Buffers AIGenerationLog rows and writes them in batches"""
+
+    def __init__(self, config: Dict[str, Any]):
+        self.batch_size = config['BATCH_SIZE']
+        self.flush_interval = config['FLUSH_INTERVAL']
+        self.max_buffer = config['MAX_BUFFER']
+        self._buffer: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.written = 0
+        self.dropped = 0
+
+    def record(self, entry: Dict[str, Any]):
+        with self._lock:
+            self._buffer.append(entry)
+            if len(self._buffer) > self.max_buffer:
+                overflow = len(self._buffer) - self.max_buffer
+                del self._buffer[:overflow]
+                self.dropped += overflow
+            full = len(self._buffer) >= self.batch_size
+        self._ensure_flusher()
+        if full:
+            self._wakeup.set()
+
+    def _ensure_flusher(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='ai-usage-flusher', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+    def flush(self) -> int:
+        """Write everything buffered so far; returns the number of rows written"""
+        from .models import AIGenerationLog
+
+        with self._lock:
+            entries, self._buffer = self._buffer, []
+        if not entries:
+            return 0
+        try:
+            AIGenerationLog.objects.bulk_create(
+                [AIGenerationLog(**entry) for entry in entries],
+                batch_size=self.batch_size
+            )
+        except Exception as e:
+            logger.warning("Could not write %d AI usage rows: %s", len(entries), e)
+            with self._lock:
+                # Keep them for the next flush; the oldest rows go first if the buffer is full
+                self._buffer[:0] = entries
+                overflow = len(self._buffer) - self.max_buffer
+                if overflow > 0:
+                    del self._buffer[:overflow]
+                    self.dropped += overflow
+            return 0
+        self.written += len(entries)
+        return len(entries)
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._buffer)
+
+
+_recorder = None
+_recorder_lock = threading.Lock()
+
+
+def get_usage_recorder() -> UsageRecorder:
+    """Return the process-wide recorder, creating it on first use"""
+    global _recorder
+    if _recorder is None:
+        with _recorder_lock:
+            if _recorder is None:
+                _recorder = UsageRecorder(get_usage_config())
+                atexit.register(_flush_at_exit)
+    return _recorder
+
+
+def _flush_at_exit():
+    if _recorder is not None:
+        try:
+            _recorder.flush()
+        except Exception:
+            pass
+
+
+def record_ai_call(request_type: str, *, destination: str = '', performance_mode: str = '',
+                   model_name: str = '', prompt: str = '', response_text: str = '',
+                   usage: Optional[Dict[str, Any]] = None, latency: float = 0.0,
+                   ttfb: Optional[float] = None, retries: int = 0, cache_hit: bool = False,
+                   cache_key: str = '', status_code: Optional[int] = None,
+                   success: bool = True, error: str = '', itinerary_id=None,
+                   queue_time: Optional[float] = None, priority: str = ''):
+    """Queue one AIGenerationLog row (no-op when settings.AI_USAGE['ENABLED'] is off)"""
+    config = get_usage_config()
+    if not config['ENABLED']:
+        return
+    usage = usage or {}
+    get_usage_recorder().record({
+        'itinerary_id': itinerary_id,
+        'request_type': request_type,
+        'destination': (destination or '')[:200],
+        'performance_mode': performance_mode or '',
+        'model_name': (model_name or '')[:100],
+        'cache_key': (cache_key or '')[:255],
+        'prompt_sent': (prompt or '')[:config['PROMPT_CHARS']],
+        'response_received': (response_text or '')[:config['RESPONSE_CHARS']],
+        'prompt_tokens': usage.get('prompt_tokens'),
+        'completion_tokens': usage.get('completion_tokens'),
+        'tokens_used': usage.get('total_tokens'),
+        'response_time': round(latency, 4),
+        'time_to_first_byte': round(ttfb, 4) if ttfb is not None else None,
+        'queue_time': round(queue_time, 4) if queue_time is not None else None,
+        'priority': priority or '',
+        'retries': retries,
+        'cache_hit': cache_hit,
+        'status_code': status_code,
+        'success': success,
+        'error_message': error or '',
+    })
@@ -0,0 +1,204 @@
+"""
+Cache warming for the most requested trips.
+
+warm_cache() ranks destination x duration x budget x style combinations from
+AIItinerary history (weighted by how slow they were to generate, from
+AIGenerationLog) and generates the missing skeletons ahead of time, within a
+concurrency limit and an estimated token budget. Call it from the
+warm_ai_cache command, cron or any scheduler during off-peak hours.
+"""
+
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, time as dtime, timedelta
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Avg, Count
+from django.utils import timezone
+
+from .canonical import canonical_display_name, canonicalize_destination
+from .models import AIGenerationLog, AIItinerary
+from .registry import get_ai_service
+from .scheduler import upstream_priority
+from .services import AIService
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WARMING_CONFIG = {
+    'TOP_N': 50,               # Combinations considered per run
+    'LOOKBACK_DAYS': 30,       # History window used for ranking
+    'CONCURRENCY': 2,          # Generations running at once
+    'TOKEN_BUDGET': 200000,    # Estimated upstream tokens a single run may spend
+    'TTL': 24 * 3600,          # Warmed entries must outlive the gap until peak hours
+    'OFF_PEAK': '01:00-06:00', # Local time window for --loop runs, '' for always
+}
+
+
+def get_warming_config() -> Dict[str, Any]:
+    """Merge settings.AI_CACHE_WARMING over the defaults"""
+    config = dict(DEFAULT_WARMING_CONFIG)
+    config.update(getattr(settings, 'AI_CACHE_WARMING', {}))
+    return config
+
+
+def in_off_peak_window(window: str, now: Optional[datetime] = None) -> bool:
+    """True if now falls inside "HH:MM-HH:MM" (the window may wrap midnight)"""
+    if not window:
+        return True
+    start_text, end_text = window.split('-')
+    start = dtime.fromisoformat(start_text.strip())
+    end = dtime.fromisoformat(end_text.strip())
+    current = (now or timezone.localtime()).time()
+    if start <= end:
+        return start <= current < end
+    return current >= start or current < end
+
+
+def popular_trip_combinations(top_n: int, lookback_days: int) -> List[Dict[str, Any]]:
+    """Most valuable combinations to precompute, best first"""
+    since = timezone.now() - timedelta(days=lookback_days)
+    fields = ('destination', 'duration_days', 'budget', 'travel_style')
+
+    latency = {
+        (row['itinerary__destination'], row['itinerary__duration_days'],
+         row['itinerary__budget'], row['itinerary__travel_style']): row['avg_time']
+        for row in AIGenerationLog.objects
+        .filter(timestamp__gte=since, request_type='itinerary', success=True, itinerary__isnull=False)
+        .values(*('itinerary__' + field for field in fields))
+        .annotate(avg_time=Avg('response_time'))
+    }
+
+    combos: Dict[tuple, Dict[str, Any]] = {}
+    rows = (
+        AIItinerary.objects
+        .filter(created_at__gte=since)
+        .values(*fields)
+        .annotate(requests=Count('id'))
+    )
+    for row in rows:
+        key = (canonicalize_destination(row['destination']), row['duration_days'], row['budget'], row['travel_style'])
+        combo = combos.setdefault(key, {
+            'destination': canonical_display_name(row['destination']),
+            'duration_days': row['duration_days'],
+            'budget': row['budget'],
+            'travel_style': row['travel_style'],
+            'requests': 0,
+            'avg_generation_time': 0.0,
+        })
+        avg_time = latency.get(tuple(row[field] for field in fields)) or 1.0
+        # Request-weighted mean latency across spellings of the same city
+        total = combo['requests'] + row['requests']
+        combo['avg_generation_time'] = (
+            combo['avg_generation_time'] * combo['requests'] + avg_time * row['requests']
+        ) / total
+        combo['requests'] = total
+
+    ranked = sorted(combos.values(), key=lambda c: c['requests'] * c['avg_generation_time'], reverse=True)
+    return ranked[:top_n]
+
+
+def estimate_generation_tokens(service: AIService, trip_data: Dict[str, Any]) -> int:
+    """Upper bound on upstream tokens one skeleton generation can use"""
+    if service.performance_mode == 'fast':
+        return 0
+    if service.performance_mode == 'combined':
+        payloads = [service._build_combined_payload(trip_data)]
+    else:
+        payloads = [
+            service._build_itinerary_payload(trip_data),
+            service._build_budget_payload(trip_data),
+            service._build_recommendations_payload(trip_data),  # Only if the itinerary falls back
+        ]
+    return sum(
+        len(json.dumps(payload['messages'])) // 4 + payload.get('max_tokens', 0)
+        for payload in payloads
+    )
+
+
+def _representative_trip(combo: Dict[str, Any]) -> Dict[str, Any]:
+    start_date = timezone.localdate() + timedelta(days=30)
+    return {
+        'destination': combo['destination'],
+        'duration_days': combo['duration_days'],
+        'budget': combo['budget'],
+        'travel_style': combo['travel_style'],
+        'start_date': start_date,
+        'end_date': start_date + timedelta(days=combo['duration_days']),
+        'adults': 1,
+        'children': 0,
+        'interests': [],
+    }
+
+
+def warm_cache(top_n: Optional[int] = None, concurrency: Optional[int] = None,
+               token_budget: Optional[int] = None, ttl: Optional[int] = None,
+               lookback_days: Optional[int] = None, dry_run: bool = False) -> Dict[str, Any]:
+    """
+    Generate missing skeletons for the most popular trips.
+    Returns a summary dict suitable for logging.
+    """
+    config = get_warming_config()
+    top_n = top_n or config['TOP_N']
+    concurrency = max(1, concurrency or config['CONCURRENCY'])
+    token_budget = config['TOKEN_BUDGET'] if token_budget is None else token_budget
+    ttl = ttl or config['TTL']
+    lookback_days = lookback_days or config['LOOKBACK_DAYS']
+
+    service = get_ai_service()
+    summary = {
+        'considered': 0, 'already_cached': 0, 'warmed': 0, 'failed': 0,
+        'skipped_for_budget': 0, 'estimated_tokens': 0, 'token_budget': token_budget,
+        'planned': [],
+    }
+    if service.performance_mode != service.configured_mode:
+        # Warming now would only cache degraded fallbacks
+        logger.warning("OpenRouter circuit is open, skipping cache warming")
+        return summary
+
+    jobs = []
+    for combo in popular_trip_combinations(top_n, lookback_days):
+        summary['considered'] += 1
+        trip_data = service._skeleton_trip_data(_representative_trip(combo))
+        cache_key = service._get_cache_key(trip_data)
+        if service.cache.get(cache_key) is not None:
+            summary['already_cached'] += 1
+            continue
+
+        tokens = estimate_generation_tokens(service, trip_data)
+        if summary['estimated_tokens'] + tokens > token_budget:
+            summary['skipped_for_budget'] += 1
+            continue
+        summary['estimated_tokens'] += tokens
+        summary['planned'].append(cache_key)
+        jobs.append((cache_key, trip_data))
+
+    if dry_run or not jobs:
+        return summary
+
+    def _warm(cache_key, trip_data):
+        try:
+            # Shares the in-flight slot with live requests for the same trip,
+            # but queues behind them for upstream rate-limit slots
+            with upstream_priority('background'):
+                service._inflight.do(
+                    cache_key,
+                    lambda: service._generate_and_cache(trip_data, cache_key, ttl=ttl),
+                    timeout=service._inflight_wait_timeout
+                )
+        finally:
+            close_old_connections()
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='ai-warm') as executor:
+        futures = {executor.submit(_warm, key, data): key for key, data in jobs}
+        for future in as_completed(futures):
+            try:
+                future.result()
+                summary['warmed'] += 1
+            except Exception as e:
+                logger.warning("Cache warming failed for %s: %s", futures[future], e)
+                summary['failed'] += 1
+
+    return summary
@@ -7,6 +7,9 @@ from .models import FreeTrip
 from .serializers import FreeTripSerializer
 import uuid
 import json
+import logging
+
+logger = logging.getLogger(__name__)
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -16,9 +19,7 @@ def create_free_trip(request):
     Create a new free trip (no authentication required)
     """
     try:
-        print(f"FREE TRIP DEBUG: Received request method: {request.method}")
-        print(f"FREE TRIP DEBUG: Request headers: {dict(request.headers)}")
-        print(f"FREE TRIP DEBUG: Received data: {request.data}")
+        logger.debug("Create free trip", extra={'destination': request.data.get('destination')})
         
         data = request.data.copy()
         
@@ -51,7 +52,7 @@ def create_free_trip(request):
         if serializer.is_valid():
             free_trip = serializer.save()
             
-            print(f"FREE TRIP DEBUG: Created trip with ID: {free_trip.id}")
+            logger.info("Created free trip", extra={'trip_id': free_trip.id, 'session_id': free_trip.session_id})
             
             return Response({
                 'success': True,
@@ -59,7 +60,7 @@ def create_free_trip(request):
                 'trip': FreeTripSerializer(free_trip).data
             }, status=status.HTTP_201_CREATED)
         else:
-            print(f"FREE TRIP DEBUG: Validation errors: {serializer.errors}")
+            logger.info("Free trip validation failed", extra={'errors': serializer.errors})
             return Response({
                 'success': False,
                 'error': 'Validation failed',
@@ -67,9 +68,7 @@ def create_free_trip(request):
             }, status=status.HTTP_400_BAD_REQUEST)
             
     except Exception as e:
-        import traceback
-        print(f"FREE TRIP DEBUG: Exception occurred: {str(e)}")
-        print(f"FREE TRIP DEBUG: Traceback: {traceback.format_exc()}")
+        logger.exception("Creating free trip failed: %s", e)
         return Response({
             'success': False,
             'error': f'Server error: {str(e)}'
@@ -84,8 +83,6 @@ def get_free_trips_by_session(request, session_id):
     Get all free trips for a specific session (to show on map)
     """
     try:
-        print(f"FREE TRIP DEBUG: Getting trips for session: {session_id}")
-        
         if not session_id:
             return Response({
                 'success': False,
@@ -94,17 +91,18 @@ def get_free_trips_by_session(request, session_id):
         
         trips = FreeTrip.objects.filter(session_id=session_id, is_active=True)
         serializer = FreeTripSerializer(trips, many=True)
+        trip_list = serializer.data
         
-        print(f"FREE TRIP DEBUG: Found {trips.count()} trips for session {session_id}")
+        logger.debug("Found %d free trips", len(trip_list), extra={'session_id': session_id})
         
         return Response({
             'success': True,
-            'trips': serializer.data,
-            'count': trips.count()
+            'trips': trip_list,
+            'count': len(trip_list)
         }, status=status.HTTP_200_OK)
         
     except Exception as e:
-        print(f"FREE TRIP DEBUG: Error fetching trips: {str(e)}")
+        logger.exception("Fetching free trips failed: %s", e)
         return Response({
             'success': False,
             'error': str(e)
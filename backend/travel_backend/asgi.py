@@ -3,6 +3,11 @@ ASGI config for travel_backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve with an ASGI server so async views such as
+/api/ai-travel/generate/async/ run on the event loop, e.g.:
+
+    uvicorn travel_backend.asgi:application --host 127.0.0.1 --port 8000 --workers 2
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
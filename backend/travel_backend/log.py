@@ -0,0 +1,184 @@
+"""
+Structured, sampled, non-blocking logging for the API.
+
+settings.LOGGING sends every record through QueueingStreamHandler: the
+request thread only puts the record on an in-memory queue and a listener
+thread formats and writes it, so slow stdout never holds up a response.
+StructuredFormatter writes one JSON object per line with the request id and
+any `extra` fields. RequestLogMiddleware gives each request an id and a
+sampling decision (settings.REQUEST_LOGGING SAMPLE_RATE), and
+RequestSamplingFilter drops DEBUG/INFO records of unsampled requests.
+Warnings and errors always pass, and a sampled request is logged in full.
+Levels are set per app in settings.LOGGING['loggers'].
+"""
+
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+DEFAULT_REQUEST_LOGGING_CONFIG = {
+    'SAMPLE_RATE': 1.0,                  # Share of requests whose DEBUG/INFO records are kept
+    'REQUEST_ID_HEADER': 'X-Request-ID', # Reused from the proxy when present, echoed on the response
+}
+
+# (request_id, sampled) of the request being handled; None outside requests
+_request_context: contextvars.ContextVar = contextvars.ContextVar('log_request_context', default=None)
+
+# LogRecord attributes that are not `extra` fields
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {
+    'message', 'asctime', 'request_id', 'taskName',
+}
+
+logger = logging.getLogger('travel_backend.requests')
+
+
+def get_request_logging_config() -> Dict[str, Any]:
+    """Merge settings.REQUEST_LOGGING over the defaults"""
+    config = dict(DEFAULT_REQUEST_LOGGING_CONFIG)
+    config.update(getattr(settings, 'REQUEST_LOGGING', {}))
+    return config
+
+
+def current_request_id() -> Optional[str]:
+    context = _request_context.get()
+    return context[0] if context else None
+
+
+def is_sampled() -> bool:
+    """Whether DEBUG/INFO records of the current request are kept (always True outside requests)"""
+    context = _request_context.get()
+    return context is None or context[1]
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamp records with the current request id (runs on the calling thread)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = current_request_id()
+        return True
+
+
+class RequestSamplingFilter(logging.Filter):
+    """Drop DEBUG/INFO records of requests that were not sampled"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= logging.WARNING or is_sampled()
+
+
+class StructuredFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, request_id and extra fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        request_id = getattr(record, 'request_id', None)
+        if request_id:
+            entry['request_id'] = request_id
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class QueueingStreamHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler with its own listener thread writing to a stream.
+    Records are dropped (and counted) rather than blocking when the queue is full.
+    """
+
+    def __init__(self, stream=None, maxsize: int = 10000):
+        super().__init__(queue.Queue(maxsize))
+        self.target = logging.StreamHandler(stream or sys.stderr)
+        self.listener = logging.handlers.QueueListener(self.queue, self.target)
+        self.listener.start()
+        self.dropped = 0
+
+    def setFormatter(self, fmt):
+        # Formatting happens on the listener thread
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Freeze the message now (args may change later); exc_info is formatted by the listener
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        if self.listener._thread is not None:
+            self.listener.stop()
+        self.target.close()
+        super().close()
+
+
+class RequestLogMiddleware:
+    """Bind a request id and sampling decision, and log one structured line per request"""
+
+    # Runs natively on both stacks so async views keep a fully async middleware chain
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        config = get_request_logging_config()
+        self.sample_rate = config['SAMPLE_RATE']
+        self.header = config['REQUEST_ID_HEADER']
+        self.meta_key = 'HTTP_' + self.header.upper().replace('-', '_')
+
+    def _start(self, request):
+        request_id = request.META.get(self.meta_key) or uuid.uuid4().hex[:16]
+        token = _request_context.set((request_id, random.random() < self.sample_rate))
+        return request_id, token, time.perf_counter()
+
+    def _finish(self, request, response, request_id: str, start_time: float):
+        response[self.header] = request_id
+        logger.info('%s %s %s', request.method, request.path, response.status_code, extra={
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round((time.perf_counter() - start_time) * 1000, 1),
+        })
+        return response
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        request_id, token, start_time = self._start(request)
+        try:
+            return self._finish(request, self.get_response(request), request_id, start_time)
+        finally:
+            _request_context.reset(token)
+
+    async def __acall__(self, request):
+        request_id, token, start_time = self._start(request)
+        try:
+            return self._finish(request, await self.get_response(request), request_id, start_time)
+        finally:
+            _request_context.reset(token)
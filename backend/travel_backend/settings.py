@@ -48,6 +48,7 @@ MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'travel_backend.log.RequestLogMiddleware',
     'travel_backend.middleware.DisableCSRFOnAPIMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -179,3 +180,155 @@ CSRF_COOKIE_SAMESITE = None
 # AI Configuration
 OPENROUTER_API_KEY = "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"
 AI_MODEL = "deepseek/deepseek-chat"
+# Point at a local stand-in (python manage.py run_mock_openrouter) to test without spending tokens
+OPENROUTER_API_URL = os.getenv('OPENROUTER_API_URL', 'https://openrouter.ai/api/v1/chat/completions')
+
+# AI trip result cache (see ai_travel/cache.py)
+# BACKEND: 'memory' (per process), 'django' (uses CACHES[DJANGO_CACHE_ALIAS])
+# or 'sqlite' (local file shared by all workers, survives restarts)
+AI_CACHE = {
+    'BACKEND': os.getenv('AI_CACHE_BACKEND', 'sqlite'),
+    'TTL': 3600,
+    'MAX_ENTRIES': 500,
+    'MAX_BYTES': 64 * 1024 * 1024,
+    'LOCATION': BASE_DIR / 'ai_cache.sqlite3',
+}
+
+# Pooled OpenRouter HTTP client (see ai_travel/http_client.py)
+AI_HTTP = {
+    'CONNECT_TIMEOUT': 5,
+    'READ_TIMEOUT': 60,
+    'POOL_SIZE': 20,
+    'KEEPALIVE': True,
+    'ASYNC_MAX_CONNECTIONS': 200,
+}
+
+# Retry budget for optional AI calls such as recommendations (see ai_travel/retry.py)
+AI_RETRY = {
+    'DEADLINE': 20,
+    'ATTEMPT_TIMEOUT': 15,
+    'MAX_ATTEMPTS': 3,
+    'HEDGE_AFTER': 6,
+    'BACKOFF_BASE': 0.5,
+    'BACKOFF_MAX': 4,
+}
+
+# Curated destinations for fallback itineraries (see ai_travel/catalog.py).
+# Point this at a file outside the code tree to add cities without a deploy.
+AI_FALLBACK_CATALOG = os.getenv('AI_FALLBACK_CATALOG', BASE_DIR / 'ai_travel' / 'data' / 'fallback_catalog.json')
+
+# Running workers reload the shared AI services when the catalog file or this trigger file changes
+# (see ai_travel/registry.py, trigger with: python manage.py reload_ai_services)
+AI_RELOAD = {
+    'TRIGGER_FILE': os.getenv('AI_RELOAD_TRIGGER_FILE', str(BASE_DIR / 'ai_reload.trigger')),
+    'CHECK_SECONDS': 10,
+}
+
+# Background generation jobs (see ai_travel/jobs.py, run with: python manage.py run_ai_worker)
+AI_JOBS = {
+    'MAX_ATTEMPTS': 2,
+    'LEASE_SECONDS': 600,
+    'CALLBACK_TIMEOUT': 10,
+    'CALLBACK_ALLOWED_HOSTS': [h for h in os.getenv('AI_CALLBACK_ALLOWED_HOSTS', '').split(',') if h],
+}
+
+# Off-peak cache warming for popular trips (see ai_travel/warming.py, run with: python manage.py warm_ai_cache)
+AI_CACHE_WARMING = {
+    'TOP_N': 50,
+    'LOOKBACK_DAYS': 30,
+    'CONCURRENCY': 2,
+    'TOKEN_BUDGET': 200000,
+    'TTL': 24 * 3600,
+    'OFF_PEAK': '01:00-06:00',
+}
+
+# Per-call token usage and latency rows in AIGenerationLog (see ai_travel/usage.py)
+AI_USAGE = {
+    'ENABLED': os.getenv('AI_USAGE_ENABLED', 'True').lower() == 'true',
+    'BATCH_SIZE': 50,
+    'FLUSH_INTERVAL': 5,
+}
+
+# AI generation mode: 'fast' (static fallbacks), 'hybrid' (AI recommendations), 'ai' (full AI)
+# or 'combined' (full AI in a single upstream call)
+AI_PERFORMANCE_MODE = os.getenv('AI_PERFORMANCE_MODE', 'hybrid')
+
+# OpenRouter circuit breaker: degrade to 'fast' while the upstream is failing or slow (see ai_travel/health.py)
+AI_UPSTREAM_HEALTH = {
+    'WINDOW_SECONDS': 120,
+    'MIN_CALLS': 5,
+    'ERROR_RATE_THRESHOLD': 0.5,
+    'P95_LATENCY_THRESHOLD': 25,
+    'COOLDOWN_SECONDS': 30,
+}
+
+# Prompt template version per request kind (see ai_travel/prompts.py, compare with: python manage.py benchmark_prompts)
+AI_PROMPTS = {
+    'itinerary': os.getenv('AI_PROMPT_ITINERARY', 'v2'),
+    'budget': os.getenv('AI_PROMPT_BUDGET', 'v2'),
+    'recommendations': os.getenv('AI_PROMPT_RECOMMENDATIONS', 'v2'),
+}
+
+# Token-bucket rate limit and priority queue in front of every OpenRouter call (see ai_travel/scheduler.py).
+# Set AI_SCHEDULER_SHARED_BUCKET to a file path to share one bucket between all workers on the host.
+AI_SCHEDULER = {
+    'RATE': float(os.getenv('AI_SCHEDULER_RATE', '5')),
+    'BURST': int(os.getenv('AI_SCHEDULER_BURST', '10')),
+    'MAX_QUEUE_WAIT': 15,
+    'SHARED_BUCKET': os.getenv('AI_SCHEDULER_SHARED_BUCKET', ''),
+}
+
+# Serve recent matching trips from the AIItinerary table when the trip cache misses (see ai_travel/reuse.py)
+AI_REUSE = {
+    'ENABLED': os.getenv('AI_REUSE_ENABLED', 'True').lower() == 'true',
+    'MAX_AGE_DAYS': 7,
+}
+
+# Saving generated trips (see ai_travel/persistence.py). DEFERRED inserts after the response is built;
+# the itinerary then becomes readable a moment after the client receives its id.
+AI_PERSISTENCE = {
+    'DEFERRED': os.getenv('AI_PERSISTENCE_DEFERRED', 'False').lower() == 'true',
+}
+
+# Stored itinerary content (see ai_travel/storage.py): zlib by default, 'zstd' needs the zstandard package
+AI_STORAGE = {
+    'COMPRESSION': os.getenv('AI_STORAGE_COMPRESSION', 'zlib'),
+}
+
+# Request ids and log sampling (see travel_backend/log.py). SAMPLE_RATE keeps DEBUG/INFO records for
+# that share of requests; warnings and errors are always logged.
+REQUEST_LOGGING = {
+    'SAMPLE_RATE': float(os.getenv('LOG_SAMPLE_RATE', '1.0')),
+}
+
+# Structured logs written by a background thread. LOG_LEVEL sets every app; LOG_LEVEL_<APP>
+# (e.g. LOG_LEVEL_AI_TRAVEL=DEBUG) overrides one. LOG_FORMAT=console gives plain text lines.
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'request_context': {'()': 'travel_backend.log.RequestContextFilter'},
+        'sampling': {'()': 'travel_backend.log.RequestSamplingFilter'},
+    },
+    'formatters': {
+        'structured': {'()': 'travel_backend.log.StructuredFormatter'},
+        'console': {'format': '%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s'},
+    },
+    'handlers': {
+        'queue': {
+            '()': 'travel_backend.log.QueueingStreamHandler',
+            'stream': 'ext://sys.stdout',
+            'formatter': os.getenv('LOG_FORMAT', 'structured'),
+            'filters': ['request_context', 'sampling'],
+        },
+    },
+    'root': {'handlers': ['queue'], 'level': 'WARNING'},
+    'loggers': {
+        'django': {'handlers': ['queue'], 'level': 'INFO', 'propagate': False},
+        **{
+            app: {'level': os.getenv(f'LOG_LEVEL_{app.upper()}', LOG_LEVEL)}
+            for app in ['travel_backend', 'accounts', 'trips', 'free_trips', 'ai_travel', 'destinations']
+        },
+    },
+}
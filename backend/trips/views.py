@@ -5,6 +5,9 @@ from rest_framework import status
 from django.views.decorators.csrf import csrf_exempt
 from .models import Trip
 from .serializers import TripSerializer
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 @api_view(['POST'])
@@ -14,12 +17,7 @@ def create_trip(request):
     Create a new trip for the authenticated user
     """
     try:
-        # Debug: Print request details
-        print(f"CREATE TRIP DEBUG: Request method: {request.method}")
-        print(f"CREATE TRIP DEBUG: Request headers: {dict(request.headers)}")
-        print(f"CREATE TRIP DEBUG: User authenticated: {request.user.is_authenticated}")
-        print(f"CREATE TRIP DEBUG: User: {request.user}")
-        print(f"CREATE TRIP DEBUG: User ID: {getattr(request.user, 'id', 'None')}")
+        logger.debug("Create trip", extra={'user_id': request.user.id})
         
         # Use request.data instead of json.loads(request.body)
         data = request.data
@@ -39,7 +37,7 @@ def create_trip(request):
             }, status=status.HTTP_400_BAD_REQUEST)
             
     except Exception as e:
-        print(f"Error creating trip: {str(e)}")
+        logger.exception("Creating trip failed: %s", e)
         return Response({
             'success': False,
             'error': str(e)
@@ -53,12 +51,7 @@ def get_user_trips(request):
     Get all trips for the authenticated user
     """
     try:
-        # Debug: Print request details
-        print(f"TRIPS DEBUG: Request method: {request.method}")
-        print(f"TRIPS DEBUG: Request headers: {dict(request.headers)}")
-        print(f"TRIPS DEBUG: User authenticated: {request.user.is_authenticated}")
-        print(f"TRIPS DEBUG: User: {request.user}")
-        print(f"TRIPS DEBUG: User ID: {getattr(request.user, 'id', 'None')}")
+        logger.debug("List trips", extra={'user_id': request.user.id})
             
         trips = Trip.objects.filter(user=request.user)
         serializer = TripSerializer(trips, many=True)
@@ -61,7 +61,7 @@ export const TripProvider = ({ children }) => {
       }
 
       // Fetch AI-generated trips
-      const aiTripsData = await apiService.aiTravel.getUserItineraries();
+      const aiTripsData = await apiService.aiTravel.getUserItineraries({ content: 'full' }); // Needs daily schedules
       let aiTrips = [];
       
       if (aiTripsData.success) {
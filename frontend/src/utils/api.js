@@ -76,6 +76,22 @@ export const makeApiCall = async (url, options = {}) => {
   }
 };
 
+// Itinerary history endpoints are cursor paginated; follow the cursors to collect every page
+const fetchAllItineraryPages = async (call, url, params = {}) => {
+  const itineraries = [];
+  let cursor = null;
+  do {
+    const query = new URLSearchParams({ ...params, ...(cursor && { cursor }) }).toString();
+    const response = await call(query ? `${url}?${query}` : url);
+    const data = await response.json();
+    if (!data.success) return data;
+    itineraries.push(...data.itineraries);
+    const next = data.pagination?.next;
+    cursor = next ? new URL(next).searchParams.get('cursor') : null;
+  } while (cursor);
+  return { success: true, itineraries, count: itineraries.length };
+};
+
 // Helper function for non-authenticated API calls
 export const makePublicApiCall = async (url, options = {}) => {
   const defaultOptions = {
@@ -248,14 +264,13 @@ export const apiService = {
       }
     },
     
-    getUserItineraries: async () => {
-      const response = await makeApiCall(config.endpoints.aiTravelMyItineraries);
-      return response.json();
+    // History lists return summaries by default; pass { content: 'full' } for itinerary_content
+    getUserItineraries: async (params = {}) => {
+      return fetchAllItineraryPages(makeApiCall, config.endpoints.aiTravelMyItineraries, params);
     },
     
-    getSessionItineraries: async (sessionId) => {
-      const response = await makePublicApiCall(config.endpoints.aiTravelSession(sessionId));
-      return response.json();
+    getSessionItineraries: async (sessionId, params = {}) => {
+      return fetchAllItineraryPages(makePublicApiCall, config.endpoints.aiTravelSession(sessionId), params);
     },
     
     regenerateBudget: async (itineraryId, options = {}) => {